@@ -353,7 +353,7 @@ deploy_miner() {
 # Function to serve a validator
 serve_validator() {
     echo "Serving Validator"
-    pm2 start "python -m comchat.cli $module_path"
+    pm2 start "python -m comchat.cli serve-comchat $module_path"
     echo "Validator served."
 }
 
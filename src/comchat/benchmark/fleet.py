@@ -0,0 +1,178 @@
+"""
+A local fleet of fake miners, speaking the same HTTP protocol as
+`communex.module.client.ModuleClient` expects from a served `LLM` module.
+"""
+
+import asyncio
+import hashlib
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiohttp import web
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    The latency of a fake miner answer, in seconds.
+
+    `kind` is one of "fixed" (always `median`), "uniform" (between 0 and
+    2 * `median`) or "lognormal" (with the given `median` and log-space `sigma`).
+    """
+
+    kind: str = "lognormal"
+    median: float = 0.5
+    sigma: float = 0.6
+
+    def sample(self, rng: random.Random) -> float:
+        match self.kind:
+            case "fixed":
+                return self.median
+            case "uniform":
+                return rng.uniform(0, 2 * self.median)
+            case "lognormal":
+                return self.median * rng.lognormvariate(0, self.sigma)
+            case _:
+                raise ValueError(f"Unknown latency distribution {self.kind}")
+
+
+@dataclass
+class FleetConfig:
+    miners: int = 100
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    # chance of answering with an HTTP 500
+    failure_rate: float = 0.05
+    # chance of answering with the same text as another miner
+    duplication_rate: float = 0.1
+    # share of miners registered but offline: they accept connections and
+    # never answer, so they're only found out by timing out
+    offline_rate: float = 0.0
+    # requests in flight per service the fake upstream providers take across
+    # the fleet, beyond which the miners fail as rate limited; 0 for no limit
+    service_capacity: int = 0
+    answer_words: int = 300
+    seed: int = 0
+
+
+# a small vocabulary, so fake answers share words with the fake reference answer
+VOCABULARY = (
+    "system process energy information model theory structure dynamics network "
+    "function state signal pattern emergence feedback entropy order complexity "
+    "agent interaction equilibrium evolution selection memory learning inference "
+    "representation symmetry scale measure probability distribution field wave "
+    "particle observer boundary constraint adaptation control stability chaos"
+).split()
+
+
+def fake_text(rng: random.Random, words: int) -> str:
+    sentences: list[str] = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 20))
+        sentence = " ".join(rng.choices(VOCABULARY, k=length))
+        sentences.append(sentence.capitalize() + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+
+class FakeMinerFleet:
+    """
+    Serves `config.miners` fake miners on consecutive local ports from a
+    background event loop. Use it as a context manager.
+    """
+
+    def __init__(self, config: FleetConfig, host: str = "127.0.0.1") -> None:
+        self.config = config
+        self.host = host
+        self.rng = random.Random(config.seed)
+        self.ports: list[int] = []
+        self.offline_ports: set[int] = set()
+        self.requests = 0
+        self.rate_limited = 0
+        self._service_in_flight: dict[str, int] = {}
+        self._duplicate_answer = fake_text(random.Random(config.seed), config.answer_words)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._runner: web.AppRunner | None = None
+        self._stopping: asyncio.Event | None = None
+
+    async def _hang_if_offline(self, request: web.Request) -> None:
+        if request.url.port in self.offline_ports:
+            assert self._stopping is not None
+            # until the client gives up, or the fleet stops
+            await self._stopping.wait()
+            raise web.HTTPServiceUnavailable()
+
+    async def _handle_get_model(self, request: web.Request) -> web.Response:
+        await self._hang_if_offline(request)
+        return web.json_response({"model": "fake"})
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await self._hang_if_offline(request)
+        body: dict[str, Any] = await request.json()
+        params = body.get("params", body)
+        service = params.get("service", "")
+        in_flight = self._service_in_flight.get(service, 0)
+        if self.config.service_capacity and in_flight >= self.config.service_capacity:
+            self.rate_limited += 1
+            return web.json_response({"error": f"{service} rate limit exceeded"}, status=500)
+        self._service_in_flight[service] = in_flight + 1
+        try:
+            await asyncio.sleep(self.config.latency.sample(self.rng))
+        finally:
+            self._service_in_flight[service] -= 1
+        if self.rng.random() < self.config.failure_rate:
+            return web.json_response({"error": "fake failure"}, status=500)
+        if self.rng.random() < self.config.duplication_rate:
+            answer = self._duplicate_answer
+        else:
+            # seeded by the prompt, so each miner answers consistently, and
+            # not with the builtin hash, which is salted per process
+            prompt = f"{params.get('prompt', '')}@{request.url.port}"
+            seed = int.from_bytes(hashlib.blake2b(prompt.encode(), digest_size=8).digest(), "big")
+            answer = fake_text(random.Random(seed), self.config.answer_words)
+        return web.json_response({"answer": answer})
+
+    async def _start(self) -> None:
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post("/method/generate", self._handle)
+        app.router.add_post("/method/get_model", self._handle_get_model)
+        self._stopping = asyncio.Event()
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        for _ in range(self.config.miners):
+            site = web.TCPSite(self._runner, self.host, 0)
+            await site.start()
+            server: Any = site._server  # type: ignore
+            self.ports.append(server.sockets[0].getsockname()[1])
+        offline = round(self.config.offline_rate * len(self.ports))
+        self.offline_ports = set(self.rng.sample(self.ports, offline))
+
+    async def _stop(self) -> None:
+        if self._stopping:
+            self._stopping.set()
+        if self._runner:
+            await self._runner.cleanup()
+
+    def start(self) -> None:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    @property
+    def addresses(self) -> list[str]:
+        return [f"{self.host}:{port}" for port in self.ports]
+
+    def __enter__(self) -> "FakeMinerFleet":
+        self.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.stop()
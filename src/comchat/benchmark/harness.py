@@ -0,0 +1,178 @@
+"""
+Runs `TextValidator.validate_step` end to end against a fake miner fleet and
+reports wall time, CPU time, memory and throughput.
+"""
+
+import asyncio
+import resource
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+from substrateinterface import Keypair  # type: ignore
+
+from ..validator._config import ValidatorSettings
+from ..validator.text_validator import STAGE_SECONDS
+from .fleet import FakeMinerFleet, FleetConfig
+from .stubs import (
+    BenchmarkValidator,
+    FakeEmbedder,
+    ShardedBenchmarkValidator,
+    StubCommuneClient,
+)
+
+STAGES = (
+    "chain_query", "question_generation", "reference_embedding",
+    "liveness_probe", "miner_fanout", "gibberish_filter", "embedding", "scoring", "scoring_tail",
+    "replay_check", "voting",
+)
+
+
+@dataclass
+class BenchmarkConfig:
+    fleet: FleetConfig = field(default_factory=FleetConfig)
+    steps: int = 1
+    call_timeout: int = 10
+    embedding_latency: float = 0.0
+    reference_words: int = 300
+    # needs the detector model, downloaded from the hugging face hub on first use
+    gibberish_filter: bool = False
+    scoring_executor: str = "thread"
+    shards: int = 1
+    # miners asked per step, 0 asks all of them
+    miner_sample_size: int = 0
+    # 0 asks the miners without probing them first
+    probe_timeout: float = 3.0
+    # "single", "round_robin" or "weighted"
+    model_assignment: str = "round_robin"
+    # allocation tracing makes the peak exact but slows everything down
+    trace_allocations: bool = False
+
+
+@dataclass
+class BenchmarkReport:
+    """
+    The measurements of a benchmark run. The fake fleet runs in the same process,
+    so `cpu_s` and the memory figures include its (small) share.
+    """
+
+    miners: int
+    steps: int
+    requests: int
+    # requests failed by the fake providers' rate limits
+    rate_limited: int
+    votes: int
+    wall_s: list[float]
+    cpu_s: list[float]
+    stage_s: dict[str, float]
+    peak_rss_mb: float
+    peak_traced_mb: float | None
+
+    @property
+    def median_wall_s(self) -> float:
+        return statistics.median(self.wall_s)
+
+    @property
+    def median_cpu_s(self) -> float:
+        return statistics.median(self.cpu_s)
+
+    @property
+    def throughput(self) -> float:
+        """Generate requests served per second of wall time."""
+        return self.requests / sum(self.wall_s)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_benchmark(config: BenchmarkConfig) -> BenchmarkReport:
+    """
+    Runs `config.steps` validation steps against a freshly started fake fleet.
+
+    Args:
+        config: The fleet and validator configuration.
+
+    Returns:
+        The measurements of the run.
+    """
+    key = Keypair.create_from_uri("//Alice")
+    settings = ValidatorSettings(
+        api_key="benchmark",
+        gibberish_filter=config.gibberish_filter,
+        scoring_executor=config.scoring_executor,
+        miner_sample_size=config.miner_sample_size,
+        probe_timeout=config.probe_timeout,
+        model_assignment=config.model_assignment,
+    )  # type: ignore
+
+    with FakeMinerFleet(config.fleet) as fleet:
+        addresses = dict(enumerate(fleet.addresses))
+        keys = {uid: f"fake-miner-{uid}" for uid in addresses}
+        validator_uid = len(addresses)
+        keys[validator_uid] = key.ss58_address
+        client = StubCommuneClient(addresses, keys)
+
+        embedder = FakeEmbedder(latency=config.embedding_latency)
+        if config.shards > 1:
+            validator: BenchmarkValidator = ShardedBenchmarkValidator(
+                key,
+                client.netuid,
+                client,  # type: ignore
+                embedder=embedder,
+                call_timeout=config.call_timeout,
+                reference_words=config.reference_words,
+                seed=config.fleet.seed,
+                shards=config.shards,
+                worker_embedder=embedder,
+            )
+        else:
+            validator = BenchmarkValidator(
+                key,
+                client.netuid,
+                client,  # type: ignore
+                embedder=embedder,
+                call_timeout=config.call_timeout,
+                reference_words=config.reference_words,
+                seed=config.fleet.seed,
+            )
+
+        stages_before = {stage: STAGE_SECONDS.sum(stage=stage) for stage in STAGES}
+        if config.trace_allocations:
+            tracemalloc.start()
+        wall_s: list[float] = []
+        cpu_s: list[float] = []
+        try:
+            for _ in range(config.steps):
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                asyncio.run(validator.validate_step(settings, client.netuid))
+                wall_s.append(time.perf_counter() - wall_start)
+                # the CPU time of shard workers isn't included
+                cpu_s.append(time.process_time() - cpu_start)
+        finally:
+            if isinstance(validator, ShardedBenchmarkValidator):
+                validator.shutdown()
+        peak_traced_mb = None
+        if config.trace_allocations:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peak_traced_mb = peak / 1024 / 1024
+
+        stage_s = {
+            stage: (STAGE_SECONDS.sum(stage=stage) - stages_before[stage]) / config.steps
+            for stage in STAGES
+        }
+        return BenchmarkReport(
+            miners=config.fleet.miners,
+            steps=config.steps,
+            requests=fleet.requests,
+            rate_limited=fleet.rate_limited,
+            votes=len(client.votes),
+            wall_s=wall_s,
+            cpu_s=cpu_s,
+            stage_s=stage_s,
+            peak_rss_mb=_peak_rss_mb(),
+            peak_traced_mb=peak_traced_mb,
+        )
@@ -0,0 +1,85 @@
+"""
+Measures module import time and memory in a fresh interpreter, using
+`python -X importtime`, to keep the validator and miner startup fast.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+# the entry points of `comchat.cli serve-comchat` and `comx module serve comchat.miner.llm.LLM`
+DEFAULT_MODULES = ("comchat.cli", "comchat.validator.text_validator", "comchat.miner.llm")
+
+_RSS_PROGRAM = (
+    "import {module}; import resource; "
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+
+@dataclass
+class ImportReport:
+    module: str
+    # interpreter startup included
+    wall_s: float
+    # as reported by -X importtime, interpreter startup excluded
+    import_s: float
+    peak_rss_mb: float
+    # imports made directly by the top level ones, by cumulative time, in seconds
+    slowest: list[tuple[str, float]]
+
+
+def _parse_importtime(stderr: str) -> list[tuple[int, str, float]]:
+    """Returns the (nesting depth, package, cumulative seconds) of every import."""
+    imports: list[tuple[int, str, float]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, package = line[len("import time:"):].split("|")
+        # nested imports are indented by two spaces per level under their importer
+        name = package.strip()
+        depth = (len(package) - len(package.lstrip()) - 1) // 2
+        imports.append((depth, name, int(cumulative) / 1e6))
+    return imports
+
+
+def measure_import(module: str, runs: int = 3, top: int = 10) -> ImportReport:
+    """
+    Imports `module` in `runs` fresh interpreters and keeps the median figures.
+
+    Args:
+        module: The dotted module name to import.
+        runs: How many interpreters to start.
+        top: How many of the slowest top level imports to report.
+
+    Returns:
+        The import measurements.
+    """
+    wall: list[float] = []
+    import_s: list[float] = []
+    rss: list[float] = []
+    slowest: list[tuple[str, float]] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _RSS_PROGRAM.format(module=module)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        wall.append(time.perf_counter() - start)
+        imports = _parse_importtime(result.stderr)
+        import_s.append(sum(seconds for depth, _, seconds in imports if depth == 0))
+        # ru_maxrss is in kilobytes on linux
+        rss.append(int(result.stdout.strip().splitlines()[-1]) / 1024)
+        direct = [(name, seconds) for depth, name, seconds in imports if depth == 1]
+        slowest = sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+
+    return ImportReport(
+        module=module,
+        wall_s=statistics.median(wall),
+        import_s=statistics.median(import_s),
+        peak_rss_mb=statistics.median(rss),
+        slowest=slowest,
+    )
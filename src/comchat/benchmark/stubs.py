@@ -0,0 +1,92 @@
+"""
+Offline stand-ins for the chain client, the embedding service and the
+reference answer LLM, so a `TextValidator` can run without any network.
+"""
+
+import hashlib
+import random
+import time
+from typing import Any
+
+import numpy as np
+
+from ..validator._config import ValidatorSettings
+from ..validator.meta_prompt import CriteriaSampler, explanation_prompt
+from ..validator.sharding import ShardedValidator
+from ..validator.similarity import Embedder, Embedding
+from ..validator.text_validator import TextValidator
+from .fleet import fake_text
+
+
+class StubCommuneClient:
+    """Answers the chain queries the validator makes from a fixed snapshot."""
+
+    def __init__(self, addresses: dict[int, str], keys: dict[int, str], netuid: int = 0):
+        self.addresses = addresses
+        self.keys = keys
+        self.netuid = netuid
+        self.votes: list[dict[str, Any]] = []
+
+    def query_map_address(self, netuid: int) -> dict[int, str]:
+        return self.addresses
+
+    def query_map_key(self, netuid: int) -> dict[int, str]:
+        return self.keys
+
+    def query_map_subnet_names(self) -> dict[int, str]:
+        return {self.netuid: "comchat"}
+
+    def vote(self, key: Any, uids: list[int], weights: list[int], netuid: int) -> None:
+        self.votes.append({"uids": uids, "weights": weights, "netuid": netuid})
+
+
+class FakeEmbedder(Embedder):
+    """
+    Embeds texts as normalized hashed bag of words, optionally sleeping to
+    emulate the latency of a remote embedding service.
+    """
+
+    def __init__(self, dimensions: int = 1536, latency: float = 0.0) -> None:
+        self.dimensions = dimensions
+        self.latency = latency
+
+    def get_embedding(self, input: str) -> Embedding:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(input)
+
+    def get_embeddings(self, inputs: list[str]) -> Embedding:
+        # one round trip for the whole batch, like the OpenAI embeddings API
+        if self.latency:
+            time.sleep(self.latency)
+        return np.stack([self._embed(input) for input in inputs])
+
+    def _embed(self, input: str) -> Embedding:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in input.lower().split():
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            vector[int.from_bytes(digest, "little") % self.dimensions] += 1
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+
+
+class BenchmarkValidator(TextValidator):
+    """A `TextValidator` whose reference answer is generated locally."""
+
+    def __init__(self, *args: Any, reference_words: int = 300, seed: int = 0, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.reference_words = reference_words
+        self.rng = random.Random(seed)
+        self.question_sampler = CriteriaSampler(seed)
+
+    def _get_validation_dataset(self, settings: ValidatorSettings):
+        prompt, criteria = explanation_prompt(self.question_sampler)
+        explanation = '"Fake subject"\n' + fake_text(self.rng, self.reference_words)
+        dataset: tuple[str, str] = (prompt, explanation)
+        return dataset, criteria, time.time()
+
+
+class ShardedBenchmarkValidator(BenchmarkValidator, ShardedValidator):
+    """A `BenchmarkValidator` that asks the miners from shard worker processes."""
@@ -1,16 +1,15 @@
+import json
+
 import typer
 from typing import Annotated, Optional
 from rich.console import Console
-from communex._common import get_node_url
-from communex.client import CommuneClient
-from communex.compat.key import classic_load_key
-
-from comchat.validator.text_validator import (
-    TextValidator, 
-    ValidatorSettings,
-    get_comchat_netuid,
-    ClaudeProviders,
-    )
+from rich.table import Table
+
+from comchat.logs import setup_logging
+from comchat.validator._config import ValidatorSettings
+
+# the commands import what they need themselves, so that e.g. evaluating reward
+# curves doesn't pay for loading the chain client and the provider SDKs
 
 
 app = typer.Typer()
@@ -37,22 +36,386 @@ def serve(
     provider: Optional[str] = typer.Option(
         default="anthropic", callback=provider_callback
     ),
-    testnet: bool = False
+    testnet: bool = False,
+    log_level: Optional[str] = typer.Option(
+        default=None, help="Minimum log level, defaults to COMCHAT_LOG_LEVEL or INFO"
+    ),
+    log_json: Optional[bool] = typer.Option(
+        default=None, help="Log JSON lines, defaults to COMCHAT_LOG_JSON_OUTPUT"
+    ),
+    metrics_port: Optional[int] = typer.Option(
+        default=None, help="Serve Prometheus metrics on this local port"
+    ),
+    shards: Optional[int] = typer.Option(
+        default=None, help="Worker processes to shard the miners across"
+    ),
     ):
+    setup_logging(level=log_level, json_output=log_json)
+    from communex._common import get_node_url
+    from communex.client import CommuneClient
+    from communex.compat.key import classic_load_key
+    from comchat.validator.text_validator import (
+        TextValidator,
+        get_comchat_netuid,
+        ClaudeProviders,
+        )
+
     provider_enumerated = ClaudeProviders(provider)
     keypair = classic_load_key(commune_key) # type: ignore
     settings = ValidatorSettings(
     ) #type: ignore
+    if metrics_port is not None:
+        settings.metrics_port = metrics_port
+    if shards is not None:
+        settings.shards = shards
     c_client = CommuneClient(get_node_url(use_testnet=testnet))
     comchat_uid = get_comchat_netuid(c_client)
-    validator = TextValidator(
-        keypair, 
-        comchat_uid, 
-        c_client, 
+    if settings.shards > 1:
+        from comchat.validator.sharding import ShardedValidator
+
+        validator = ShardedValidator(
+            keypair,
+            comchat_uid,
+            c_client,
+            call_timeout=call_timeout,
+            provider=provider_enumerated,
+            shards=settings.shards,
+        )
+    else:
+        validator = TextValidator(
+            keypair, 
+            comchat_uid, 
+            c_client, 
+            call_timeout=call_timeout,
+            provider=provider_enumerated
+        )
+    validator.validation_loop(settings)
+
+
+@app.command('evaluate-rewards')
+def evaluate_rewards(
+    history_path: Annotated[
+        str,
+        typer.Argument(
+            help="The score history directory, or a JSON or JSON lines file "
+            "with the uid -> score mapping of each step"
+            )
+        ],
+    curve: Annotated[
+        Optional[list[str]],
+        typer.Option(help="Curve to evaluate, can be repeated. Defaults to all curves")
+        ] = None,
+    days: Optional[int] = typer.Option(
+        default=None, help="Days of the score history directory to evaluate, all when unset"
+        ),
+    ):
+    from comchat.validator.reward_eval import evaluate_curves, load_score_history
+
+    # nothing is generated, the api key isn't needed
+    settings = ValidatorSettings(api_key="evaluate-rewards")  # type: ignore
+    history = load_score_history(history_path, days)
+    reports = evaluate_curves(history, settings, curve)
+
+    table = Table(title=f"Reward curves over {len(history)} steps")
+    for column in (
+        "curve", "steps", "time (ms)", "nonzero weights",
+        "max share", "top 10% share", "gini",
+        ):
+        table.add_column(column)
+    for report in reports:
+        table.add_row(
+            report.curve,
+            str(report.steps),
+            f"{report.elapsed_ms:.2f}",
+            f"{report.mean_nonzero_weights:.1f}",
+            f"{report.mean_max_share:.3f}",
+            f"{report.mean_top_decile_share:.3f}",
+            f"{report.mean_gini:.3f}",
+        )
+    Console().print(table)
+
+
+@app.command('export-questions')
+def export_questions(
+    store_path: Annotated[str, typer.Argument(help="The question/answer store")],
+    output_path: Annotated[str, typer.Argument(help="The exchange file to write")],
+    since: Annotated[
+        float, typer.Option(help="Only export records created after this unix timestamp")
+        ] = 0.0,
+    ):
+    """Exports the questions and reference answers of a store, to share them."""
+    from comchat.validator.qa_store import QAStore
+
+    count = QAStore(store_path).export(output_path, since)
+    print(f"Exported {count} records to {output_path}")
+
+
+@app.command('import-questions')
+def import_questions(
+    store_path: Annotated[str, typer.Argument(help="The question/answer store")],
+    input_path: Annotated[str, typer.Argument(help="The exchange file to import")],
+    ):
+    """Imports the records of an exchange file, checking their digests."""
+    from comchat.validator.qa_store import QAStore
+
+    added, rejected = QAStore(store_path).import_records(input_path)
+    print(f"Imported {added} new records, rejected {rejected}")
+
+
+@app.command('check-embedding-precision')
+def check_embedding_precision(
+    store_path: Annotated[str, typer.Argument(help="The question/answer store")],
+    precision: Annotated[
+        Optional[list[str]],
+        typer.Option(help="Precision to check, can be repeated. Defaults to all of them")
+        ] = None,
+    dimensions: Annotated[
+        int, typer.Option(help="The dimensions kept, 0 keeps them all")
+        ] = 0,
+    epsilon: Annotated[
+        float, typer.Option(help="The largest acceptable score difference")
+        ] = 0.005,
+    ):
+    """
+    Checks how far the scores move when embeddings are stored with fewer
+    dimensions or a lower precision, scoring each stored reference against the
+    others. Exits with an error if a score moves by more than epsilon.
+    """
+    import numpy as np
+
+    from comchat.validator.qa_store import QAStore
+    from comchat.validator.quantization import Precision, check_tolerance
+
+    vectors = [record.vector() for record in QAStore(store_path)]
+    if len(vectors) < 2:
+        print("The store needs at least 2 records")
+        raise typer.Exit(code=1)
+    embeddings = np.stack(vectors)
+
+    table = Table(title=f"{len(vectors)} reference embeddings, epsilon {epsilon}")
+    for column in ("precision", "dimensions", "bytes", "compression", "max error", "mean error"):
+        table.add_column(column)
+    failed = False
+    for name in precision or [p.value for p in Precision]:
+        reports = [
+            check_tolerance(np.delete(embeddings, i, axis=0), reference, name, dimensions, epsilon)
+            for i, reference in enumerate(embeddings)
+        ]
+        max_error = max(report.max_error for report in reports)
+        failed = failed or max_error > epsilon
+        table.add_row(
+            name,
+            str(reports[0].dimensions),
+            f"{reports[0].bytes_per_vector:.0f}",
+            f"{reports[0].compression:.1f}x",
+            f"{max_error:.2e}",
+            f"{sum(report.mean_error for report in reports) / len(reports):.2e}",
+            style=None if max_error <= epsilon else "red",
+        )
+    Console().print(table)
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command('benchmark')
+def benchmark(
+    miners: int = 100,
+    steps: int = 1,
+    latency: str = typer.Option(
+        default="lognormal", help="Miner latency distribution: fixed, uniform or lognormal"
+    ),
+    latency_median: float = 0.5,
+    latency_sigma: float = 0.6,
+    failure_rate: float = 0.05,
+    duplication_rate: float = 0.1,
+    offline_rate: float = typer.Option(
+        default=0.0, help="Share of miners that never answer, not even the liveness probe"
+    ),
+    service_capacity: int = typer.Option(
+        default=0, help="Requests in flight each fake provider takes, 0 for no limit"
+    ),
+    answer_words: int = 300,
+    call_timeout: int = 10,
+    probe_timeout: float = typer.Option(
+        default=3.0, help="Liveness probe timeout, 0 asks the miners without probing them"
+    ),
+    embedding_latency: float = 0.0,
+    seed: int = 0,
+    trace_allocations: bool = False,
+    gibberish_filter: bool = False,
+    scoring_executor: str = typer.Option(
+        default="thread", help="Where scoring runs: inline, thread or process"
+    ),
+    shards: int = typer.Option(
+        default=1, help="Validator worker processes to shard the miners across"
+    ),
+    sample_size: int = typer.Option(
+        default=0, help="Miners asked per step, 0 asks all of them"
+    ),
+    model_assignment: str = typer.Option(
+        default="round_robin", help="How models are spread over miners: single, round_robin or weighted"
+    ),
+    json_output: bool = typer.Option(default=False, help="Print the report as JSON"),
+    ):
+    """Runs validation steps offline, against a local fleet of fake miners."""
+    from comchat.benchmark.fleet import FleetConfig, LatencyDistribution
+    from comchat.benchmark.harness import BenchmarkConfig, run_benchmark
+
+    config = BenchmarkConfig(
+        fleet=FleetConfig(
+            miners=miners,
+            latency=LatencyDistribution(latency, latency_median, latency_sigma),
+            failure_rate=failure_rate,
+            duplication_rate=duplication_rate,
+            offline_rate=offline_rate,
+            service_capacity=service_capacity,
+            answer_words=answer_words,
+            seed=seed,
+        ),
+        steps=steps,
         call_timeout=call_timeout,
-        provider=provider_enumerated
+        embedding_latency=embedding_latency,
+        reference_words=answer_words,
+        trace_allocations=trace_allocations,
+        gibberish_filter=gibberish_filter,
+        scoring_executor=scoring_executor,
+        shards=shards,
+        miner_sample_size=sample_size,
+        probe_timeout=probe_timeout,
+        model_assignment=model_assignment,
     )
-    validator.validation_loop(settings)
+    report = run_benchmark(config)
+    summary = {
+        "miners": report.miners,
+        "steps": report.steps,
+        "requests": report.requests,
+        "rate_limited": report.rate_limited,
+        "votes": report.votes,
+        "median_wall_s": report.median_wall_s,
+        "median_cpu_s": report.median_cpu_s,
+        "throughput_miners_per_s": report.throughput,
+        "peak_rss_mb": report.peak_rss_mb,
+        "peak_traced_mb": report.peak_traced_mb,
+        **{f"stage_{stage}_s": seconds for stage, seconds in report.stage_s.items()},
+    }
+    if json_output:
+        print(json.dumps(summary))
+        return
+    table = Table(title="Validation step benchmark")
+    table.add_column("metric")
+    table.add_column("value")
+    for name, value in summary.items():
+        table.add_row(name, f"{value:.4f}" if isinstance(value, float) else str(value))
+    Console().print(table)
+
+
+@app.command('replay')
+def replay(
+    path: Annotated[str, typer.Argument(help="A step recording, or a directory of them")],
+    repeat: int = typer.Option(default=1, help="Times to replay the steps, for benchmarking"),
+    scoring_executor: str = typer.Option(
+        default="inline", help="Where scoring runs: inline, thread or process"
+    ),
+    gibberish_filter: bool = False,
+    json_output: bool = typer.Option(default=False, help="Print the report as JSON"),
+    ):
+    """
+    Replays recorded validation steps offline, with the current scoring and
+    reward settings, and compares the scores and weights to the recorded ones.
+    """
+    from comchat.validator._config import ValidatorSettings
+    from comchat.validator.replay import replay as replay_steps
+
+    settings = ValidatorSettings(
+        api_key="replay",
+        scoring_executor=scoring_executor,
+        gibberish_filter=gibberish_filter,
+    )  # type: ignore
+    report = replay_steps(path, settings, repeat)
+    summary = {
+        "steps": len(report.steps),
+        "answers": report.answers,
+        "scored": report.scored,
+        "wall_s": report.wall_s,
+        "steps_per_minute": report.steps_per_minute,
+        "max_score_diff": report.max_score_diff,
+        "mean_score_diff": report.mean_score_diff,
+        "weights_changed": report.weights_changed,
+    }
+    if json_output:
+        print(json.dumps(summary))
+        return
+    table = Table(title=f"Replay of {path}")
+    table.add_column("metric")
+    table.add_column("value")
+    for name, value in summary.items():
+        table.add_row(name, f"{value:.4g}" if isinstance(value, float) else str(value))
+    Console().print(table)
+
+
+@app.command('query-history')
+def query_history(
+    path: Annotated[str, typer.Argument(help="The score history directory")],
+    query: Annotated[str, typer.Argument(help="trends, models or timeouts")],
+    days: Optional[int] = typer.Option(default=None, help="Days back to query, all by default"),
+    uid: Optional[int] = typer.Option(default=None, help="The miner to query, all by default"),
+    every: str = typer.Option(default="1d", help="The period of the trends"),
+    limit: int = typer.Option(default=50, help="Rows to print"),
+    csv: Optional[str] = typer.Option(default=None, help="Write all the rows to this CSV file"),
+    ):
+    """Runs a prebuilt query over the score history."""
+    from comchat.validator.history import QUERIES, miner_trends, scan
+
+    if query not in QUERIES:
+        print(f"Unknown query {query}, pick one of {', '.join(QUERIES)}")
+        raise typer.Exit(code=1)
+    history = scan(path, days, uid)
+    lazy = miner_trends(history, every) if query == "trends" else QUERIES[query](history)
+    result = lazy.collect()
+    if csv:
+        result.write_csv(csv)
+    table = Table(title=f"{query}: {len(result)} rows")
+    for column in result.columns:
+        table.add_column(column)
+    for row in result.head(limit).iter_rows():
+        table.add_row(*(f"{v:.4g}" if isinstance(v, float) else str(v) for v in row))
+    Console().print(table)
+
+
+@app.command('benchmark-startup')
+def benchmark_startup(
+    module: Annotated[
+        Optional[list[str]],
+        typer.Option(help="Module to import, can be repeated. Defaults to the entry points")
+        ] = None,
+    runs: int = 3,
+    max_seconds: Optional[float] = typer.Option(
+        default=None, help="Exit with an error if an import takes longer than this"
+    ),
+    ):
+    """Measures the import time and memory of the entry points, with -X importtime."""
+    from comchat.benchmark.startup import DEFAULT_MODULES, measure_import
+
+    console = Console()
+    too_slow = False
+    for module_name in module or DEFAULT_MODULES:
+        report = measure_import(module_name, runs=runs)
+        table = Table(
+            title=(
+                f"{report.module}: {report.import_s:.3f}s imports, "
+                f"{report.wall_s:.3f}s with interpreter, {report.peak_rss_mb:.1f} MB RSS"
+            )
+        )
+        table.add_column("import")
+        table.add_column("cumulative (s)")
+        for name, seconds in report.slowest:
+            table.add_row(name, f"{seconds:.3f}")
+        console.print(table)
+        if max_seconds is not None and report.import_s > max_seconds:
+            too_slow = True
+    if too_slow:
+        raise typer.Exit(code=1)
+
 
 if __name__ == "__main__":
-    typer.run(serve)
\ No newline at end of file
+    app()
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Structured, low-overhead logging for the validator and the miner.
+
+Records are handed to a queue and written by a background listener thread, so
+callers never block on I/O. Messages use lazy `%`-style formatting, which means
+that disabled levels (e.g. debug in production) cost a single level check.
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import Any
+
+from pydantic_settings import BaseSettings
+
+ROOT_LOGGER_NAME = "comchat"
+
+# attributes every LogRecord has, anything else was passed through `extra`
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__.keys()
+) | {"message", "asctime", "suppressed"}
+
+
+class LoggingSettings(BaseSettings):
+    level: str = "INFO"
+    json_output: bool = False
+    # at most `rate_limit_burst` identical messages per `rate_limit_interval` seconds
+    rate_limit_burst: int = 10
+    rate_limit_interval: float = 60.0
+
+    class Config:
+        env_prefix = "COMCHAT_LOG_"
+        env_file = "env/config.env"
+        extra = "ignore"
+
+
+def _iso_timestamp(created: float) -> str:
+    return datetime.datetime.fromtimestamp(created, tz=datetime.timezone.utc).isoformat()
+
+
+def _extra_fields(record: logging.LogRecord) -> dict[str, Any]:
+    return {
+        key: value
+        for key, value in record.__dict__.items()
+        if key not in _RECORD_ATTRIBUTES and not key.startswith("_")
+    }
+
+
+class TextFormatter(logging.Formatter):
+    """Formats records as `[timestamp] LEVEL logger: message key=value ...`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = (
+            f"[{_iso_timestamp(record.created)}] {record.levelname} "
+            f"{record.name}: {record.getMessage()}"
+        )
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" (suppressed {suppressed} similar messages)"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": _iso_timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops repetitive messages, keyed by their call site and unformatted message.
+    The first record let through after a suppression carries the number of
+    records dropped in its `suppressed` attribute.
+    """
+
+    def __init__(self, burst: int, interval: float) -> None:
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._lock = threading.Lock()
+        # key -> (window start, records in window, suppressed records)
+        self._windows: dict[tuple[str, int, str], tuple[float, int, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0:
+            return True
+        key = (record.pathname, record.lineno, str(record.msg))
+        now = record.created
+        with self._lock:
+            start, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - start >= self.interval:
+                start, count = now, 0
+            if count >= self.burst:
+                self._windows[key] = (start, count, suppressed + 1)
+                return False
+            self._windows[key] = (start, count + 1, 0)
+        record.suppressed = suppressed
+        return True
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records untouched, so messages are formatted by the listener thread
+    rather than by the caller. Arguments must not be mutated after logging them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: logging.handlers.QueueListener | None = None
+_configure_lock = threading.Lock()
+
+
+def setup_logging(
+    level: str | int | None = None,
+    json_output: bool | None = None,
+    settings: LoggingSettings | None = None,
+) -> None:
+    """
+    Configures the `comchat` loggers to write to stdout through a background thread.
+    Can be called again to reconfigure, e.g. from the CLI options.
+
+    Args:
+        level: The minimum level to log, overrides the settings.
+        json_output: Whether to log JSON lines, overrides the settings.
+        settings: The logging settings, read from the environment if not given.
+    """
+    global _listener
+
+    if not settings:
+        settings = LoggingSettings()
+    if level is None:
+        level = settings.level
+    if json_output is None:
+        json_output = settings.json_output
+    if isinstance(level, str):
+        level = level.upper()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if json_output else TextFormatter())
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = _LazyQueueHandler(log_queue)
+    queue_handler.addFilter(
+        RateLimitFilter(settings.rate_limit_burst, settings.rate_limit_interval)
+    )
+
+    with _configure_lock:
+        if _listener:
+            _listener.stop()
+        logger = logging.getLogger(ROOT_LOGGER_NAME)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+        logger.setLevel(level)
+        logger.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flushes the queued records and stops the listener thread."""
+    global _listener
+
+    with _configure_lock:
+        if _listener:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Gets a logger under the `comchat` namespace, configuring logging from the
+    environment the first time it's needed.
+
+    Args:
+        name: The logger name, usually `__name__`.
+
+    Returns:
+        The logger.
+    """
+    if _listener is None:
+        setup_logging()
+    if name != ROOT_LOGGER_NAME and not name.startswith(ROOT_LOGGER_NAME + "."):
+        name = f"{ROOT_LOGGER_NAME}.{name}"
+    return logging.getLogger(name)
+
@@ -90,3 +90,23 @@ class GeminiSettings(BaseSettings):
         env_prefix = "GEMINI_"
         env_file = "env/config.env"
         extra = "ignore"
+
+
+class MinerSettings(BaseSettings):
+    # port of the /metrics endpoint, 0 disables it
+    metrics_port: int = 0
+    metrics_host: str = "127.0.0.1"
+    # generate requests served at once, the rest wait (and count as queue time)
+    max_concurrency: int = 16
+    # prompts accepted in a single generate_batch request
+    max_batch_size: int = 32
+    # the client shared by the OpenAI-compatible providers, see `http_engine`
+    http_timeout: float = 120.0  # seconds, per read, write or pool wait
+    http_connect_timeout: float = 10.0
+    http_max_connections: int = 64
+    http2: bool = True  # when the h2 package is installed
+
+    class Config:
+        env_prefix = "MINER_"
+        env_file = "env/config.env"
+        extra = "ignore"
@@ -0,0 +1,60 @@
+from typing import Any
+
+from ..metrics import REGISTRY
+
+REQUESTS = REGISTRY.counter(
+    "comchat_miner_requests_total",
+    "Generate requests, by service, model and status (ok or the HTTP error code)",
+    ("service", "model", "status"),
+)
+QUEUE_SECONDS = REGISTRY.histogram(
+    "comchat_miner_queue_seconds",
+    "Time a generate request waited for a free concurrency slot",
+    ("service", "model"),
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "comchat_miner_upstream_seconds",
+    "Time spent waiting on the upstream provider",
+    ("service", "model"),
+)
+TOKENS = REGISTRY.counter(
+    "comchat_miner_tokens_total",
+    "Tokens reported by the upstream provider, by direction (input, output)",
+    ("service", "model", "direction"),
+)
+BATCH_ITEMS = REGISTRY.histogram(
+    "comchat_miner_batch_items",
+    "Prompts per generate_batch request",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "comchat_miner_in_flight_requests",
+    "Generate requests currently being served",
+)
+
+
+def record_usage(
+    service: str,
+    model: str,
+    usage: dict[str, Any] | None,
+    input_key: str = "prompt_tokens",
+    output_key: str = "completion_tokens",
+) -> None:
+    """
+    Records the token counts of a provider response.
+
+    Args:
+        service: The service that answered.
+        model: The model that answered.
+        usage: The usage section of the response, ignored if missing.
+        input_key: The key holding the prompt token count.
+        output_key: The key holding the completion token count.
+    """
+    if not usage:
+        return
+    input_tokens = usage.get(input_key)
+    output_tokens = usage.get(output_key)
+    if input_tokens:
+        TOKENS.inc(input_tokens, service=service, model=model, direction="input")
+    if output_tokens:
+        TOKENS.inc(output_tokens, service=service, model=model, direction="output")
@@ -4,6 +4,7 @@ from anthropic import Anthropic
 from anthropic._types import NotGiven
 
 from ._config import AnthropicSettings  # Import the AnthropicSettings class from config
+from ._metrics import record_usage
 
 class AnthropicModule():
     def __init__(self, settings: AnthropicSettings | None = None) -> None:
@@ -44,6 +45,10 @@ class AnthropicModule():
 
     def _treat_response(self, message: Any):
         message_dict = message.dict()
+        record_usage(
+            "anthropic", self.settings.model, message_dict.get("usage"),
+            input_key="input_tokens", output_key="output_tokens",
+        )
 
         blocks = message_dict["content"]
         answer = "".join([block["text"] for block in blocks])
@@ -1,6 +1,7 @@
 import google.generativeai as genai
 
 from ._config import GeminiSettings  # Import the GeminiSettings class from config
+from ._metrics import record_usage
 
 class GeminiModule():
     def __init__(self, settings: GeminiSettings | None = None) -> None:
@@ -12,5 +13,14 @@ class GeminiModule():
     def prompt(self, user_prompt: str, system_prompt: str | None):
         model = self.client.GenerativeModel(self.settings.model)
         response = model.generate_content(user_prompt)
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            record_usage(
+                "gemini", self.settings.model,
+                {
+                    "prompt_tokens": usage.prompt_token_count,
+                    "completion_tokens": usage.candidates_token_count,
+                },
+            )
         
         return response.text, ""
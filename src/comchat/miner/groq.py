@@ -1,13 +1,10 @@
-from groq import Groq
-from groq._types import NotGiven
-
 from ._config import GroqSettings  # Import the GroqSettings class from config
+from .http_engine import chat_completion
 
 class GroqModule():
     def __init__(self, settings: GroqSettings | None = None) -> None:
         super().__init__()
         self.settings = settings or GroqSettings()  # type: ignore
-        self.client = Groq(api_key=self.settings.api_key)
         self.system_prompt = (
             "You are a supreme polymath renowned for your ability to explain "
             "complex concepts effectively to any audience from laypeople "
@@ -25,24 +22,14 @@ class GroqModule():
             f"Try to keep your answer below {self.settings.max_tokens} tokens"
         )
 
-    def prompt(self, user_prompt: str, system_prompt: str | None | NotGiven = None):
+    def prompt(self, user_prompt: str, system_prompt: str | None = None):
         if not system_prompt:
             system_prompt = self.system_prompt
-            
-        chat_completion = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt,
-                }
-            ],
-            model="llama3-8b-8192",
+        return chat_completion(
+            "groq",
+            self.settings.api_key,
+            self.settings.model,
+            user_prompt,
+            system_prompt,
+            max_tokens=self.settings.max_tokens,
         )
-
-        answer = chat_completion.choices[0].message.content
-
-        return answer, ""
@@ -0,0 +1,137 @@
+"""
+The HTTP engine of the providers with an OpenAI-compatible chat completions
+API (openai, openrouter, togetherai, groq, perplexity and mistral): a single
+pooled client shared by all of them, so connections are kept alive and reused
+across requests, with the same timeouts and response parsing for every one.
+
+The client speaks HTTP/2 when the `h2` package is installed
+(`pip install httpx[http2]`), which multiplexes the concurrent requests to a
+provider over one connection.
+"""
+
+import importlib.util
+import threading
+from typing import Any
+
+import httpx
+
+from ..logs import get_logger
+from ._config import MinerSettings
+from ._metrics import record_usage
+
+logger = get_logger(__name__)
+
+BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "openrouter": "https://openrouter.ai/api/v1",
+    "togetherai": "https://api.together.xyz/v1",
+    "groq": "https://api.groq.com/openai/v1",
+    "perplexity": "https://api.perplexity.ai",
+    "mistral": "https://api.mistral.ai/v1",
+}
+
+# the finish reasons of answers cut short
+INCOMPLETE_FINISH_REASONS = ("length", "content_filter")
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+class ProviderError(Exception):
+    """A provider request that failed, with the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 500) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def get_client(settings: MinerSettings | None = None) -> httpx.Client:
+    """The client shared by every provider, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            settings = settings or MinerSettings()
+            http2 = settings.http2 and importlib.util.find_spec("h2") is not None
+            _client = httpx.Client(
+                http2=http2,
+                timeout=httpx.Timeout(
+                    settings.http_timeout, connect=settings.http_connect_timeout
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_connections,
+                ),
+            )
+            logger.debug("Created the provider HTTP client, HTTP/2 %s", http2)
+        return _client
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        body: Any = response.json()
+    except ValueError:
+        return response.text or response.reason_phrase
+    # {"error": {"message": ...}}, {"error": "..."} or {"message": ...}
+    error = body.get("error", body) if isinstance(body, dict) else body
+    if isinstance(error, dict):
+        return str(error.get("message") or error)  # type: ignore
+    return str(error)
+
+
+def chat_completion(
+    service: str,
+    api_key: str,
+    model: str,
+    user_prompt: str,
+    system_prompt: str | None = None,
+    **params: Any,
+) -> tuple[str | None, str]:
+    """
+    Asks a provider for a chat completion.
+
+    Args:
+        service: The provider, a key of `BASE_URLS`.
+        api_key: The provider API key.
+        model: The model to answer with.
+        user_prompt: The prompt to answer.
+        system_prompt: The system prompt, left out when empty.
+        params: The other parameters of the request, e.g. `max_tokens`.
+
+    Returns:
+        The answer and an empty string, or None and why there's no answer,
+        as the provider modules' `prompt`.
+
+    Raises:
+        ProviderError: The request failed, or the provider answered with an error.
+    """
+    messages = [{"role": "user", "content": user_prompt}]
+    if system_prompt:
+        messages.insert(0, {"role": "system", "content": system_prompt})
+    try:
+        response = get_client().post(
+            f"{BASE_URLS[service]}/chat/completions",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json={"model": model, "messages": messages, **params},
+        )
+    except httpx.TimeoutException as e:
+        raise ProviderError(f"{service} request timed out: {e}", 504) from e
+    except httpx.HTTPError as e:
+        raise ProviderError(f"{service} request failed: {e}", 502) from e
+
+    if response.is_error:
+        message = _error_message(response)
+        logger.warning("%s error %s: %s", service, response.status_code, message)
+        raise ProviderError(message, response.status_code)
+    body: dict[str, Any] = response.json()
+    if "error" in body:
+        # some providers report errors with a 200
+        message = _error_message(response)
+        logger.warning("%s error: %s", service, message)
+        raise ProviderError(message)
+
+    record_usage(service, model, body.get("usage"))
+    choice = body["choices"][0]
+    finish_reason = choice.get("finish_reason")
+    if finish_reason in INCOMPLETE_FINISH_REASONS:
+        return None, f"Could not get a complete answer: {finish_reason}"
+    return choice["message"]["content"], ""
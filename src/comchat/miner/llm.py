@@ -1,18 +1,56 @@
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Any
 from communex.module.module import Module, endpoint  # type: ignore
 from abc import ABC
 from fastapi import HTTPException
-from .anthropic import AnthropicModule
-from .openrouter import OpenrouterModule
-from .openai import OpenaiModule
-from .perplexity import PerplexityModule
-from .mistral import MistralModule
-from .togetherai import TogetherAIModule
-from .groq import GroqModule
-from .gemini import GeminiModule
-from ._config import AnthropicSettings, OpenrouterSettings, OpenaiSettings, PerplexitySettings, MistralSettings, TogetherAISettings, GroqSettings, GeminiSettings
-from ..utils import log
+from pydantic_settings import BaseSettings
+from ._config import AnthropicSettings, OpenrouterSettings, OpenaiSettings, PerplexitySettings, MistralSettings, TogetherAISettings, GroqSettings, GeminiSettings, MinerSettings
+from ._metrics import REQUESTS, QUEUE_SECONDS, UPSTREAM_SECONDS, IN_FLIGHT, BATCH_ITEMS
+from ..logs import get_logger
+from ..metrics import start_metrics_server
+
+logger = get_logger(__name__)
+
+# service -> (provider module, module class, settings class). Provider modules
+# are imported on first use, so a miner only loads the SDKs it's asked for.
+PROVIDERS: dict[str, tuple[str, str, type[BaseSettings]]] = {
+    "anthropic": ("anthropic", "AnthropicModule", AnthropicSettings),
+    "openrouter": ("openrouter", "OpenrouterModule", OpenrouterSettings),
+    "openai": ("openai", "OpenaiModule", OpenaiSettings),
+    "perplexity": ("perplexity", "PerplexityModule", PerplexitySettings),
+    "mistral": ("mistral", "MistralModule", MistralSettings),
+    "togetherai": ("togetherai", "TogetherAIModule", TogetherAISettings),
+    "groq": ("groq", "GroqModule", GroqSettings),
+    "gemini": ("gemini", "GeminiModule", GeminiSettings),
+}
+
+
+@cache
+def get_provider_class(service: str) -> Any:
+    """Imports and returns the module class serving `service`."""
+    module_name, class_name, _ = PROVIDERS[service]
+    provider_module = importlib.import_module(f".{module_name}", __package__)
+    return getattr(provider_module, class_name)
+
 
 class LLM(ABC, Module):
+    def __init__(self, miner_settings: MinerSettings | None = None) -> None:
+        super().__init__()
+        self.miner_settings = miner_settings or MinerSettings()
+        self._slots = threading.BoundedSemaphore(self.miner_settings.max_concurrency)
+        # runs the prompts of batches, which still wait for a slot each
+        self._batch_executor = ThreadPoolExecutor(
+            self.miner_settings.max_concurrency, thread_name_prefix="generate-batch"
+        )
+        if self.miner_settings.metrics_port:
+            start_metrics_server(
+                self.miner_settings.metrics_port, self.miner_settings.metrics_host
+            )
+
     @property
     def max_tokens(self) -> int:
         ...
@@ -42,32 +80,74 @@ class LLM(ABC, Module):
     
     @endpoint
     def generate(self, service: str, model: str, prompt: str) -> dict[str, str]:
-        log(f"Service: {service}, Model: {model}, Prompt: {prompt[:100]}...")
+        return self._serve(service, model, prompt)
+
+    @endpoint
+    def generate_batch(self, items: list[dict[str, str]]) -> dict[str, list[dict[str, Any]]]:
+        """
+        Answers several prompts in one request, concurrently.
+
+        Args:
+            items: The prompts, each with its `service`, `model` and `prompt`.
+
+        Returns:
+            One result per item, in order: `{"answer": ...}`, or
+            `{"error": {"status_code": ..., "detail": ...}}` if it failed.
+        """
+        if len(items) > self.miner_settings.max_batch_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {self.miner_settings.max_batch_size} items per batch",
+            )
+        BATCH_ITEMS.observe(len(items))
+        futures = [self._batch_executor.submit(self._serve_item, item) for item in items]
+        return {"results": [future.result() for future in futures]}
+
+    def _serve_item(self, item: dict[str, str]) -> dict[str, Any]:
+        missing = [key for key in ("service", "model", "prompt") if key not in item]
+        if missing:
+            return {"error": {"status_code": 400, "detail": f"Missing {', '.join(missing)}"}}
+        try:
+            return self._serve(item["service"], item["model"], item["prompt"])
+        except HTTPException as e:
+            return {"error": {"status_code": e.status_code, "detail": e.detail}}
+        except Exception as e:
+            return {"error": {"status_code": 500, "detail": str(e)}}
+
+    def _serve(self, service: str, model: str, prompt: str) -> dict[str, str]:
+        logger.debug("Service: %s, Model: %s, Prompt: %.100s...", service, model, prompt)
+        queued_at = time.perf_counter()
+        with self._slots:
+            QUEUE_SECONDS.observe(time.perf_counter() - queued_at, service=service, model=model)
+            IN_FLIGHT.inc()
+            try:
+                answer = self._generate(service, model, prompt)
+            except HTTPException as e:
+                REQUESTS.inc(service=service, model=model, status=e.status_code)
+                raise
+            except Exception:
+                REQUESTS.inc(service=service, model=model, status=500)
+                raise
+            finally:
+                IN_FLIGHT.inc(-1)
+        REQUESTS.inc(service=service, model=model, status="ok")
+        return answer
+
+    def _generate(self, service: str, model: str, prompt: str) -> dict[str, str]:
         # Select the module based on the service parameter
-        if service == "anthropic":
-            module = AnthropicModule(settings=AnthropicSettings(model=model))
-        elif service == "openrouter":
-            module = OpenrouterModule(settings=OpenrouterSettings(model=model))
-        elif service == "openai":
-            module = OpenaiModule(settings=OpenaiSettings(model=model))
-        elif service == "perplexity":
-            module = PerplexityModule(settings=PerplexitySettings(model=model))
-        elif service == "mistral":
-            module = MistralModule(settings=MistralSettings(model=model))
-        elif service == "togetherai":
-            module = TogetherAIModule(settings=TogetherAISettings(model=model))
-        elif service == "groq":
-            module = GroqModule(settings=GroqSettings(model=model))
-        elif service == "gemini":
-            module = GeminiModule(settings=GeminiSettings(model=model))
-        else:
+        if service not in PROVIDERS:
             raise HTTPException(status_code=400, detail="Unsupported service")
+        settings_class = PROVIDERS[service][2]
+        module = get_provider_class(service)(settings=settings_class(model=model))
 
         try:
-            message = module.prompt(prompt, self.get_context_prompt(self.max_tokens))
-            log(f"Answer: {message[:100]}...")
+            with UPSTREAM_SECONDS.time(service=service, model=model):
+                message = module.prompt(prompt, self.get_context_prompt(self.max_tokens))
+            # the answer, or None and why there's none
+            logger.debug("Answer: %.100s...", message[0] or message[1])
         except Exception as e:
-            raise HTTPException(status_code=e.status_code, detail=str(e)) from e  # type: ignore
+            status_code = getattr(e, "status_code", 500)
+            raise HTTPException(status_code=status_code, detail=str(e)) from e
 
         match message:
             case None, explanation:
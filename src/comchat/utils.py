@@ -6,6 +6,10 @@ from typing import Callable, TypeVar, ParamSpec, Literal, Any
 import datetime
 from functools import wraps
 
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
 T = TypeVar("T")
 T1 = TypeVar("T1")
 T2 = TypeVar("T2")
@@ -21,7 +25,7 @@ def timeit(func: Callable[P, R]):
         result = func(*args, **kwargs)
         end_time = time.time()
         execution_time = end_time - start_time
-        log(f"Execution time of {func.__name__}: {execution_time:.6f} seconds")
+        logger.debug("Execution time of %s: %.6f seconds", func.__name__, execution_time)
         return result
     return wrapper
 
@@ -40,7 +44,14 @@ def log(
         file: Any | None = None,
         flush: Literal[False] = False
     ):
-    print(f"[{iso_timestamp_now()}] " + msg, *values, sep=sep, end=end, file=file, flush=flush)
+    """
+    Logs at info level through the `comchat` logger. Kept for compatibility with
+    its former `print`-like signature, `end`, `file` and `flush` are ignored.
+    New code should use `comchat.logs.get_logger` with lazy `%`-style arguments.
+    """
+    if values:
+        msg = (sep if sep is not None else " ").join([msg, *map(str, values)])
+    logger.info(msg, stacklevel=2)
 
 
 def retry(max_retries: int | None, retry_exceptions: list[type]):
@@ -56,7 +67,10 @@ def retry(max_retries: int | None, retry_exceptions: list[type]):
                 except Exception as e:
                     if any(isinstance(e, exception_t) for exception_t in retry_exceptions):
                         func_name = func.__name__
-                        log(f"An exception occurred in '{func_name} on try {tries}': {e}, but we'll retry.")
+                        logger.warning(
+                            "An exception occurred in '%s' on try %s: %s, but we'll retry.",
+                            func_name, tries, e,
+                        )
                         if tries < max_retries__:
                             delay = (1.4 ** tries) + random.uniform(0, 1)
                             sleep(delay)
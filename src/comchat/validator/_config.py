@@ -1,4 +1,5 @@
 from communex.compat.types import Ss58Address  #  type: ignore
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -14,8 +15,127 @@ class ValidatorSettings(BaseSettings):
     # (we are aiming at 50 block subnet tempo, with 8 second block time)
     iteration_interval: int = 800
     max_allowed_weights: int = 420 # this is a global parameter of the maximum weights that a validator can set
+    # seed of the question criteria, for reproducible runs
+    question_seed: int | None = None
     hf_uploader_ss58: str = "5EX6ixabe8fiWHySw4SYaJAkaHLKeqSJ3rv7so2FrLC2cfGV"
 
+    # == Observability ==
+    # port of the local /metrics endpoint, 0 disables it
+    metrics_port: int = 0
+    metrics_host: str = "127.0.0.1"
+
+    # == Answer filtering ==
+    # zero answers the gibberish detector doesn't find clean, before embedding them,
+    # off by default as it runs a local model
+    gibberish_filter: bool = False
+    gibberish_batch_size: int = 16
+    # fraction of an answer's chunks that must be clean
+    gibberish_min_clean_ratio: float = 0.5
+
+    # == Miner fan-out ==
+    # worker processes the miners are sharded across, 1 asks them all in process
+    shards: int = 1
+    # seconds a shard worker may take to score its answers once its miners had
+    # their generate timeout, before it's restarted and its miners left out
+    shard_scoring_timeout: float = 120.0
+    miner_concurrency: int = 32  # generate calls in flight at once
+    # answers are embedded and scored in batches of up to `embedding_batch_size`,
+    # released at most `embedding_batch_wait` seconds after their first answer
+    embedding_batch_size: int = 16
+    embedding_batch_wait: float = 0.2
+    # the miners are probed on `get_model` before being asked, and only the
+    # responsive ones get the question; 0 disables the probe
+    probe_timeout: float = 3.0
+    # how long a probe outcome is trusted, in seconds, above `iteration_interval`
+    # so a responsive miner isn't probed again at the next step
+    probe_ttl: int = 1800
+    probe_concurrency: int = 256  # probes in flight at once
+
+    # == Miner sampling ==
+    # miners asked per step, 0 asks every miner at each step
+    miner_sample_size: int = 0
+    sample_score_alpha: float = 0.3  # weight of the latest score in the moving average
+    sample_staleness_weight: float = 1.0
+    sample_uncertainty_weight: float = 1.0
+    sample_recovery_bonus: float = 1.0
+
+    # == Model assignment ==
+    # how the models are spread over the miners of a step: "single",
+    # "round_robin" or "weighted"
+    model_assignment: str = "round_robin"
+    # weight of each service for the weighted assignment, 1 when missing
+    model_weights: dict[str, float] = {}
+    # generate calls in flight at once per service, 0 for no limit
+    service_concurrency: int = 0
+    # scores are normalized per model once it has `model_score_min_samples` scores
+    model_score_normalization: bool = True
+    model_score_alpha: float = 0.1  # weight of the latest step in the model averages
+    model_score_min_samples: int = 20
+
+    # == Shared questions ==
+    # question/answer store shared with other validators, empty to disable it
+    qa_store_path: str = ""
+    # how reference embeddings are stored: "float32", "float16" or "int8"
+    qa_store_precision: str = "float16"
+    # how old, in seconds, a stored question can be to be used, 0 for no limit
+    qa_store_max_age: int = 86400
+
+    # == Replayed answers ==
+    # index of past answer embeddings, to flag answers replayed from earlier
+    # questions, empty to disable it
+    answer_index_path: str = ""
+    # cosine similarity from which an answer is a replay of an earlier one
+    answer_index_threshold: float = 0.95
+    answer_index_nprobe: int = 8
+
+    # == Recording ==
+    # directory steps are recorded to, for `comchat.cli replay`, empty to disable it
+    record_path: str = ""
+    # directory of the score history, for `comchat.cli query-history`, empty to disable it
+    history_path: str = ""
+
+    # == Journal ==
+    # journal of the step in progress, resumed after a restart, empty to disable it
+    journal_path: str = ""
+    # how long after it started an unfinished step is still resumed, in seconds
+    journal_resume_window: int = 600
+    # how often, at most, the answers journaled are synced to disk, in seconds
+    journal_sync_interval: float = 1.0
+
+    # == Budget ==
+    # USD the validator may spend on API calls per hour, 0 for no limit
+    budget_usd_per_hour: float = 0.0
+    # embedding requests per step, which sets the batch size when on a budget
+    budget_max_embedding_requests: int = 8
+    # steps the last question may be asked again at when a new one isn't
+    # affordable, after which steps are skipped until one is; 0 never reuses it
+    budget_max_question_reuse: int = 1
+
+    # == Scoring work ==
+    # where CPU-bound scoring runs: "inline", "thread" or "process"
+    scoring_executor: str = "thread"
+    scoring_workers: int = 0  # 0 uses one worker per core
+
+    # == Reward shaping ==
+    # one of "threshold_sigmoid", "rank_power_law", "softmax"
+    reward_curve: str = "threshold_sigmoid"
+    reward_threshold_percentage: float = 0.2  # threshold above the mean score
+    reward_steepness: float = 5.0
+    reward_high: float = 1.0
+    reward_low: float = 0.01
+    reward_power_exponent: float = 1.0  # 1/rank ** exponent
+    reward_temperature: float = 0.05  # softmax temperature, in score units
+
+    @model_validator(mode="after")
+    def check_reward_shaping(self) -> "ValidatorSettings":
+        if self.reward_temperature <= 0:
+            raise ValueError("reward_temperature must be positive")
+        if self.reward_steepness <= 0:
+            raise ValueError("reward_steepness must be positive")
+        if self.reward_low > self.reward_high:
+            raise ValueError("reward_low can't be above reward_high")
+        return self
+
     class Config:
         env_prefix = "ANTHROPIC_"
         env_file = "env/config.env"
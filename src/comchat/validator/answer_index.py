@@ -0,0 +1,360 @@
+"""
+A persistent index of the embeddings of past miner answers, to catch miners
+replaying an answer they gave to an earlier question.
+
+It's an inverted file (IVF) index in plain NumPy. Embeddings are first
+reduced to a few hundred dimensions by a seeded random projection, which
+keeps the distances between close embeddings within a few percent, so
+near-duplicates stay near-duplicates. Once enough answers are stored, they
+are clustered with spherical k-means, and a query only compares against the
+answers of its `nprobe` nearest clusters. Until then, queries compare against
+every stored answer.
+
+The index is a directory of raw little endian files, appended to after each
+step:
+
+- `vectors.bin`, the projected unit norm embeddings as float16
+- `metadata.bin`, the uid, cluster, timestamp and question of each answer
+- `centroids.npy`, the cluster centroids once trained
+- `index.json`, the format version, the dimensions and the projection seed
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+from ..logs import get_logger
+from .quantization import Float32Array
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+
+METADATA_DTYPE = np.dtype(
+    [("uid", "<i4"), ("cluster", "<i4"), ("timestamp", "<f8"), ("question", "<u8")]
+)
+_VECTOR_DTYPE = np.dtype("<f2")
+# queries are compared against the stored vectors by blocks of this many rows
+_BLOCK_ROWS = 16384
+
+
+def question_id(prompt: str) -> int:
+    """A stable id of the question `prompt` asks."""
+    return int.from_bytes(hashlib.blake2b(prompt.encode(), digest_size=8).digest(), "big")
+
+
+def _normalize(vectors: npt.ArrayLike) -> Float32Array:
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+@dataclass
+class Match:
+    """The closest stored answer to a queried one."""
+
+    similarity: float
+    uid: int
+    timestamp: float
+    question: int
+
+
+class AnswerIndex:
+    """
+    The embeddings of past answers, with the uid of the miner that gave them,
+    when, and to which question.
+
+    Similarities are the cosine similarities of the projected embeddings. The
+    index isn't safe to share between processes.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        dimensions: int = 256,
+        clusters: int = 256,
+        nprobe: int = 8,
+        train_size: int = 0,
+        seed: int = 0,
+    ) -> None:
+        """
+        Args:
+            path: The directory of the index, created if missing.
+            dimensions: The dimensions embeddings are projected to. An existing
+                index keeps the ones it was created with.
+            clusters: The number of clusters of the trained index.
+            nprobe: The clusters a query compares against.
+            train_size: The answers stored before clustering them, 0 for 32
+                per cluster. The index is clustered again each time it grows
+                eightfold since the last training.
+            seed: The seed of the projection of a new index.
+        """
+        self.path = Path(path)
+        self.dimensions = dimensions
+        self.clusters = clusters
+        self.nprobe = nprobe
+        self.train_size = train_size or 32 * clusters
+        self.seed = seed
+        self.input_dimensions = 0
+        self.projection: Float32Array | None = None
+        self.vectors = np.empty((0, dimensions), dtype=np.float32)
+        self.metadata = np.empty(0, dtype=METADATA_DTYPE)
+        self.centroids: Float32Array | None = None
+        self._size = 0
+        self._trained_size = 0
+        # the rows of each cluster, rebuilt when rows are added
+        self._lists: list[npt.NDArray[np.intp]] | None = None
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _set_input_dimensions(self, input_dimensions: int) -> None:
+        self.input_dimensions = input_dimensions
+        if input_dimensions <= self.dimensions:
+            self.dimensions = input_dimensions
+            return
+        rng = np.random.default_rng(self.seed)
+        # normalized afterwards, so the scale of the projection doesn't matter
+        self.projection = rng.standard_normal(
+            (input_dimensions, self.dimensions), dtype=np.float32
+        )
+
+    def _project(self, embeddings: npt.ArrayLike) -> Float32Array:
+        vectors = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if vectors.shape[1] != self.input_dimensions:
+            raise ValueError(
+                f"the index stores {self.input_dimensions} dimensions embeddings, "
+                f"not {vectors.shape[1]}"
+            )
+        if self.projection is not None:
+            vectors = vectors @ self.projection
+        return _normalize(vectors)
+
+    def _load(self) -> None:
+        header_path = self.path / "index.json"
+        if not header_path.exists():
+            return
+        header = json.loads(header_path.read_text())
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"unsupported answer index version {header['version']}")
+        self.dimensions = header["dimensions"]
+        self.seed = header["seed"]
+        self._set_input_dimensions(header["input_dimensions"])
+        vectors, metadata = (
+            np.fromfile(path, dtype=dtype) if path.exists() else np.empty(0, dtype=dtype)
+            for path, dtype in (
+                (self.path / "vectors.bin", _VECTOR_DTYPE),
+                (self.path / "metadata.bin", METADATA_DTYPE),
+            )
+        )
+        # an interrupted append leaves a partial row in one of the files
+        size = min(len(vectors) // self.dimensions, len(metadata))
+        self.vectors = np.empty((0, self.dimensions), dtype=np.float32)
+        self._reserve(size)
+        self.vectors[:size] = vectors[: size * self.dimensions].reshape(size, self.dimensions)
+        self.metadata[:size] = metadata[:size]
+        self._size = size
+        centroids_path = self.path / "centroids.npy"
+        if centroids_path.exists():
+            self.centroids = np.load(centroids_path)
+            self._trained_size = header["trained_size"]
+        if size * self.dimensions != len(vectors) or size != len(metadata):
+            logger.warning("Truncating the answer index to its %s complete rows", size)
+            self._rewrite()
+
+    def _reserve(self, size: int) -> None:
+        if size <= len(self.vectors):
+            return
+        capacity = max(size, 2 * len(self.vectors), 1024)
+        vectors = np.empty((capacity, self.dimensions), dtype=np.float32)
+        vectors[: self._size] = self.vectors[: self._size]
+        metadata = np.empty(capacity, dtype=METADATA_DTYPE)
+        metadata[: self._size] = self.metadata[: self._size]
+        self.vectors, self.metadata = vectors, metadata
+
+    def _write_header(self) -> None:
+        header = {
+            "version": FORMAT_VERSION,
+            "input_dimensions": self.input_dimensions,
+            "dimensions": self.dimensions,
+            "seed": self.seed,
+            "trained_size": self._trained_size,
+        }
+        temporary = self.path / "index.json.tmp"
+        temporary.write_text(json.dumps(header))
+        temporary.replace(self.path / "index.json")
+
+    def _rewrite(self) -> None:
+        """Writes the whole index, for when the clusters of the rows changed."""
+        for name, data in (
+            ("vectors.bin", self.vectors[: self._size].astype(_VECTOR_DTYPE)),
+            ("metadata.bin", self.metadata[: self._size]),
+        ):
+            temporary = self.path / (name + ".tmp")
+            data.tofile(temporary)
+            temporary.replace(self.path / name)
+        if self.centroids is not None:
+            temporary = self.path / "centroids.npy.tmp"
+            with temporary.open("wb") as file:
+                np.save(file, self.centroids)
+            temporary.replace(self.path / "centroids.npy")
+        self._write_header()
+
+    def add(
+        self,
+        embeddings: npt.ArrayLike,
+        uids: list[int],
+        question: int,
+        timestamp: float | None = None,
+    ) -> None:
+        """
+        Stores the embeddings of the answers of `uids` to `question`.
+
+        Raises:
+            ValueError: If the embeddings don't have the dimensions of the
+                ones already stored.
+        """
+        if not uids:
+            return
+        if not self.input_dimensions:
+            self._set_input_dimensions(np.shape(embeddings)[-1])
+            self.vectors = np.empty((0, self.dimensions), dtype=np.float32)
+            self._write_header()
+        vectors = self._project(embeddings)
+        rows = np.empty(len(uids), dtype=METADATA_DTYPE)
+        rows["uid"] = uids
+        rows["cluster"] = self._assign(vectors) if self.centroids is not None else -1
+        rows["timestamp"] = time.time() if timestamp is None else timestamp
+        rows["question"] = question
+
+        start = self._size
+        self._reserve(start + len(rows))
+        self.vectors[start : start + len(rows)] = vectors
+        self.metadata[start : start + len(rows)] = rows
+        self._size += len(rows)
+        self._lists = None
+        with open(self.path / "vectors.bin", "ab") as file:
+            file.write(vectors.astype(_VECTOR_DTYPE).tobytes())
+        with open(self.path / "metadata.bin", "ab") as file:
+            file.write(rows.tobytes())
+
+        if self._size >= self.train_size and self._size >= 8 * self._trained_size:
+            self.train()
+
+    def _assign(self, vectors: Float32Array) -> npt.NDArray[np.int32]:
+        assert self.centroids is not None
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def train(self, iterations: int = 10) -> None:
+        """Clusters the stored answers with spherical k-means."""
+        if self._size < self.clusters:
+            return
+        started = time.perf_counter()
+        rng = np.random.default_rng(self.seed)
+        # the centroids are fitted on a sample, then every row is assigned
+        sample_rows = rng.choice(self._size, min(self._size, 64 * self.clusters), replace=False)
+        sample = self.vectors[sample_rows]
+        centroids = sample[rng.choice(len(sample), self.clusters, replace=False)]
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.bincount(assignments, minlength=self.clusters) == 0
+            # empty clusters restart from a random sample
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = _normalize(sums)
+        self.centroids = centroids
+
+        clusters = self.metadata["cluster"]
+        for start in range(0, self._size, _BLOCK_ROWS):
+            end = min(start + _BLOCK_ROWS, self._size)
+            clusters[start:end] = self._assign(self.vectors[start:end])
+        self._trained_size = self._size
+        self._lists = None
+        self._rewrite()
+        logger.info(
+            "Clustered %s answers in %s clusters in %.2fs",
+            self._size, self.clusters, time.perf_counter() - started,
+        )
+
+    def _get_lists(self) -> list[npt.NDArray[np.intp]]:
+        if self._lists is None:
+            clusters = self.metadata["cluster"][: self._size]
+            order = np.argsort(clusters, kind="stable")
+            bounds = np.searchsorted(clusters[order], np.arange(self.clusters + 1))
+            self._lists = [order[bounds[i] : bounds[i + 1]] for i in range(self.clusters)]
+        return self._lists
+
+    def search(
+        self, embeddings: npt.ArrayLike, question: int | None = None
+    ) -> list[Match | None]:
+        """
+        Finds the closest stored answer to each of `embeddings`.
+
+        Args:
+            embeddings: The (answers, dimensions) embeddings to look up.
+            question: Answers to this question are left out, as answers to the
+                same question are expected to be close.
+
+        Returns:
+            The closest match of each embedding, None if there's none.
+
+        Raises:
+            ValueError: If the embeddings don't have the dimensions of the
+                ones stored.
+        """
+        count = len(np.atleast_2d(embeddings))
+        if not self._size:
+            return [None] * count
+        queries = self._project(embeddings)
+        best = np.full(count, -np.inf, dtype=np.float32)
+        best_rows = np.full(count, -1, dtype=np.intp)
+
+        def compare(query_rows: npt.NDArray[np.intp], rows: npt.NDArray[np.intp]) -> None:
+            for start in range(0, len(rows), _BLOCK_ROWS):
+                block = rows[start : start + _BLOCK_ROWS]
+                similarities = queries[query_rows] @ self.vectors[block].T
+                if question is not None:
+                    similarities[:, self.metadata["question"][block] == question] = -np.inf
+                closest = np.argmax(similarities, axis=1)
+                found = similarities[np.arange(len(query_rows)), closest]
+                better = found > best[query_rows]
+                best[query_rows[better]] = found[better]
+                best_rows[query_rows[better]] = block[closest[better]]
+
+        if self.centroids is None:
+            compare(np.arange(count), np.arange(self._size))
+        else:
+            # every row is clustered once the index is trained
+            nprobe = min(self.nprobe, self.clusters)
+            probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)
+            probes = probes[:, :nprobe]
+            lists = self._get_lists()
+            for cluster in np.unique(probes):
+                if len(lists[cluster]):
+                    compare(np.flatnonzero((probes == cluster).any(axis=1)), lists[cluster])
+
+        matches: list[Match | None] = []
+        for similarity, row in zip(best.tolist(), best_rows.tolist()):
+            if row < 0:
+                matches.append(None)
+                continue
+            metadata = self.metadata[row]
+            matches.append(
+                Match(
+                    similarity=similarity,
+                    uid=int(metadata["uid"]),
+                    timestamp=float(metadata["timestamp"]),
+                    question=int(metadata["question"]),
+                )
+            )
+        return matches
@@ -0,0 +1,159 @@
+"""
+Assigns a (service, model) to each miner asked in a step, so the upstream
+providers share the load of a step instead of one of them taking it all and
+rate limiting the miners, and normalizes the scores per model, so miners
+asked for different models can be compared.
+"""
+
+import math
+import random
+import statistics
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterable
+
+Model = dict[str, str]
+
+
+class AssignmentStrategy(Enum):
+    # every miner gets the same model, picked at random at each step
+    SINGLE = "single"
+    # the models take turns, each getting the same share of the miners
+    ROUND_ROBIN = "round_robin"
+    # each model gets a share of the miners proportional to its service's weight
+    WEIGHTED = "weighted"
+
+
+def model_key(model: Model) -> str:
+    return f"{model['service']}/{model['model']}"
+
+
+def _apportion(weights: list[float], total: int) -> list[int]:
+    """Splits `total` proportionally to `weights`, by largest remainder."""
+    weight_sum = sum(weights)
+    quotas = [total * weight / weight_sum for weight in weights]
+    counts = [math.floor(quota) for quota in quotas]
+    by_remainder = sorted(
+        range(len(weights)), key=lambda i: quotas[i] - counts[i], reverse=True
+    )
+    for i in by_remainder[: total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+class ModelAssigner:
+    """Picks the model each miner is asked for."""
+
+    def __init__(
+        self,
+        models: list[Model],
+        strategy: AssignmentStrategy = AssignmentStrategy.ROUND_ROBIN,
+        weights: dict[str, float] | None = None,
+        seed: int | None = None,
+    ) -> None:
+        """
+        Args:
+            models: The models to pick from.
+            strategy: How the models are spread over the miners.
+            weights: The weight of each service for the weighted strategy,
+                1 when missing, 0 leaves the service out.
+            seed: The seed of the random picks.
+        """
+        weights = weights or {}
+        self.models = [model for model in models if weights.get(model["service"], 1.0) > 0]
+        if not self.models:
+            raise ValueError("Every model has a weight of 0")
+        self.strategy = strategy
+        self.weights = [weights.get(model["service"], 1.0) for model in self.models]
+        self.rng = random.Random(seed)
+        self._turn = 0
+
+    def assign(self, uids: Iterable[int]) -> dict[int, Model]:
+        """The model each miner is asked for, by uid."""
+        order = list(uids)
+        # miners can't tell from their uid which model they'll be asked for
+        self.rng.shuffle(order)
+        match self.strategy:
+            case AssignmentStrategy.SINGLE:
+                model = self.rng.choices(self.models, self.weights)[0]
+                return {uid: model for uid in order}
+            case AssignmentStrategy.ROUND_ROBIN:
+                # the models with an extra miner change from step to step
+                turn, self._turn = self._turn, self._turn + 1
+                return {
+                    uid: self.models[(turn + i) % len(self.models)]
+                    for i, uid in enumerate(order)
+                }
+            case AssignmentStrategy.WEIGHTED:
+                counts = _apportion(self.weights, len(order))
+                picks = [
+                    model for model, count in zip(self.models, counts) for _ in range(count)
+                ]
+                return dict(zip(order, picks))
+
+
+@dataclass
+class ModelStats:
+    """Exponential moving average and variance of a model's scores."""
+
+    mean: float
+    variance: float
+    samples: int
+
+
+class ModelScoreNormalizer:
+    """
+    Maps the scores of each model onto the scores of all the models: a score is
+    standardized with its model's moving average and variance, then scaled back
+    with the average of them over the models. A model with fewer than
+    `min_samples` scores yet keeps its scores as they are.
+    """
+
+    def __init__(self, alpha: float = 0.1, min_samples: int = 20) -> None:
+        """
+        Args:
+            alpha: The weight of the latest step in the moving averages.
+            min_samples: The scores a model needs before its scores are normalized.
+        """
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.stats: dict[str, ModelStats] = {}
+
+    def update(self, scores: dict[int, float], assignment: dict[int, Model]) -> None:
+        """Adds the scores of a step to the statistics of their models."""
+        by_model: dict[str, list[float]] = {}
+        for uid, score in scores.items():
+            if uid in assignment:
+                by_model.setdefault(model_key(assignment[uid]), []).append(score)
+        for key, model_scores in by_model.items():
+            mean = statistics.fmean(model_scores)
+            variance = statistics.pvariance(model_scores, mean)
+            stats = self.stats.get(key)
+            if stats is None:
+                self.stats[key] = ModelStats(mean, variance, len(model_scores))
+                continue
+            stats.mean += self.alpha * (mean - stats.mean)
+            stats.variance += self.alpha * (variance - stats.variance)
+            stats.samples += len(model_scores)
+
+    def normalize(
+        self, scores: dict[int, float], assignment: dict[int, Model]
+    ) -> dict[int, float]:
+        """The scores of a step, normalized by model, between 0 and 1."""
+        ready = {
+            key: stats
+            for key, stats in self.stats.items()
+            if stats.samples >= self.min_samples and stats.variance > 0
+        }
+        if len(ready) < 2:
+            return scores
+        target_mean = statistics.fmean(stats.mean for stats in ready.values())
+        target_std = math.sqrt(statistics.fmean(stats.variance for stats in ready.values()))
+        normalized: dict[int, float] = {}
+        for uid, score in scores.items():
+            stats = ready.get(model_key(assignment[uid])) if uid in assignment else None
+            if stats is not None:
+                score = target_mean + (score - stats.mean) / math.sqrt(stats.variance) * target_std
+                score = min(max(score, 0.0), 1.0)
+            normalized[uid] = score
+        return normalized
@@ -0,0 +1,169 @@
+"""
+Accounting of the validator's API spend, and the planner that sizes each
+step to stay within an hourly budget.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+# USD per million (input, output) tokens
+PRICES: dict[str, tuple[float, float]] = {
+    "claude-3-opus-20240229": (15.0, 75.0),
+    "anthropic/claude-3-opus": (15.0, 75.0),
+    "claude-3-sonnet-20240229": (3.0, 15.0),
+    "claude-3-haiku-20240307": (0.25, 1.25),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+WINDOW_SECONDS = 3600
+
+
+def cost(model: str, input_tokens: int, output_tokens: int = 0) -> float:
+    """The USD cost of a request, 0 for models without a known price."""
+    input_price, output_price = PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1e6
+
+
+@dataclass
+class SpendRecord:
+    timestamp: float
+    provider: str
+    model: str
+    input_tokens: int
+    output_tokens: int
+    usd: float
+
+
+class SpendTracker:
+    """Keeps the API spend of the last hour, per provider."""
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self.clock = clock
+        self._records: deque[SpendRecord] = deque()
+        self._lock = threading.Lock()
+
+    def record(
+        self, provider: str, model: str, input_tokens: int, output_tokens: int = 0
+    ) -> SpendRecord:
+        spend = SpendRecord(
+            self.clock(),
+            provider,
+            model,
+            input_tokens,
+            output_tokens,
+            cost(model, input_tokens, output_tokens),
+        )
+        with self._lock:
+            self._records.append(spend)
+        return spend
+
+    def _recent(self) -> list[SpendRecord]:
+        start = self.clock() - WINDOW_SECONDS
+        with self._lock:
+            while self._records and self._records[0].timestamp < start:
+                self._records.popleft()
+            return list(self._records)
+
+    def spent(self, provider: str | None = None) -> float:
+        """The USD spent in the last hour, by `provider` or overall."""
+        return sum(
+            record.usd
+            for record in self._recent()
+            if provider is None or record.provider == provider
+        )
+
+    def burn_rate(self) -> dict[str, float]:
+        """The USD spent in the last hour, per provider."""
+        rates: dict[str, float] = {}
+        for record in self._recent():
+            rates[record.provider] = rates.get(record.provider, 0.0) + record.usd
+        return rates
+
+
+@dataclass
+class StepPlan:
+    # False to reuse the last question instead of generating a new one
+    generate_question: bool
+    sample_size: int
+    embedding_batch_size: int
+
+
+class BudgetPlanner:
+    """
+    Sizes each step so the spend of any hour stays within `hourly_budget`.
+
+    A step may spend its share of the hourly budget, `hourly_budget *
+    step_seconds / 3600`, and never more than what's left of the budget over
+    the last hour. The question is generated only if that leaves room for at
+    least `min_sample_size` answers to be embedded, and the rest of the step's
+    share sets how many miners are asked.
+    """
+
+    def __init__(
+        self,
+        tracker: SpendTracker,
+        hourly_budget: float,
+        step_seconds: float,
+        min_sample_size: int = 1,
+        max_embedding_requests: int = 8,
+    ) -> None:
+        """
+        Args:
+            tracker: The spend of the last hour.
+            hourly_budget: The USD that can be spent per hour, 0 for no limit.
+            step_seconds: The interval between steps.
+            min_sample_size: The fewest miners worth asking in a step.
+            max_embedding_requests: The embedding requests a step should make at
+                most, which sets the embedding batch size.
+        """
+        self.tracker = tracker
+        self.hourly_budget = hourly_budget
+        self.step_seconds = step_seconds
+        self.min_sample_size = min_sample_size
+        self.max_embedding_requests = max_embedding_requests
+
+    def allowance(self) -> float:
+        """The USD the next step may spend."""
+        if self.hourly_budget <= 0:
+            return math.inf
+        share = self.hourly_budget * min(self.step_seconds / WINDOW_SECONDS, 1)
+        return max(0.0, min(share, self.hourly_budget - self.tracker.spent()))
+
+    def plan(
+        self,
+        miners: int,
+        question_cost: float,
+        answer_cost: float,
+        max_batch_size: int,
+    ) -> StepPlan:
+        """
+        Plans the next step.
+
+        Args:
+            miners: The miners that could be asked.
+            question_cost: The estimated USD cost of generating the question.
+            answer_cost: The estimated USD cost of embedding one answer.
+            max_batch_size: The largest embedding batch allowed.
+
+        Returns:
+            The plan of the step.
+        """
+        allowance = self.allowance()
+        generate_question = allowance >= question_cost + self.min_sample_size * answer_cost
+        if generate_question:
+            allowance -= question_cost
+        if answer_cost > 0 and allowance < math.inf:
+            sample_size = min(miners, int(allowance / answer_cost))
+        else:
+            sample_size = miners
+        batch_size = max(1, math.ceil(sample_size / self.max_embedding_requests))
+        return StepPlan(
+            generate_question=generate_question,
+            sample_size=sample_size,
+            embedding_batch_size=min(max_batch_size, batch_size),
+        )
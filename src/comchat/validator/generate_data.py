@@ -1,13 +1,16 @@
 import json
-from typing import cast, Any
+from typing import cast, Any, TYPE_CHECKING
 
-from .meta_prompt import explanation_prompt
-from ..miner.llm import LLM
+from .meta_prompt import CriteriaSampler, explanation_prompt
+
+if TYPE_CHECKING:
+    from ..miner.llm import LLM
 
 
 class InputGenerator:
-    def __init__(self, llm: LLM) -> None:
+    def __init__(self, llm: "LLM", sampler: CriteriaSampler | None = None) -> None:
         self.llm = llm
+        self.sampler = sampler
 
     def gen_explanation(
         self,
@@ -29,7 +32,7 @@ class InputGenerator:
             f"Try to keep your answer below {self.llm.max_tokens} tokens"
         )
 
-        user_prompt, criteria = explanation_prompt()
+        user_prompt, criteria = explanation_prompt(self.sampler)
         val_answer = self.llm.prompt(
             user_prompt=user_prompt, system_prompt=system_prompt
         )
@@ -0,0 +1,252 @@
+"""
+The history of the miners' scores: one row per registered miner and step,
+with its response, score and final weight, appended to Parquet files
+partitioned by day (`date=YYYY-MM-DD/`), and the prebuilt queries of
+`comchat.cli query-history`.
+
+Each step is a small file of its day's partition, and the partitions of the
+past days are compacted into a single file, so months of history are a few
+hundred files. The queries are lazy: the date filter skips whole partitions,
+and only the columns a query uses are read.
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ..logs import get_logger
+from .recording import ResponseStatus, StepRecord
+
+if TYPE_CHECKING:
+    import polars as pl
+
+logger = get_logger(__name__)
+
+_COMPACTED = "part-0.parquet"
+_FAILURES = ("timeout", "error", "empty", "gibberish", "embedding", "offline")
+
+
+def _schema() -> dict[str, Any]:
+    import polars as pl
+
+    return {
+        "timestamp": pl.Datetime("us", "UTC"),
+        "step": pl.Utf8,
+        "uid": pl.Int32,
+        "key": pl.Utf8,
+        "service": pl.Utf8,
+        "model": pl.Utf8,
+        # see `recording.ResponseStatus`
+        "status": pl.Utf8,
+        # why the miner has no score: timeout, error, empty, gibberish, embedding
+        # or offline
+        "failure": pl.Utf8,
+        "latency_s": pl.Float64,
+        "score": pl.Float64,
+        # null when no weights were set in the step
+        "weight": pl.Int32,
+    }
+
+
+class ScoreHistory:
+    """The score history under `path`, appended to by a single validator."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._compacted_before: str | None = None
+
+    def append(self, record: StepRecord, weights: dict[int, int] | None) -> Path:
+        """
+        Appends a step, with the weights set at its end.
+
+        Returns:
+            The file written.
+        """
+        import polars as pl
+
+        timestamp = datetime.fromtimestamp(record.started_at, timezone.utc)
+        miners = list(record.miners.values())
+        rows = len(miners)
+        frame = pl.DataFrame(
+            {
+                "timestamp": [timestamp] * rows,
+                "step": [record.step] * rows,
+                "uid": [miner.uid for miner in miners],
+                "key": [miner.key for miner in miners],
+                "service": [miner.service for miner in miners],
+                "model": [miner.model for miner in miners],
+                "status": [miner.response.status for miner in miners],
+                "failure": [
+                    miner.response.failure
+                    or (
+                        miner.response.status
+                        if miner.response.status
+                        not in (ResponseStatus.ANSWERED, ResponseStatus.NOT_ASKED)
+                        else None
+                    )
+                    for miner in miners
+                ],
+                "latency_s": [miner.response.latency_s for miner in miners],
+                "score": [miner.score for miner in miners],
+                "weight": [
+                    None if weights is None else weights.get(miner.uid, 0) for miner in miners
+                ],
+            },
+            schema=_schema(),
+        )
+        date = timestamp.date().isoformat()
+        partition = self.path / f"date={date}"
+        partition.mkdir(exist_ok=True)
+        path = partition / f"step-{record.started_at:.0f}-{uuid.uuid4().hex[:8]}.parquet"
+        temporary = path.with_suffix(".tmp")
+        frame.write_parquet(temporary, compression="zstd")
+        temporary.replace(path)
+        if self._compacted_before != date:
+            self.compact(before=date)
+            self._compacted_before = date
+        return path
+
+    def compact(self, before: str) -> None:
+        """Merges the files of each partition dated before `before` into one."""
+        import polars as pl
+
+        for partition in sorted(self.path.glob("date=*")):
+            if partition.name.removeprefix("date=") >= before:
+                continue
+            files = sorted(partition.glob("*.parquet"))
+            if len(files) < 2:
+                continue
+            # reading a file of a partition adds the partition column to it
+            frame = pl.concat(
+                [pl.read_parquet(file).select(list(_schema())) for file in files],
+                how="vertical_relaxed",
+            )
+            temporary = partition / (_COMPACTED + ".tmp")
+            frame.sort("timestamp", "uid").write_parquet(temporary, compression="zstd")
+            temporary.replace(partition / _COMPACTED)
+            for file in files:
+                if file.name != _COMPACTED:
+                    file.unlink()
+            logger.info("Compacted %s files of %s", len(files), partition.name)
+
+
+def scan(
+    path: str | os.PathLike[str], days: int | None = None, uid: int | None = None
+) -> "pl.LazyFrame":
+    """
+    The history under `path`, lazily.
+
+    Args:
+        path: The history directory.
+        days: How many days back to go, None for all of the history.
+        uid: The miner to keep, None for all of them.
+    """
+    import polars as pl
+
+    history = pl.scan_parquet(Path(path) / "**" / "*.parquet", hive_partitioning=True)
+    if days is not None:
+        start = datetime.now(timezone.utc) - timedelta(days=days)
+        # the partition filter skips the files, the timestamp one the rows
+        history = history.filter(
+            (pl.col("date") >= start.date().isoformat()) & (pl.col("timestamp") >= start)
+        )
+    if uid is not None:
+        history = history.filter(pl.col("uid") == uid)
+    return history
+
+
+def miner_trends(history: "pl.LazyFrame", every: str = "1d") -> "pl.LazyFrame":
+    """The score, weight and failures of each miner, per `every` period."""
+    import polars as pl
+
+    asked = pl.col("status") != ResponseStatus.NOT_ASKED
+    return (
+        history.with_columns(pl.col("timestamp").dt.truncate(every).alias("period"))
+        .group_by("uid", "period")
+        .agg(
+            asked.sum().alias("asked"),
+            pl.col("score").mean().alias("mean_score"),
+            pl.col("weight").mean().alias("mean_weight"),
+            (pl.col("failure").is_not_null().sum() / asked.sum()).alias("failure_rate"),
+            pl.col("latency_s").median().alias("median_latency_s"),
+        )
+        .sort("uid", "period")
+    )
+
+
+def model_breakdown(history: "pl.LazyFrame") -> "pl.LazyFrame":
+    """The answers, scores and latencies per service and model asked for, from `models`."""
+    import polars as pl
+
+    from .models import models
+
+    # the offline miners weren't asked for a model
+    asked = history.filter(
+        ~pl.col("status").is_in([ResponseStatus.NOT_ASKED, ResponseStatus.OFFLINE])
+    )
+    stats = asked.group_by("service", "model").agg(
+        pl.col("step").n_unique().alias("steps"),
+        pl.len().alias("asked"),
+        pl.col("score").is_not_null().sum().alias("scored"),
+        pl.col("score").mean().alias("mean_score"),
+        pl.col("latency_s").median().alias("median_latency_s"),
+        pl.col("latency_s").quantile(0.95).alias("p95_latency_s"),
+        pl.col("failure").eq_missing(ResponseStatus.TIMEOUT).mean().alias("timeout_rate"),
+    )
+    # every model the validator can ask for, even if it wasn't yet
+    configured = pl.LazyFrame(
+        {
+            "service": [model["service"] for model in models],
+            "model": [model["model"] for model in models],
+        }
+    )
+    return configured.join(stats, on=["service", "model"], how="outer_coalesce").sort(
+        "service", "model"
+    )
+
+
+def timeout_rates(history: "pl.LazyFrame") -> "pl.LazyFrame":
+    """The failures of each miner by reason, the most timing out first."""
+    import polars as pl
+
+    asked = history.filter(pl.col("status") != ResponseStatus.NOT_ASKED)
+    return (
+        asked.group_by("uid")
+        .agg(
+            pl.len().alias("asked"),
+            *(
+                pl.col("failure").eq_missing(reason).sum().alias(reason)
+                for reason in _FAILURES
+            ),
+            pl.col("failure").eq_missing(ResponseStatus.TIMEOUT).mean().alias("timeout_rate"),
+            pl.col("latency_s").quantile(0.95).alias("p95_latency_s"),
+        )
+        .sort("timeout_rate", "uid", descending=[True, False])
+    )
+
+
+def step_scores(history: "pl.LazyFrame") -> list[dict[int, float]]:
+    """The scores of each step, by uid, in the order the steps ran."""
+    import polars as pl
+
+    steps = (
+        history.filter(pl.col("score").is_not_null())
+        .group_by("step")
+        .agg(pl.col("timestamp").min(), pl.col("uid"), pl.col("score"))
+        .sort("timestamp")
+        .collect()
+    )
+    return [
+        dict(zip(uids, scores))
+        for uids, scores in zip(steps["uid"].to_list(), steps["score"].to_list())
+    ]
+
+
+QUERIES = {
+    "trends": miner_trends,
+    "models": model_breakdown,
+    "timeouts": timeout_rates,
+}
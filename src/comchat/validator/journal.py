@@ -0,0 +1,222 @@
+"""
+A write-ahead journal of the validation step in progress, so a validator
+restarting in the middle of a step resumes it instead of paying for its
+question and asking the miners again.
+
+The journal is a JSON lines file holding a single step: starting a step
+truncates it. A step starts with its question, then the answers and scores
+are appended as they come, and a last entry marks it done. Entries are
+flushed as they're written, which is enough to survive the process dying.
+Surviving the machine going down takes a sync to disk, which is done for the
+question and the end of the step, and batched for the entries in between:
+the first one written `sync_interval` seconds after the last sync syncs them.
+"""
+
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TextIO
+
+from ..logs import get_logger
+from .quantization import Float32Array, Precision, decode_vector, encode_vector
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 2
+# version 1 journaled a single model for every miner of the step
+SUPPORTED_VERSIONS = (1, 2)
+
+
+@dataclass
+class JournaledStep:
+    """What the journal holds of a step."""
+
+    step: str
+    started_at: float
+    miner_prompt: str
+    val_answer: str
+    embedded_val_answer: Float32Array
+    # the uids of the miners asked in the step
+    miners: list[int]
+    # the service and model each miner was asked for, by uid
+    models: dict[int, dict[str, str]]
+    answers: dict[int, str] = field(default_factory=dict)
+    scores: dict[int, float] = field(default_factory=dict)
+    # the embedded answers of the scored miners, when they were kept for the
+    # answer index or the recordings
+    embeddings: dict[int, Float32Array] = field(default_factory=dict)
+    done: bool = False
+
+
+def _parse(lines: list[str]) -> JournaledStep | None:
+    journaled: JournaledStep | None = None
+    for number, line in enumerate(lines, 1):
+        try:
+            entry: dict[str, Any] = json.loads(line)
+            stage = entry["stage"]
+            if stage == "question":
+                if entry["version"] not in SUPPORTED_VERSIONS:
+                    raise ValueError(f"unsupported version {entry['version']}")
+                if entry["version"] == 1:
+                    models = {uid: entry["model"] for uid in entry["miners"]}
+                else:
+                    models = {int(uid): model for uid, model in entry["models"].items()}
+                journaled = JournaledStep(
+                    step=entry["step"],
+                    started_at=entry["time"],
+                    miner_prompt=entry["miner_prompt"],
+                    val_answer=entry["val_answer"],
+                    embedded_val_answer=decode_vector(entry["embedding"]),
+                    miners=entry["miners"],
+                    models=models,
+                )
+            elif journaled is None or entry["step"] != journaled.step:
+                raise ValueError("entry of another step")
+            elif stage == "answer":
+                journaled.answers[entry["uid"]] = entry["answer"]
+            elif stage == "scores":
+                journaled.scores.update(
+                    {int(uid): score for uid, score in entry["scores"].items()}
+                )
+                journaled.embeddings.update(
+                    {
+                        int(uid): decode_vector(embedding)
+                        for uid, embedding in entry.get("embeddings", {}).items()
+                    }
+                )
+            elif stage == "done":
+                journaled.done = True
+        except (KeyError, TypeError, ValueError) as e:
+            # json.JSONDecodeError is a ValueError
+            logger.warning("Ignoring journal entry %s: %s", number, e)
+    return journaled
+
+
+class StepJournal:
+    """The journal of the validation step in progress."""
+
+    def __init__(self, path: str | os.PathLike[str], sync_interval: float = 1.0) -> None:
+        """
+        Args:
+            path: The journal file, created if missing.
+            sync_interval: How often, at most, the answers and scores are synced
+                to disk.
+        """
+        self.path = Path(path)
+        self.sync_interval = sync_interval
+        self.step: str | None = None
+        self._file: TextIO | None = None
+        self._synced_at = 0.0
+        self._unsynced = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def pending(self, max_age: float) -> JournaledStep | None:
+        """
+        The step left unfinished by the last run, if it started less than
+        `max_age` seconds ago.
+        """
+        if not self.path.exists():
+            return None
+        lines = self.path.read_text(encoding="utf-8").splitlines(keepends=True)
+        # the last line might have been cut by the crash
+        if lines and not lines[-1].endswith("\n"):
+            lines.pop()
+        journaled = _parse(lines)
+        if journaled is None or journaled.done:
+            return None
+        age = time.time() - journaled.started_at
+        if age > max_age:
+            logger.info("Not resuming step %s, it started %.0fs ago", journaled.step, age)
+            return None
+        return journaled
+
+    def _write(self, entry: dict[str, Any], sync: bool = False) -> None:
+        assert self._file is not None and self.step is not None, "no step started"
+        self._file.write(json.dumps({"step": self.step, **entry}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced = True
+        if sync or time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = False
+        self._synced_at = time.monotonic()
+
+    def start(
+        self,
+        miner_prompt: str,
+        val_answer: str,
+        embedded_val_answer: Float32Array,
+        miners: list[int],
+        models: dict[int, dict[str, str]],
+    ) -> None:
+        """Starts journaling a step, dropping the previous one."""
+        self.close()
+        self._file = self.path.open("w", encoding="utf-8")
+        self.step = uuid.uuid4().hex
+        self._write(
+            {
+                "stage": "question",
+                "version": FORMAT_VERSION,
+                "time": time.time(),
+                "miner_prompt": miner_prompt,
+                "val_answer": val_answer,
+                "embedding": encode_vector(embedded_val_answer, Precision.FLOAT32),
+                "miners": miners,
+                "models": models,
+            },
+            sync=True,
+        )
+
+    def resume(self, journaled: JournaledStep) -> None:
+        """Goes on journaling an unfinished step."""
+        self.close()
+        # drops the line cut by the crash, the next entries would be appended to it
+        with self.path.open("rb+") as file:
+            content = file.read()
+            file.truncate(content.rfind(b"\n") + 1)
+        self._file = self.path.open("a", encoding="utf-8")
+        self.step = journaled.step
+
+    def record_answer(self, uid: int, answer: str) -> None:
+        if self._file is not None:
+            self._write({"stage": "answer", "uid": uid, "answer": answer})
+
+    def record_scores(
+        self,
+        scores: dict[int, float],
+        embeddings: dict[int, Float32Array] | None = None,
+    ) -> None:
+        """
+        Journals scores, with the embedded answers they were computed from if
+        given, so a resumed step can still index and record them.
+        """
+        if self._file is None or not scores:
+            return
+        entry: dict[str, Any] = {"stage": "scores", "scores": scores}
+        if embeddings:
+            # float16 halves the journal entries at no cost to the scores,
+            # which are journaled as computed
+            entry["embeddings"] = {
+                uid: encode_vector(embedding, Precision.FLOAT16)
+                for uid, embedding in embeddings.items()
+            }
+        self._write(entry)
+
+    def finish(self, outcome: str) -> None:
+        """Marks the step done, it won't be resumed."""
+        if self._file is not None:
+            self._write({"stage": "done", "outcome": outcome}, sync=True)
+        self.close()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+        self.step = None
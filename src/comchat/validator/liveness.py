@@ -0,0 +1,94 @@
+"""
+A liveness probe of the miners: before a step, the miners about to be asked
+are pinged on their cheap `get_model` endpoint with a short timeout, so the
+question only goes to the ones that respond, instead of waiting out the full
+`generate` timeout on the offline ones.
+
+The responsive miners are cached for a while, so most steps only probe the
+miners that registered, moved, were offline, or failed to answer since the
+last probe.
+"""
+
+import asyncio
+import time
+from typing import Callable
+
+from communex.compat.types import Ss58Address  # type: ignore
+from communex.module.client import ModuleClient  # type: ignore
+from substrateinterface import Keypair  # type: ignore
+
+from ..logs import get_logger
+
+logger = get_logger(__name__)
+
+MinerInfo = tuple[list[str], Ss58Address]
+
+
+class LivenessCache:
+    """Whether each miner responded to its last probe, for `ttl` seconds."""
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self.clock = clock
+        # uid -> (connection and key probed, alive, probed at)
+        self._entries: dict[int, tuple[MinerInfo, bool, float]] = {}
+
+    def get(self, uid: int, miner_info: MinerInfo) -> bool | None:
+        """
+        Whether the miner is alive, or None if it wasn't probed in the last
+        `ttl` seconds at this address and key.
+        """
+        entry = self._entries.get(uid)
+        if entry is None:
+            return None
+        probed_info, alive, probed_at = entry
+        if probed_info != miner_info or self.clock() - probed_at > self.ttl:
+            return None
+        return alive
+
+    def set(self, uid: int, miner_info: MinerInfo, alive: bool) -> None:
+        self._entries[uid] = (miner_info, alive, self.clock())
+
+    def forget(self, uid: int) -> None:
+        """Probes the miner again next time, e.g. once it failed to answer."""
+        self._entries.pop(uid, None)
+
+
+async def probe_miner(key: Keypair, miner_info: MinerInfo, timeout: float) -> bool:
+    """Whether the miner answers `get_model` within `timeout` seconds."""
+    (module_ip, module_port), miner_key = miner_info
+    client = ModuleClient(module_ip, int(module_port), key)
+    try:
+        await client.call("get_model", miner_key, {}, timeout=timeout)  # type: ignore
+    except Exception as e:
+        logger.debug("Miner %s:%s failed the liveness probe: %s", module_ip, module_port, e)
+        return False
+    return True
+
+
+async def probe_miners(
+    key: Keypair,
+    miners: dict[int, MinerInfo],
+    timeout: float,
+    concurrency: int,
+) -> dict[int, bool]:
+    """
+    Probes the miners concurrently.
+
+    Args:
+        key: The validator key the probes are signed with.
+        miners: The connection and key of each miner to probe, by uid.
+        timeout: How long to wait for each miner, in seconds.
+        concurrency: How many probes are in flight at once.
+
+    Returns:
+        Whether each miner is alive, by uid.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def probe(miner_info: MinerInfo) -> bool:
+        async with slots:
+            return await probe_miner(key, miner_info, timeout)
+
+    alive = await asyncio.gather(*(probe(info) for info in miners.values()))
+    return dict(zip(miners, alive))
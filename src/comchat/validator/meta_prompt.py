@@ -1,8 +1,10 @@
+import math
 import random
 from dataclasses import dataclass
+from functools import lru_cache
 
 
-@dataclass
+@dataclass(frozen=True)
 class Criteria:
     subject_type: str
     specificity: str
@@ -12,414 +14,489 @@ class Criteria:
     field: str
 
 
-def get_fields() -> list[str]:
-    fields = [
-        "Higher Order Logic",
-        "Complexity theory",
-        "Fractal information theory",
-        "Geometrical music theory",
-        "Concurrency theory",
-        "Recursive function theory",
-        "Calculus",
-        "Graph rewrites",
-        "Hopf algebra",
-        "Programming language theory",
-        "Financial Derivatives",
-        "Coordination mechanisms",
-        "Incentive Design",
-        "linear logic",
-        "category theory",
-        "lambda calculus",
-        "Parallel computing",
-        "Zero-Knowledge proofs",
-        "Functional programming",
-        "Formal verification",
-        "Interaction Combinators",
-        "Automated theorem proving",
-        "Type Theory",
-        "distributed ledgers",
-        "distributed systems",
-        "natural language processing",
-        "Active Inference",
-        "Bioformation",
-        "Evolutionary Emergence",
-        "Internet",
-        "Cryptocurrency",
-        "Organizational behavior",
-        "Management science",
-        "Ontology",
-        "Free Energy Principle",
-        "Adaptivity",
-        "Emergent behavior",
-        "Cybernetics",
-        "Self-organization",
-        "Organizational Psychology",
-        "Evolutionary epistemology",
-        "Complex Systems",
-        "Network economics",
-        "Agent-based modeling",
-        "Co-evolution",
-        "Media theory",
-        "Monetary economics",
-        "Swarm intelligence",
-        "Organizational Ecology",
-        "Organizational Cybernetics",
-        "Semantic web",
-        "Autopoiesis",
-        "Stigmergy",
-        "Memetics",
-        "Synergetics",
-        "Resilience Theory",
-        "Formal systems",
-        "Abstract models of computation",
-        "Models of computation",
-        "Functional computing",
-        "Molecular Biology",
-        "Neuroscience",
-        "Quantum Physics",
-        "Artificial Intelligence",
-        "Cryptography",
-        "Nanotechnology",
-        "Astrophysics",
-        "Genetics",
-        "Robotics",
-        "Bioinformatics",
-        "Cognitive Science",
-        "Computational Linguistics",
-        "Game Theory",
-        "Network Science",
-        "Organic Chemistry",
-        "Particle Physics",
-        "Evolutionary Biology",
-        "Immunology",
-        "Materials Science",
-        "Nuclear Physics",
-        "Operations Research",
-        "Quantum Computing",
-        "Systems Biology",
-        "Behavioral Economics",
-        "Biomedical Engineering",
-        "Computational Neuroscience",
-        "Data Science",
-        "Epidemiology",
-        "Fluid Dynamics",
-        "Information Theory",
-        "Machine Learning",
-        "Mathematical Biology",
-        "Nonlinear Dynamics",
-        "Plasma Physics",
-        "Tensor Calculus",
-        "Quantum Chemistry",
-        "Statistical Mechanics",
-        "Theoretical Computer Science",
-        "Topology",
-        "Computational Fluid Dynamics",
-        "Econometrics",
-        "Environmental Science",
-        "Fractional Calculus",
-        "Geophysics",
-        "High Energy Physics",
-        "Knot Theory",
-        "Mathematical Logic",
-        "Number Theory",
-        "Philosophy",
-        "Pharmacology",
-        "Macroeconomics",
-        "Quantum Field Theory",
-        "Relativity",
-        "Stochastic Processes",
-        "Theoretical Ecology",
-        "Thermodynamics",
-        "Algebraic Geometry",
-        "Astrobiology",
-        "Bayesian Statistics",
-        "Biophysics",
-        "Combinatorics",
-        "Computational Geometry",
-        "Cosmology",
-        "Developmental Biology",
-        "Differential Equations",
-        "Experimental Psychology",
-        "Functional Analysis",
-        "Gauge Theory",
-        "Harmonic Analysis",
-        "Integrable Systems",
-        "Mathematical Finance",
-        "Metamaterials",
-        "Nonequilibrium Thermodynamics",
-        "Numerical Analysis",
-        "Optimal Control Theory",
-        "Partial Differential Equations",
-        "Quantum Optics",
-        "Representation Theory",
-        "Spectral Theory",
-        "String Theory",
-        "Theoretical Neuroscience",
-        "Computational Social Science",
-        "Dynamical Systems",
-        "Epigenetics",
-        "Evolutionary Game Theory",
-        "Extremal Combinatorics",
-        "Fractal Geometry",
-        "Geometric Topology",
-        "Gödel's Incompleteness Theorems",
-        "Homotopy Theory",
-        "Inverse Problems",
-        "Lie Algebras",
-        "Mathematical Epidemiology",
-        "Measure Theory",
-        "Operator Algebras",
-        "Random Matrix Theory",
-        "Soliton Theory",
-        "Symplectic Geometry",
-        "Additive Combinatorics",
-        "Algebraic Topology",
-        "Analytic Number Theory",
-        "Arithmetic Geometry",
-        "Epistemology",
-        "Bifurcation Theory",
-        "Coding Theory",
-        "Combinatorial Game Theory",
-        "Computational Topology",
-        "Conformal Field Theory",
-        "Control Theory",
-        "Discrete Geometry",
-        "Ergodic Theory",
-        "Geometric Measure Theory",
-        "Geometric Group Theory",
-        "Graph Theory",
-        "Harmonic Maps",
-        "Computational Storage",
-        "Homological Algebra",
-        "Kinetic Theory",
-        "Large Deviations",
-        "Modular Forms",
-        "Percolation Theory",
-        "Persistent Homology",
-        "Probabilistic Number Theory",
-        "Quantum Gravity",
-        "Quantum Groups",
-        "Quantum Information Theory",
-        "Quantum Topology",
-        "Quasicrystals",
-        "Applied Graph Theory",
-        "Rational Homotopy Theory",
-        "Rough Path Theory",
-        "Spectral Graph Theory",
-        "Stochastic Differential Equations",
-        "Stochastic Geometry",
-        "Stochastic Partial Differential Equations",
-        "Symbolic Dynamics",
-        "Topological Data Analysis",
-        "Topological Dynamics",
-        "Topological Recursion",
-        "Von Neumann Algebras",
-        "Algorithmic Information Theory",
-        "Algorithmic Randomness",
-        "Analytic Combinatorics",
-        "Arithmetic Combinatorics",
-        "Arithmetic Dynamics",
-        "Automata Groups",
-        "Braid Groups",
-        "Cluster Algebras",
-        "Combinatorial Species",
-        "Computable Analysis",
-        "Computational Algebraic Geometry",
-        "Computational Complexity Theory",
-        "Computational Group Theory",
-        "Computational Number Theory",
-        "Computational Topology",
-        "Constructive Mathematics",
-        "Set Theory",
-        "Mathematical Biology",
-        "Differential Topology",
-        "Discrete Differential Geometry",
-        "Acoustic Metamaterials",
-        "Adiabatic Quantum Computation",
-        "Affective Computing",
-        "Agent-Based Computational Economics",
-        "Algebraic Coding Theory",
-        "Algebraic Quantum Field Theory",
-        "Algorithmic Algebraic Geometry",
-        "Algorithmic Game Theory",
-        "Algorithmic Trading",
-        "Analytic Topology",
-        "Applied Cryptography",
-        "Arithmetic Circuit Complexity",
-        "Arithmetic of Function Fields",
-        "Artificial Life",
-        "Asymptotic Geometric Analysis",
-        "Atmospheric Physics",
-        "Automorphic Forms",
-        "Behavioral Game Theory",
-        "Biogeography",
-        "Biolinguistics",
-        "Biomechanics",
-        "Biostatistics",
-        "Cellular Automata",
-        "Chemical Graph Theory",
-        "Chemical Reaction Network Theory",
-        "Coalgebra",
-        "Cognitive Neurodynamics",
-        "Collective Intelligence",
-        "Combinatorial Commutative Algebra",
-        "Combinatorial Geometry",
-        "Combinatorial Matrix Theory",
-        "Combinatorial Optimization",
-        "Combinatorial Representation Theory",
-        "Comparative Genomics",
-        "Computational Algebraic Statistics",
-        "Computational Astrophysics",
-        "Computational Biology",
-        "Computational Creativity",
-        "Computational Geometry",
-        "Computational Intelligence",
-        "Computational Materials Science",
-        "Computational Mechanics",
-        "Computational Musicology",
-        "Computational Photography",
-        "Computational Psycholinguistics",
-        "Computational Semantics",
-        "Computational Sociolinguistics",
-        "Computational Statistics",
-        "Synthetic Biology",
-        "Computational Systems Biology",
-        "Computer Vision",
-        "Condensed Matter Physics",
-        "Conformal Geometry",
-        "Constraint Programming",
-        "Constructive Approximation Theory",
-        "Contact Topology",
-        "Contextual Bandits",
-        "Convex Algebraic Geometry",
-        "Cryobiology",
-        "Cryptographic Protocols",
-        "Electrical Engineering",
-        "Cyber-Physical Systems",
-        "Data Mining",
-        "Decision Theory",
-        "Deep Learning",
-        "Delay Differential Equations",
-        "Diophantine Approximation",
-        "Discrete Differential Geometry",
-        "Discrete Integrable Systems",
-        "Discrete Optimization",
-        "DNA Computing",
-        "Dynamical Systems",
-        "Economic Complexity",
-        "Econophysics",
-        "Embodied Cognition",
-        "Sympoiesis",
-        "Evolutionary Computation",
-        "Evolutionary Psychology",
-        "Explainable Artificial Intelligence",
-        "Teleodynamics",
-    ]
-
-    return fields
-
-
-def get_explination_types() -> list[str]:
-    types = [
-        "causal",
-        "by example",
-        "analogies",
-        "heuristic",
-        "inductive",
-        "deductive",
-        "functional",
-        "teleological",
-        "historical",
-        "reductionist",
-        "storytelling",
-        "from first principles",
-    ]
-    return types
-
-
-def get_subject_types() -> list[str]:
-
-    types = [
-        "phenomena",
-        "process",
-        "principles",
-        "concepts",
-        "methods",
-        "systems",
-        "theories",
-        "patterns",
-        "trends",
-    ]
-    return types
-
-
-def get_levels():
-    esotricity = [
-        "slight",
-        "mild",
-        "tangible",
-        "modest",
-        "moderate",
-        "substantial",
-        "strong",
-        "high",
-        "intense",
-        "very high",
-    ]
-
-    return esotricity
-
-
-def get_target_audience():
-    audiences = [
-        "middle school student",
-        "high school student",
-        "layperson",
-        "casual reader",
-        "enthusiast",
-        "hobbyist",
-        "undergraduate student",
-        "graduate student",
-        "early career researcher",
-        "experienced researcher",
-        "industry expert",
-        "academic expert",
-        "expert scientist",
-        "lead professor",
-    ]
-
-    return audiences
-
-
-def explanation_prompt() -> tuple[str, Criteria]:
-    subject_types = random.choice(get_subject_types())
-    specificity = random.choice(get_levels())
-    target_audiences = random.choice(get_target_audience())
-    detail = random.choice(get_levels())
-    abstraction = random.choice(get_levels())
-    fields = random.choice(get_fields())
-
-    criteria = Criteria(
-        subject_type=subject_types,
-        specificity=specificity,
-        target_audience=target_audiences,
-        detail=detail,
-        abstraction=abstraction,
-        field=fields,
-    )
+# the criteria values are built once, duplicates removed so every value is
+# equally likely
+FIELDS: tuple[str, ...] = tuple(dict.fromkeys([
+    "Higher Order Logic",
+    "Complexity theory",
+    "Fractal information theory",
+    "Geometrical music theory",
+    "Concurrency theory",
+    "Recursive function theory",
+    "Calculus",
+    "Graph rewrites",
+    "Hopf algebra",
+    "Programming language theory",
+    "Financial Derivatives",
+    "Coordination mechanisms",
+    "Incentive Design",
+    "linear logic",
+    "category theory",
+    "lambda calculus",
+    "Parallel computing",
+    "Zero-Knowledge proofs",
+    "Functional programming",
+    "Formal verification",
+    "Interaction Combinators",
+    "Automated theorem proving",
+    "Type Theory",
+    "distributed ledgers",
+    "distributed systems",
+    "natural language processing",
+    "Active Inference",
+    "Bioformation",
+    "Evolutionary Emergence",
+    "Internet",
+    "Cryptocurrency",
+    "Organizational behavior",
+    "Management science",
+    "Ontology",
+    "Free Energy Principle",
+    "Adaptivity",
+    "Emergent behavior",
+    "Cybernetics",
+    "Self-organization",
+    "Organizational Psychology",
+    "Evolutionary epistemology",
+    "Complex Systems",
+    "Network economics",
+    "Agent-based modeling",
+    "Co-evolution",
+    "Media theory",
+    "Monetary economics",
+    "Swarm intelligence",
+    "Organizational Ecology",
+    "Organizational Cybernetics",
+    "Semantic web",
+    "Autopoiesis",
+    "Stigmergy",
+    "Memetics",
+    "Synergetics",
+    "Resilience Theory",
+    "Formal systems",
+    "Abstract models of computation",
+    "Models of computation",
+    "Functional computing",
+    "Molecular Biology",
+    "Neuroscience",
+    "Quantum Physics",
+    "Artificial Intelligence",
+    "Cryptography",
+    "Nanotechnology",
+    "Astrophysics",
+    "Genetics",
+    "Robotics",
+    "Bioinformatics",
+    "Cognitive Science",
+    "Computational Linguistics",
+    "Game Theory",
+    "Network Science",
+    "Organic Chemistry",
+    "Particle Physics",
+    "Evolutionary Biology",
+    "Immunology",
+    "Materials Science",
+    "Nuclear Physics",
+    "Operations Research",
+    "Quantum Computing",
+    "Systems Biology",
+    "Behavioral Economics",
+    "Biomedical Engineering",
+    "Computational Neuroscience",
+    "Data Science",
+    "Epidemiology",
+    "Fluid Dynamics",
+    "Information Theory",
+    "Machine Learning",
+    "Mathematical Biology",
+    "Nonlinear Dynamics",
+    "Plasma Physics",
+    "Tensor Calculus",
+    "Quantum Chemistry",
+    "Statistical Mechanics",
+    "Theoretical Computer Science",
+    "Topology",
+    "Computational Fluid Dynamics",
+    "Econometrics",
+    "Environmental Science",
+    "Fractional Calculus",
+    "Geophysics",
+    "High Energy Physics",
+    "Knot Theory",
+    "Mathematical Logic",
+    "Number Theory",
+    "Philosophy",
+    "Pharmacology",
+    "Macroeconomics",
+    "Quantum Field Theory",
+    "Relativity",
+    "Stochastic Processes",
+    "Theoretical Ecology",
+    "Thermodynamics",
+    "Algebraic Geometry",
+    "Astrobiology",
+    "Bayesian Statistics",
+    "Biophysics",
+    "Combinatorics",
+    "Computational Geometry",
+    "Cosmology",
+    "Developmental Biology",
+    "Differential Equations",
+    "Experimental Psychology",
+    "Functional Analysis",
+    "Gauge Theory",
+    "Harmonic Analysis",
+    "Integrable Systems",
+    "Mathematical Finance",
+    "Metamaterials",
+    "Nonequilibrium Thermodynamics",
+    "Numerical Analysis",
+    "Optimal Control Theory",
+    "Partial Differential Equations",
+    "Quantum Optics",
+    "Representation Theory",
+    "Spectral Theory",
+    "String Theory",
+    "Theoretical Neuroscience",
+    "Computational Social Science",
+    "Dynamical Systems",
+    "Epigenetics",
+    "Evolutionary Game Theory",
+    "Extremal Combinatorics",
+    "Fractal Geometry",
+    "Geometric Topology",
+    "Gödel's Incompleteness Theorems",
+    "Homotopy Theory",
+    "Inverse Problems",
+    "Lie Algebras",
+    "Mathematical Epidemiology",
+    "Measure Theory",
+    "Operator Algebras",
+    "Random Matrix Theory",
+    "Soliton Theory",
+    "Symplectic Geometry",
+    "Additive Combinatorics",
+    "Algebraic Topology",
+    "Analytic Number Theory",
+    "Arithmetic Geometry",
+    "Epistemology",
+    "Bifurcation Theory",
+    "Coding Theory",
+    "Combinatorial Game Theory",
+    "Computational Topology",
+    "Conformal Field Theory",
+    "Control Theory",
+    "Discrete Geometry",
+    "Ergodic Theory",
+    "Geometric Measure Theory",
+    "Geometric Group Theory",
+    "Graph Theory",
+    "Harmonic Maps",
+    "Computational Storage",
+    "Homological Algebra",
+    "Kinetic Theory",
+    "Large Deviations",
+    "Modular Forms",
+    "Percolation Theory",
+    "Persistent Homology",
+    "Probabilistic Number Theory",
+    "Quantum Gravity",
+    "Quantum Groups",
+    "Quantum Information Theory",
+    "Quantum Topology",
+    "Quasicrystals",
+    "Applied Graph Theory",
+    "Rational Homotopy Theory",
+    "Rough Path Theory",
+    "Spectral Graph Theory",
+    "Stochastic Differential Equations",
+    "Stochastic Geometry",
+    "Stochastic Partial Differential Equations",
+    "Symbolic Dynamics",
+    "Topological Data Analysis",
+    "Topological Dynamics",
+    "Topological Recursion",
+    "Von Neumann Algebras",
+    "Algorithmic Information Theory",
+    "Algorithmic Randomness",
+    "Analytic Combinatorics",
+    "Arithmetic Combinatorics",
+    "Arithmetic Dynamics",
+    "Automata Groups",
+    "Braid Groups",
+    "Cluster Algebras",
+    "Combinatorial Species",
+    "Computable Analysis",
+    "Computational Algebraic Geometry",
+    "Computational Complexity Theory",
+    "Computational Group Theory",
+    "Computational Number Theory",
+    "Computational Topology",
+    "Constructive Mathematics",
+    "Set Theory",
+    "Mathematical Biology",
+    "Differential Topology",
+    "Discrete Differential Geometry",
+    "Acoustic Metamaterials",
+    "Adiabatic Quantum Computation",
+    "Affective Computing",
+    "Agent-Based Computational Economics",
+    "Algebraic Coding Theory",
+    "Algebraic Quantum Field Theory",
+    "Algorithmic Algebraic Geometry",
+    "Algorithmic Game Theory",
+    "Algorithmic Trading",
+    "Analytic Topology",
+    "Applied Cryptography",
+    "Arithmetic Circuit Complexity",
+    "Arithmetic of Function Fields",
+    "Artificial Life",
+    "Asymptotic Geometric Analysis",
+    "Atmospheric Physics",
+    "Automorphic Forms",
+    "Behavioral Game Theory",
+    "Biogeography",
+    "Biolinguistics",
+    "Biomechanics",
+    "Biostatistics",
+    "Cellular Automata",
+    "Chemical Graph Theory",
+    "Chemical Reaction Network Theory",
+    "Coalgebra",
+    "Cognitive Neurodynamics",
+    "Collective Intelligence",
+    "Combinatorial Commutative Algebra",
+    "Combinatorial Geometry",
+    "Combinatorial Matrix Theory",
+    "Combinatorial Optimization",
+    "Combinatorial Representation Theory",
+    "Comparative Genomics",
+    "Computational Algebraic Statistics",
+    "Computational Astrophysics",
+    "Computational Biology",
+    "Computational Creativity",
+    "Computational Geometry",
+    "Computational Intelligence",
+    "Computational Materials Science",
+    "Computational Mechanics",
+    "Computational Musicology",
+    "Computational Photography",
+    "Computational Psycholinguistics",
+    "Computational Semantics",
+    "Computational Sociolinguistics",
+    "Computational Statistics",
+    "Synthetic Biology",
+    "Computational Systems Biology",
+    "Computer Vision",
+    "Condensed Matter Physics",
+    "Conformal Geometry",
+    "Constraint Programming",
+    "Constructive Approximation Theory",
+    "Contact Topology",
+    "Contextual Bandits",
+    "Convex Algebraic Geometry",
+    "Cryobiology",
+    "Cryptographic Protocols",
+    "Electrical Engineering",
+    "Cyber-Physical Systems",
+    "Data Mining",
+    "Decision Theory",
+    "Deep Learning",
+    "Delay Differential Equations",
+    "Diophantine Approximation",
+    "Discrete Differential Geometry",
+    "Discrete Integrable Systems",
+    "Discrete Optimization",
+    "DNA Computing",
+    "Dynamical Systems",
+    "Economic Complexity",
+    "Econophysics",
+    "Embodied Cognition",
+    "Sympoiesis",
+    "Evolutionary Computation",
+    "Evolutionary Psychology",
+    "Explainable Artificial Intelligence",
+    "Teleodynamics",
+]))
+
+EXPLANATION_TYPES: tuple[str, ...] = (
+    "causal",
+    "by example",
+    "analogies",
+    "heuristic",
+    "inductive",
+    "deductive",
+    "functional",
+    "teleological",
+    "historical",
+    "reductionist",
+    "storytelling",
+    "from first principles",
+)
+
+SUBJECT_TYPES: tuple[str, ...] = (
+    "phenomena",
+    "process",
+    "principles",
+    "concepts",
+    "methods",
+    "systems",
+    "theories",
+    "patterns",
+    "trends",
+)
+
+LEVELS: tuple[str, ...] = (
+    "slight",
+    "mild",
+    "tangible",
+    "modest",
+    "moderate",
+    "substantial",
+    "strong",
+    "high",
+    "intense",
+    "very high",
+)
+
+TARGET_AUDIENCES: tuple[str, ...] = (
+    "middle school student",
+    "high school student",
+    "layperson",
+    "casual reader",
+    "enthusiast",
+    "hobbyist",
+    "undergraduate student",
+    "graduate student",
+    "early career researcher",
+    "experienced researcher",
+    "industry expert",
+    "academic expert",
+    "expert scientist",
+    "lead professor",
+)
+
+
+def get_fields() -> tuple[str, ...]:
+    return FIELDS
+
+
+def get_explination_types() -> tuple[str, ...]:
+    return EXPLANATION_TYPES
+
+
+def get_subject_types() -> tuple[str, ...]:
+    return SUBJECT_TYPES
+
+
+def get_levels() -> tuple[str, ...]:
+    return LEVELS
+
+
+def get_target_audience() -> tuple[str, ...]:
+    return TARGET_AUDIENCES
+
+
+class CriteriaSpace:
+    """
+    Every combination of criteria, addressable by an integer id.
+
+    Ids are mixed radix numbers whose most significant digit is the field, so
+    the ids of a field are contiguous.
+    """
 
+    def __init__(self) -> None:
+        # (Criteria attribute, values), most significant first
+        self.dimensions: tuple[tuple[str, tuple[str, ...]], ...] = (
+            ("field", FIELDS),
+            ("subject_type", SUBJECT_TYPES),
+            ("specificity", LEVELS),
+            ("target_audience", TARGET_AUDIENCES),
+            ("detail", LEVELS),
+            ("abstraction", LEVELS),
+        )
+        self.size = math.prod(len(values) for _, values in self.dimensions)
+        self.per_field = self.size // len(FIELDS)
+
+    def criteria(self, index: int) -> Criteria:
+        if not 0 <= index < self.size:
+            raise IndexError(f"Criteria id {index} is out of range")
+        chosen: dict[str, str] = {}
+        for name, values in reversed(self.dimensions):
+            index, digit = divmod(index, len(values))
+            chosen[name] = values[digit]
+        return Criteria(**chosen)
+
+    def index(self, criteria: Criteria) -> int:
+        index = 0
+        for name, values in self.dimensions:
+            index = index * len(values) + values.index(getattr(criteria, name))
+        return index
+
+
+CRITERIA_SPACE = CriteriaSpace()
+
+
+class CriteriaSampler:
+    """
+    Draws criteria ids from a seeded generator, so a seed always gives the
+    same questions. Fields are stratified: each one is drawn once, in a
+    shuffled order, before any is drawn again.
+    """
+
+    def __init__(self, seed: int | None = None, space: CriteriaSpace = CRITERIA_SPACE):
+        self.space = space
+        self.rng = random.Random(seed)
+        self._fields: list[int] = []
+        self._planned: list[int] = []
+
+    def _draw(self) -> int:
+        if not self._fields:
+            self._fields = list(range(len(FIELDS)))
+            self.rng.shuffle(self._fields)
+        field = self._fields.pop()
+        return field * self.space.per_field + self.rng.randrange(self.space.per_field)
+
+    def next_index(self) -> int:
+        if self._planned:
+            return self._planned.pop(0)
+        return self._draw()
+
+    def precompute(self, count: int) -> list[int]:
+        """
+        Draws the ids of the next `count` questions and renders their prompts
+        ahead of time. The sequence of questions is the same either way.
+        """
+        indexes = [self._draw() for _ in range(count)]
+        for index in indexes:
+            explanation_prompt_for(index)
+        self._planned.extend(indexes)
+        return indexes
+
+
+@lru_cache(maxsize=4096)
+def explanation_prompt_for(index: int) -> tuple[str, Criteria]:
+    """The question prompt and criteria of the criteria id `index`."""
+    criteria = CRITERIA_SPACE.criteria(index)
     prompt = (
-        f"Pick a specific subject in {subject_types} with a {specificity} level of esotericity in the field of {fields}, "
+        f"Pick a specific subject in {criteria.subject_type} with a {criteria.specificity} level of esotericity in the field of {criteria.field}, "
         "you consider interesting and provide a insightful semantically dense explanation, "
-        f"targetting a {target_audiences}. "
+        f"targetting a {criteria.target_audience}. "
         "Your goal is their comprehension of the explanation, according to their background expertise. "
-        f"Follow a {abstraction} abstraction level and a {detail} level of detail. "
+        f"Follow a {criteria.abstraction} abstraction level and a {criteria.detail} level of detail. "
         "Start by titling the subject you've picked in quotation marks."
     )
-
     return prompt, criteria
 
 
+_default_sampler = CriteriaSampler()
+
+
+def explanation_prompt(sampler: CriteriaSampler | None = None) -> tuple[str, Criteria]:
+    """Draws a question prompt, from `sampler` or from an unseeded one."""
+    return explanation_prompt_for((sampler or _default_sampler).next_index())
+
+
 def get_miner_prompt(criteria: Criteria, sample_subject: str, sample_length: int):
     prompt = (
         f"You are a top expert in the field of {criteria.field} with deep knowledge on "
@@ -0,0 +1,247 @@
+"""
+A local, append-only store of questions and reference answers, so validators
+can share the generation work by exchanging records.
+
+Records are JSON lines carrying the SHA-256 digest of their content, which is
+checked on every load and import: a record that doesn't match its digest is
+rejected, and a record already in the store is skipped. Reference embeddings
+are stored quantized, see `quantization`; version 1 records, with the
+embedding as a list of floats, are still read.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from ..logs import get_logger
+from .meta_prompt import Criteria
+from .quantization import Float32Array, decode_vector
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 2
+# the versions this module reads
+SUPPORTED_VERSIONS = (1, 2)
+
+
+@dataclass(frozen=True)
+class QARecord:
+    prompt: str
+    criteria: Criteria
+    # the subject line, a newline, then the explanation
+    reference: str
+    # as encoded by `quantization.encode_vector`, or a list of floats in version 1
+    embedding: list[float] | dict[str, Any]
+    embedding_model: str
+    # the ss58 address of the validator that generated it
+    source: str = ""
+    created_at: float = field(default_factory=time.time)
+
+    def content(self) -> dict[str, Any]:
+        """The fields covered by the digest."""
+        return {
+            "prompt": self.prompt,
+            "criteria": asdict(self.criteria),
+            "reference": self.reference,
+            "embedding": self.embedding,
+            "embedding_model": self.embedding_model,
+        }
+
+    @cached_property
+    def digest(self) -> str:
+        canonical = json.dumps(
+            self.content(), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def vector(self) -> Float32Array:
+        """
+        The decoded embedding.
+
+        Raises:
+            ValueError: If the embedding is malformed.
+        """
+        if isinstance(self.embedding, dict):
+            return decode_vector(self.embedding)
+        return np.asarray(self.embedding, dtype=np.float32)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "version": FORMAT_VERSION,
+                "digest": self.digest,
+                "source": self.source,
+                "created_at": self.created_at,
+                **self.content(),
+            },
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "QARecord":
+        """
+        Parses a record, checking its digest.
+
+        Raises:
+            ValueError: If the record is malformed or doesn't match its digest.
+        """
+        try:
+            data = json.loads(line)
+            if data["version"] not in SUPPORTED_VERSIONS:
+                raise ValueError(f"unsupported version {data['version']}")
+            record = cls(
+                prompt=data["prompt"],
+                criteria=Criteria(**data["criteria"]),
+                reference=data["reference"],
+                embedding=data["embedding"],
+                embedding_model=data["embedding_model"],
+                source=data.get("source", ""),
+                created_at=data.get("created_at", 0.0),
+            )
+        except (KeyError, TypeError, json.JSONDecodeError) as e:
+            raise ValueError(f"malformed record: {e}") from e
+        if record.digest != data["digest"]:
+            raise ValueError("the record doesn't match its digest")
+        return record
+
+
+def _read_records(
+    path: Path, offset: int = 0, shared: bool = True
+) -> Iterator[tuple[int, QARecord | None]]:
+    """
+    Yields the end offset and the record of each line, None for rejected ones.
+    In a `shared` file, an unterminated last line is still being written.
+    """
+    with path.open("rb") as file:
+        file.seek(offset)
+        for number, raw in enumerate(file, 1):
+            if shared and not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            try:
+                yield offset, QARecord.from_json(raw.decode())
+            except (ValueError, UnicodeDecodeError) as e:
+                logger.warning("Rejected record at %s:%s: %s", path, number, e)
+                yield offset, None
+
+
+class QAStore:
+    """
+    The records of a JSON lines file, appended to by this validator and any
+    other process sharing the file. The digests of the records this
+    validator already used are kept next to it, in a `.used` file.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = Path(path)
+        self.used_path = self.path.with_name(self.path.name + ".used")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        self.records: dict[str, QARecord] = {}
+        self.used: set[str] = set()
+        self._offset = 0
+        if self.used_path.exists():
+            self.used = set(self.used_path.read_text().split())
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Loads the records appended since the last load."""
+        for offset, record in _read_records(self.path, self._offset):
+            self._offset = offset
+            if record is not None:
+                self.records.setdefault(record.digest, record)
+
+    def _append(self, records: list[QARecord]) -> None:
+        if not records:
+            return
+        lines = "".join(record.to_json() + "\n" for record in records)
+        with self.path.open("a", encoding="utf-8") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.write(lines)
+                file.flush()
+                os.fsync(file.fileno())
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+        self.refresh()
+
+    def add(self, record: QARecord) -> bool:
+        """Appends the record unless it's already stored. Returns if it was."""
+        self.refresh()
+        if record.digest in self.records:
+            return False
+        self._append([record])
+        return True
+
+    def mark_used(self, record: QARecord) -> None:
+        self.used.add(record.digest)
+        with self.used_path.open("a") as file:
+            file.write(record.digest + "\n")
+
+    def take_unused(self, max_age: float = 0.0) -> QARecord | None:
+        """
+        Returns the newest record this validator didn't use yet, marking it used.
+
+        Args:
+            max_age: How old, in seconds, a record can be to be used, 0 for no
+                limit. Older questions are more likely to have been answered
+                before, and their answers shared.
+        """
+        self.refresh()
+        oldest = time.time() - max_age if max_age > 0 else float("-inf")
+        unused = [
+            record
+            for digest, record in self.records.items()
+            if digest not in self.used and record.created_at >= oldest
+        ]
+        if not unused:
+            return None
+        record = max(unused, key=lambda record: record.created_at)
+        self.mark_used(record)
+        return record
+
+    def export(self, path: str | os.PathLike[str], since: float = 0.0) -> int:
+        """
+        Writes the records created after `since` (a unix timestamp) to an
+        exchange file.
+
+        Returns:
+            The number of records written.
+        """
+        self.refresh()
+        records = [record for record in self.records.values() if record.created_at >= since]
+        with open(path, "w", encoding="utf-8") as file:
+            file.writelines(record.to_json() + "\n" for record in records)
+        return len(records)
+
+    def import_records(self, path: str | os.PathLike[str]) -> tuple[int, int]:
+        """
+        Appends the records of an exchange file that aren't stored yet.
+
+        Returns:
+            The number of records added, and of records rejected.
+        """
+        self.refresh()
+        added: dict[str, QARecord] = {}
+        rejected = 0
+        for _, record in _read_records(Path(path), shared=False):
+            if record is None:
+                rejected += 1
+            elif record.digest not in self.records:
+                added.setdefault(record.digest, record)
+        self._append(list(added.values()))
+        return len(added), rejected
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[QARecord]:
+        return iter(self.records.values())
@@ -0,0 +1,175 @@
+"""
+Compact storage of embeddings: fewer dimensions, and float16 or int8 values.
+
+text-embedding-3 embeddings can be shortened by keeping their first dimensions
+and renormalizing, and int8 vectors keep one float32 scale each. Use
+`check_tolerance` to measure how far scores computed from the stored vectors
+drift from the float32 ones before picking a format.
+"""
+
+import base64
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from .scoring import unit_euclid_scores
+
+Float32Array = npt.NDArray[np.float32]
+
+_INT8_MAX = 127
+
+
+class Precision(str, Enum):
+    FLOAT32 = "float32"
+    FLOAT16 = "float16"
+    INT8 = "int8"
+
+
+@dataclass(frozen=True)
+class QuantizedVectors:
+    """A (vectors, dimensions) matrix stored at `precision`."""
+
+    precision: Precision
+    values: npt.NDArray[Any]
+    # the float value of an int8 step, per vector, None for float precisions
+    scales: Float32Array | None = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def dequantize(self) -> Float32Array:
+        values = self.values.astype(np.float32)
+        if self.scales is not None:
+            values *= self.scales[:, np.newaxis]
+        return values
+
+
+def truncate_dimensions(embeddings: npt.ArrayLike, dimensions: int) -> Float32Array:
+    """
+    Keeps the first `dimensions` of each embedding, rescaled to its original
+    norm, like the `dimensions` parameter of text-embedding-3 models does.
+    """
+    matrix = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    if not dimensions or dimensions >= matrix.shape[1]:
+        return matrix
+    truncated = matrix[:, :dimensions].copy()
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    truncated *= np.linalg.norm(matrix, axis=1, keepdims=True) / norms
+    return truncated
+
+
+def quantize(embeddings: npt.ArrayLike, precision: Precision | str) -> QuantizedVectors:
+    """Stores a (vectors, dimensions) matrix of embeddings at `precision`."""
+    precision = Precision(precision)
+    matrix = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    match precision:
+        case Precision.FLOAT32:
+            return QuantizedVectors(precision, matrix)
+        case Precision.FLOAT16:
+            return QuantizedVectors(precision, matrix.astype(np.float16))
+        case Precision.INT8:
+            scales = np.abs(matrix).max(axis=1) / _INT8_MAX
+            scales[scales == 0] = 1
+            values = np.rint(matrix / scales[:, np.newaxis]).astype(np.int8)
+            return QuantizedVectors(precision, values, scales.astype(np.float32))
+
+
+def _stored_dtype(precision: Precision) -> np.dtype[Any]:
+    # little endian, whatever the platform
+    return np.dtype(precision.value).newbyteorder("<")
+
+
+def encode_vector(vector: npt.ArrayLike, precision: Precision | str) -> dict[str, Any]:
+    """Encodes one embedding as a JSON-able mapping, its values in base64."""
+    quantized = quantize(vector, precision)
+    values = quantized.values[0].astype(_stored_dtype(quantized.precision))
+    encoded: dict[str, Any] = {
+        "precision": quantized.precision.value,
+        "data": base64.b64encode(values.tobytes()).decode(),
+    }
+    if quantized.scales is not None:
+        encoded["scale"] = float(quantized.scales[0])
+    return encoded
+
+
+def decode_vector(encoded: dict[str, Any]) -> Float32Array:
+    """
+    Decodes an embedding encoded by `encode_vector`.
+
+    Raises:
+        ValueError: If the encoding is malformed.
+    """
+    try:
+        precision = Precision(encoded["precision"])
+        data = base64.b64decode(encoded["data"], validate=True)
+        values = np.frombuffer(data, dtype=_stored_dtype(precision))
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"malformed embedding: {e}") from e
+    vector = values.astype(np.float32)
+    if precision == Precision.INT8:
+        vector *= np.float32(encoded["scale"])
+    return vector
+
+
+@dataclass
+class ToleranceReport:
+    precision: Precision
+    dimensions: int
+    # the bytes of a stored vector, and how many times smaller than float32 it is
+    bytes_per_vector: float
+    compression: float
+    # absolute score differences with the full float32 embeddings
+    max_error: float
+    mean_error: float
+    epsilon: float
+
+    @property
+    def ok(self) -> bool:
+        return self.max_error <= self.epsilon
+
+
+def check_tolerance(
+    embeddings: npt.ArrayLike,
+    reference: npt.ArrayLike,
+    precision: Precision | str,
+    dimensions: int = 0,
+    epsilon: float = 0.005,
+) -> ToleranceReport:
+    """
+    Measures how far the scores of `embeddings` against `reference` move when
+    both are stored with `dimensions` and `precision`.
+
+    Args:
+        embeddings: The (answers, dimensions) embeddings to score.
+        reference: The reference embedding.
+        precision: The storage precision.
+        dimensions: The dimensions kept, 0 keeps them all.
+        epsilon: The largest acceptable score difference.
+
+    Returns:
+        The measured score errors and storage size.
+    """
+    matrix = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    reference_vector = np.asarray(reference, dtype=np.float32)
+    exact = unit_euclid_scores(matrix, reference_vector)
+
+    stored = quantize(truncate_dimensions(matrix, dimensions), precision)
+    stored_reference = quantize(truncate_dimensions(reference_vector, dimensions), precision)
+    scores = unit_euclid_scores(stored.dequantize(), stored_reference.dequantize()[0])
+
+    errors = np.abs(scores - exact)
+    bytes_per_vector = stored.nbytes / len(matrix)
+    return ToleranceReport(
+        precision=Precision(precision),
+        dimensions=stored.values.shape[1],
+        bytes_per_vector=bytes_per_vector,
+        compression=matrix[0].nbytes / bytes_per_vector,
+        max_error=float(errors.max(initial=0.0)),
+        mean_error=float(errors.mean()) if errors.size else 0.0,
+        epsilon=epsilon,
+    )
@@ -0,0 +1,198 @@
+"""
+Recordings of validation steps: the chain snapshot, the question, the
+reference answer, and every miner response with its timing, embedding and
+score, so the scoring of real steps can be replayed offline, see `replay`.
+
+Each step is a Parquet file, one row per registered miner plus a row for the
+reference answer, with uid -1. The step level columns repeat on every row,
+which Parquet's dictionary encoding stores once.
+"""
+
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from .quantization import Float32Array
+
+REFERENCE_UID = -1
+
+
+class ResponseStatus:
+    NOT_ASKED = "not_asked"
+    ANSWERED = "answered"
+    EMPTY = "empty"
+    TIMEOUT = "timeout"
+    ERROR = "error"
+    # left out for failing the liveness probe
+    OFFLINE = "offline"
+
+
+@dataclass
+class MinerResponse:
+    status: str
+    latency_s: float | None = None
+    answer: str | None = None
+    # why an answer wasn't scored: gibberish or embedding
+    failure: str | None = None
+
+
+@dataclass
+class RecordedMiner:
+    uid: int
+    key: str
+    # "ip:port"
+    address: str
+    # the service and model the miner was asked for, empty when not asked
+    service: str = ""
+    model: str = ""
+    response: MinerResponse = field(
+        default_factory=lambda: MinerResponse(ResponseStatus.NOT_ASKED)
+    )
+    embedding: Float32Array | None = None
+    score: float | None = None
+
+
+@dataclass
+class StepRecord:
+    netuid: int
+    validator_key: str
+    miner_prompt: str
+    val_answer: str
+    embedded_val_answer: Float32Array
+    miners: dict[int, RecordedMiner]
+    step: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_at: float = field(default_factory=time.time)
+
+
+def _schema() -> dict[str, Any]:
+    import polars as pl
+
+    return {
+        "step": pl.Utf8,
+        "started_at": pl.Float64,
+        "netuid": pl.Int32,
+        "validator_key": pl.Utf8,
+        "miner_prompt": pl.Utf8,
+        # the service and model asked for, empty on the rows of the reference
+        # answer and of the miners not asked
+        "service": pl.Utf8,
+        "model": pl.Utf8,
+        "uid": pl.Int32,
+        "key": pl.Utf8,
+        "address": pl.Utf8,
+        "status": pl.Utf8,
+        "latency_s": pl.Float64,
+        "answer": pl.Utf8,
+        # raw little endian float32
+        "embedding": pl.Binary,
+        "score": pl.Float64,
+    }
+
+
+def _embedding_bytes(embedding: Float32Array | None) -> bytes | None:
+    if embedding is None:
+        return None
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def write_step(record: StepRecord, directory: str | os.PathLike[str]) -> Path:
+    """
+    Writes a step to a new Parquet file in `directory`.
+
+    Returns:
+        The path of the file.
+    """
+    import polars as pl
+
+    reference = RecordedMiner(
+        REFERENCE_UID,
+        record.validator_key,
+        "",
+        response=MinerResponse(ResponseStatus.ANSWERED, answer=record.val_answer),
+        embedding=record.embedded_val_answer,
+    )
+    miners = [reference, *record.miners.values()]
+    rows = len(miners)
+    frame = pl.DataFrame(
+        {
+            "step": [record.step] * rows,
+            "started_at": [record.started_at] * rows,
+            "netuid": [record.netuid] * rows,
+            "validator_key": [record.validator_key] * rows,
+            "miner_prompt": [record.miner_prompt] * rows,
+            "service": [miner.service for miner in miners],
+            "model": [miner.model for miner in miners],
+            "uid": [miner.uid for miner in miners],
+            "key": [miner.key for miner in miners],
+            "address": [miner.address for miner in miners],
+            "status": [miner.response.status for miner in miners],
+            "latency_s": [miner.response.latency_s for miner in miners],
+            "answer": [miner.response.answer for miner in miners],
+            "embedding": [_embedding_bytes(miner.embedding) for miner in miners],
+            "score": [miner.score for miner in miners],
+        },
+        schema=_schema(),
+    )
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"step-{record.started_at:.0f}-{record.step}.parquet"
+    temporary = path.with_suffix(".tmp")
+    frame.write_parquet(temporary, compression="zstd")
+    temporary.replace(path)
+    return path
+
+
+def _embedding(data: bytes | None) -> Float32Array | None:
+    if data is None:
+        return None
+    return np.frombuffer(data, dtype="<f4").astype(np.float32)
+
+
+def read_steps(path: str | os.PathLike[str]) -> Iterator[StepRecord]:
+    """
+    Reads the steps recorded in a file, or in every file of a directory, in
+    the order they started.
+    """
+    import polars as pl
+
+    path = Path(path)
+    files = sorted(path.glob("*.parquet")) if path.is_dir() else [path]
+    if not files:
+        return
+    frame = pl.concat([pl.read_parquet(file) for file in files]).sort(
+        "started_at", "uid", maintain_order=True
+    )
+    for step in frame.partition_by("step", maintain_order=True):
+        rows = step.to_dicts()
+        first = rows[0]
+        reference = next(row for row in rows if row["uid"] == REFERENCE_UID)
+        embedded_val_answer = _embedding(reference["embedding"])
+        assert embedded_val_answer is not None, "the reference embedding is missing"
+        yield StepRecord(
+            netuid=first["netuid"],
+            validator_key=first["validator_key"],
+            miner_prompt=first["miner_prompt"],
+            val_answer=reference["answer"],
+            embedded_val_answer=embedded_val_answer,
+            miners={
+                row["uid"]: RecordedMiner(
+                    uid=row["uid"],
+                    key=row["key"],
+                    address=row["address"],
+                    service=row["service"],
+                    model=row["model"],
+                    response=MinerResponse(row["status"], row["latency_s"], row["answer"]),
+                    embedding=_embedding(row["embedding"]),
+                    score=row["score"],
+                )
+                for row in rows
+                if row["uid"] != REFERENCE_UID
+            },
+            step=first["step"],
+            started_at=first["started_at"],
+        )
@@ -0,0 +1,183 @@
+"""
+Replays recorded validation steps offline: the answers go through the
+gibberish filter, the deduplication and the scoring again, embedded with the
+embeddings recorded along them, and the weights are computed from the new
+scores, normalized per model in the recorded order of the steps as the
+validator would. Nothing is asked to the miners, the embedding service or the
+chain.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+from dataclasses import dataclass, field
+
+from substrateinterface import Keypair  # type: ignore
+
+from ._config import ValidatorSettings
+from .assignment import ModelScoreNormalizer
+from .recording import ResponseStatus, StepRecord, read_steps
+from .similarity import Embedder, Embedding
+from .streaming import MicroBatcher
+from .text_validator import TextValidator, compute_weights
+
+
+class RecordedEmbedder(Embedder):
+    """Embeds the answers of a recorded step with the embeddings recorded along them."""
+
+    def __init__(self, record: StepRecord) -> None:
+        self.embeddings: dict[str, Embedding] = {}
+        for miner in record.miners.values():
+            if miner.response.answer and miner.embedding is not None:
+                self.embeddings[miner.response.answer] = miner.embedding
+
+    def get_embedding(self, input: str) -> Embedding:
+        try:
+            return self.embeddings[input]
+        except KeyError:
+            raise KeyError("the answer wasn't embedded when recorded") from None
+
+
+@dataclass
+class StepReplay:
+    step: str
+    answers: int
+    # as measured, before the normalization per model
+    scores: dict[int, float]
+    # from the normalized scores, when the normalization is enabled
+    weights: dict[int, int]
+    # the absolute differences with the recorded scores
+    score_diffs: list[float]
+    # if the weights differ from the ones of the recorded scores
+    weights_changed: bool
+
+
+@dataclass
+class ReplayReport:
+    steps: list[StepReplay] = field(default_factory=list)
+    wall_s: float = 0.0
+
+    @property
+    def answers(self) -> int:
+        return sum(step.answers for step in self.steps)
+
+    @property
+    def scored(self) -> int:
+        return sum(len(step.scores) for step in self.steps)
+
+    @property
+    def steps_per_minute(self) -> float:
+        return len(self.steps) * 60 / self.wall_s if self.wall_s else 0.0
+
+    @property
+    def max_score_diff(self) -> float:
+        return max((diff for step in self.steps for diff in step.score_diffs), default=0.0)
+
+    @property
+    def mean_score_diff(self) -> float:
+        diffs = [diff for step in self.steps for diff in step.score_diffs]
+        return statistics.fmean(diffs) if diffs else 0.0
+
+    @property
+    def weights_changed(self) -> int:
+        return sum(step.weights_changed for step in self.steps)
+
+
+async def _replay_step(
+    validator: TextValidator,
+    settings: ValidatorSettings,
+    record: StepRecord,
+    recorded_normalizer: ModelScoreNormalizer,
+) -> StepReplay:
+    """
+    Replays a step. The new scores are normalized by the validator's
+    normalizer and the recorded ones by `recorded_normalizer`, so each
+    sequence of steps keeps its own model statistics.
+    """
+    validator.embedder = RecordedEmbedder(record)
+    answers: MicroBatcher[tuple[int, str]] = MicroBatcher(settings.embedding_batch_size, 0)
+    recorded_scores: dict[int, float] = {}
+    answered = 0
+    for uid, miner in record.miners.items():
+        if miner.response.status == ResponseStatus.ANSWERED and miner.response.answer:
+            answers.put((uid, miner.response.answer))
+            answered += 1
+        if miner.score is not None:
+            recorded_scores[uid] = miner.score
+    answers.close()
+    scores = await validator._score_answers(settings, answers, record.embedded_val_answer)
+    normalized, recorded_normalized = scores, recorded_scores
+    if settings.model_score_normalization:
+        assignment = {
+            uid: {"service": miner.service, "model": miner.model}
+            for uid, miner in record.miners.items()
+            if miner.service
+        }
+        normalized = validator._normalize_scores(settings, scores, assignment)
+        recorded_normalizer.update(recorded_scores, assignment)
+        recorded_normalized = recorded_normalizer.normalize(recorded_scores, assignment)
+    weights = compute_weights(normalized, settings)
+    return StepReplay(
+        step=record.step,
+        answers=answered,
+        scores=scores,
+        weights=weights,
+        score_diffs=[
+            abs(score - recorded_scores[uid])
+            for uid, score in scores.items()
+            if uid in recorded_scores
+        ],
+        weights_changed=weights != compute_weights(recorded_normalized, settings),
+    )
+
+
+def replay(
+    path: str | os.PathLike[str], settings: ValidatorSettings, repeat: int = 1
+) -> ReplayReport:
+    """
+    Replays the steps recorded in a file or a directory.
+
+    Args:
+        path: The recording file, or a directory of them.
+        settings: The scoring and reward settings to replay the steps with.
+            Recording, journaling and the answer index are left out.
+        repeat: How many times to replay the steps, for benchmarking.
+
+    Returns:
+        The new scores and weights, compared to the recorded ones.
+    """
+    settings = settings.model_copy(
+        update={"record_path": "", "journal_path": "", "answer_index_path": ""}
+    )
+    records = list(read_steps(path))
+    report = ReplayReport()
+    if not records:
+        return report
+    validator = TextValidator(
+        Keypair.create_from_uri("//Alice"),
+        records[0].netuid,
+        None,  # type: ignore
+        embedder=RecordedEmbedder(records[0]),
+    )
+
+    async def run() -> None:
+        for _ in range(repeat):
+            # each repetition starts from no model statistics, as the recording did
+            validator.score_normalizer = None
+            recorded_normalizer = ModelScoreNormalizer(
+                settings.model_score_alpha, settings.model_score_min_samples
+            )
+            for record in records:
+                report.steps.append(
+                    await _replay_step(validator, settings, record, recorded_normalizer)
+                )
+
+    started = time.perf_counter()
+    try:
+        asyncio.run(run())
+    finally:
+        if validator.scoring_executor is not None:
+            validator.scoring_executor.shutdown()
+    report.wall_s = time.perf_counter() - started
+    return report
@@ -0,0 +1,161 @@
+"""
+Offline evaluation of the reward curves.
+
+Replays stored score histories through each curve in `sigmoid.REWARD_CURVES` and
+summarizes the resulting weight distributions, so incentives can be tuned
+without running live validation steps.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from ._config import ValidatorSettings
+from .sigmoid import FloatArray, REWARD_CURVES, get_reward_curve
+
+
+@dataclass
+class CurveReport:
+    curve: str
+    steps: int
+    elapsed_ms: float
+    mean_nonzero_weights: float
+    mean_max_share: float
+    mean_top_decile_share: float
+    mean_gini: float
+
+
+def load_score_history(path: str | Path, days: int | None = None) -> list[dict[int, float]]:
+    """
+    Loads a score history: the Parquet history directory the validator keeps
+    (see `history`), or a JSON list or JSON lines file where each entry is a
+    mapping of uid to score, optionally wrapped in a `scores` key.
+
+    Args:
+        path: The history directory, or the path of the history file.
+        days: How many days back to go in a history directory, None for all
+            of it.
+
+    Returns:
+        The score dictionary of each stored step, in order.
+    """
+    if Path(path).is_dir():
+        from .history import scan, step_scores
+
+        return step_scores(scan(path, days))
+    text = Path(path).read_text()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        records: list[Any] = json.loads(text)
+    else:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    history: list[dict[int, float]] = []
+    for record in records:
+        scores = record.get("scores", record)
+        history.append({int(uid): float(score) for uid, score in scores.items()})
+    return history
+
+
+def _gini(weights: FloatArray) -> float:
+    if weights.size == 0 or weights.sum() == 0:
+        return 0.0
+    sorted_weights = np.sort(weights)
+    n = sorted_weights.size
+    cumulative = np.cumsum(sorted_weights)
+    return float((n + 1 - 2 * (cumulative / cumulative[-1]).sum()) / n)
+
+
+def _to_weights(adjusted: FloatArray, scale: int) -> FloatArray:
+    # mirrors `to_integer_weights`, on arrays
+    total = adjusted.sum()
+    if total <= 0:
+        return np.zeros_like(adjusted)
+    return np.floor(adjusted * scale / total)
+
+
+def evaluate_curve(
+    history: list[dict[int, float]],
+    curve_name: str,
+    settings: ValidatorSettings,
+    scale: int = 1000,
+) -> CurveReport:
+    """
+    Replays a score history through a single reward curve.
+
+    Args:
+        history: The score dictionary of each step.
+        curve_name: The name of the curve to evaluate.
+        settings: The settings holding the curve parameters and the weight cap.
+        scale: The total weight distributed per step.
+
+    Returns:
+        A report summarizing the weight distributions the curve produces.
+    """
+    curve = get_reward_curve(curve_name)
+    score_arrays = [
+        np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        for scores in history
+        if scores
+    ]
+
+    start = time.perf_counter()
+    weight_arrays: list[FloatArray] = []
+    for scores in score_arrays:
+        # same cut as `cut_to_max_allowed_weights`
+        if scores.size > settings.max_allowed_weights:
+            scores = np.sort(scores)[::-1][: settings.max_allowed_weights]
+        weight_arrays.append(_to_weights(curve(scores, settings), scale))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    nonzero: list[float] = []
+    max_share: list[float] = []
+    top_decile_share: list[float] = []
+    gini: list[float] = []
+    for weights in weight_arrays:
+        total = weights.sum()
+        if total == 0:
+            continue
+        descending = np.sort(weights)[::-1]
+        top_n = max(1, descending.size // 10)
+        nonzero.append(float(np.count_nonzero(weights)))
+        max_share.append(float(descending[0] / total))
+        top_decile_share.append(float(descending[:top_n].sum() / total))
+        gini.append(_gini(weights))
+
+    def mean(values: list[float]) -> float:
+        return float(np.mean(values)) if values else 0.0
+
+    return CurveReport(
+        curve=curve_name,
+        steps=len(weight_arrays),
+        elapsed_ms=elapsed_ms,
+        mean_nonzero_weights=mean(nonzero),
+        mean_max_share=mean(max_share),
+        mean_top_decile_share=mean(top_decile_share),
+        mean_gini=mean(gini),
+    )
+
+
+def evaluate_curves(
+    history: list[dict[int, float]],
+    settings: ValidatorSettings,
+    curves: list[str] | None = None,
+) -> list[CurveReport]:
+    """
+    Replays a score history through several reward curves.
+
+    Args:
+        history: The score dictionary of each step.
+        settings: The settings holding the curve parameters.
+        curves: The curves to evaluate, defaults to every registered curve.
+
+    Returns:
+        A report per curve, in the given order.
+    """
+    curve_names = curves or list(REWARD_CURVES)
+    return [evaluate_curve(history, name, settings) for name in curve_names]
@@ -0,0 +1,152 @@
+"""
+Picks the miners to ask at each step, so a fixed number of generate calls
+per step covers the whole subnet over several steps, spending more of them
+where the score of a miner is uncertain.
+"""
+
+import math
+import random
+import statistics
+from dataclasses import dataclass
+
+from communex.types import Ss58Address  # type: ignore
+
+
+@dataclass
+class MinerRecord:
+    """What the sampler knows about a miner."""
+
+    key: Ss58Address
+    # exponential moving average and variance of the scores
+    mean: float = 0.0
+    variance: float = 0.0
+    samples: int = 0
+    last_sampled: int = -1
+    # the step a failing miner answered again, -1 if it never recovered
+    recovered_at: int = -1
+    failing: bool = False
+
+
+class MinerSampler:
+    """
+    Picks the miners to ask by priority:
+
+    - miners never sampled (new registrations included) come first
+    - then by staleness, the steps since the last sample relative to the steps
+      a full pass over the subnet takes, so every miner is eventually sampled
+    - plus the standard error of their score, relative to the spread of the
+      scores across miners
+    - plus a bonus for the steps following a failing miner's recovery
+
+    Keeps a moving average of each miner's scores to set weights for the
+    miners that weren't asked in the current step.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        staleness_weight: float = 1.0,
+        uncertainty_weight: float = 1.0,
+        recovery_bonus: float = 1.0,
+        recovery_steps: int = 3,
+        seed: int | None = None,
+    ) -> None:
+        """
+        Args:
+            alpha: The weight of the latest score in the moving average.
+            staleness_weight: The weight of the staleness in the priority.
+            uncertainty_weight: The weight of the score standard error in the priority.
+            recovery_bonus: The priority added to recently recovered miners.
+            recovery_steps: For how many steps a recovered miner gets the bonus.
+            seed: The seed of the random tie-breaks.
+        """
+        self.alpha = alpha
+        self.staleness_weight = staleness_weight
+        self.uncertainty_weight = uncertainty_weight
+        self.recovery_bonus = recovery_bonus
+        self.recovery_steps = recovery_steps
+        self.rng = random.Random(seed)
+        self.records: dict[int, MinerRecord] = {}
+        self.step = 0
+
+    def _sync(self, miners: dict[int, Ss58Address]) -> None:
+        for uid in self.records.keys() - miners.keys():
+            del self.records[uid]
+        for uid, key in miners.items():
+            record = self.records.get(uid)
+            # a new key on the uid is a new registration, its history is irrelevant
+            if record is None or record.key != key:
+                self.records[uid] = MinerRecord(key)
+
+    def priority(self, uid: int, cycle: float, spread: float) -> float:
+        record = self.records[uid]
+        if record.samples == 0:
+            return math.inf
+        staleness = (self.step - record.last_sampled) / cycle
+        standard_error = math.sqrt(record.variance / record.samples)
+        priority = (
+            self.staleness_weight * staleness
+            + self.uncertainty_weight * standard_error / spread
+        )
+        if record.recovered_at >= 0 and self.step - record.recovered_at < self.recovery_steps:
+            priority += self.recovery_bonus
+        return priority
+
+    def select(self, miners: dict[int, Ss58Address], size: int) -> list[int]:
+        """
+        Picks the miners to ask in this step.
+
+        Args:
+            miners: The key of each registered miner, by uid.
+            size: How many miners to pick.
+
+        Returns:
+            The uids of the picked miners, by decreasing priority.
+        """
+        self._sync(miners)
+        if size <= 0 or size >= len(miners):
+            return list(miners)
+        cycle = len(miners) / size
+        means = [record.mean for record in self.records.values() if record.samples]
+        spread = (statistics.stdev(means) if len(means) > 1 else 0.0) or 1.0
+        ranked = sorted(
+            miners,
+            key=lambda uid: (self.priority(uid, cycle, spread), self.rng.random()),
+            reverse=True,
+        )
+        return ranked[:size]
+
+    def update(self, sampled: list[int], scores: dict[int, float]) -> None:
+        """
+        Records the scores of the sampled miners, a miner without a score
+        counting as a 0, and moves to the next step.
+        """
+        for uid in sampled:
+            record = self.records.get(uid)
+            if record is None:
+                continue
+            score = scores.get(uid)
+            if score is not None and record.failing:
+                record.recovered_at = self.step
+            record.failing = score is None
+            value = score if score is not None else 0.0
+            if record.samples == 0:
+                record.mean = value
+            else:
+                delta = value - record.mean
+                record.mean += self.alpha * delta
+                record.variance = (1 - self.alpha) * (record.variance + self.alpha * delta**2)
+            record.samples += 1
+            record.last_sampled = self.step
+        self.step += 1
+
+    def scores(self) -> dict[int, float]:
+        """
+        The moving average score of the miners sampled at least once, leaving
+        out the ones that failed their last sample.
+        """
+        return {
+            uid: record.mean
+            for uid, record in self.records.items()
+            if record.samples and not record.failing
+        }
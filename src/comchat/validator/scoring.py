@@ -0,0 +1,192 @@
+"""
+CPU-bound scoring work, and the executor that runs it off the event loop.
+
+The functions at module level are pure and picklable, so `ScoringExecutor`
+can run them inline, in a thread pool or in a process pool. Embedding matrices
+sent to process workers go through shared memory instead of being pickled.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Any, Callable, Sequence, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+from fuzzywuzzy import fuzz  # type: ignore
+
+T = TypeVar("T")
+
+FloatMatrix = npt.NDArray[np.float32] | npt.NDArray[np.float64]
+
+
+def unit_euclid_scores(embeddings: FloatMatrix, reference: FloatMatrix) -> npt.NDArray[np.float64]:
+    """
+    Scores each embedding against the reference as `1 - |a - r| / (|a| + |r|)`,
+    so 1 is identical and 0 is opposite.
+
+    Args:
+        embeddings: The (answers, dimensions) matrix of answer embeddings.
+        reference: The (dimensions,) reference embedding.
+
+    Returns:
+        The score of each answer.
+    """
+    # float32 embeddings are scored in float32, without a float64 copy
+    distances = np.linalg.norm(embeddings - reference, axis=1)
+    norms = np.linalg.norm(embeddings, axis=1) + np.linalg.norm(reference)
+    return (1 - distances / norms).astype(np.float64)
+
+
+def pairwise_similarities(
+    texts: Sequence[str], rows: range | None = None, since: int = 0
+) -> list[tuple[int, int, int]]:
+    """
+    Computes the fuzzy similarity (0 to 100) of text pairs `(i, j)`, `i < j`.
+
+    Args:
+        texts: The texts to compare.
+        rows: The `i`s to compute, all of them by default.
+        since: Only compute the pairs with `j >= since`, to extend the pairs of
+            `texts[:since]` with the texts added after them.
+
+    Returns:
+        The `(i, j, similarity)` of each pair.
+    """
+    rows = rows if rows is not None else range(len(texts))
+    return [
+        (i, j, fuzz.ratio(texts[i], texts[j]))  # type: ignore
+        for i in rows
+        for j in range(max(i + 1, since), len(texts))
+    ]
+
+
+@dataclass
+class SharedMatrix:
+    """A picklable handle to a matrix held in shared memory."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def create(cls, array: FloatMatrix) -> tuple["SharedMatrix", shared_memory.SharedMemory]:
+        """
+        Copies `array` to a new shared memory block. The caller owns the returned
+        block and must `close` and `unlink` it once the workers are done.
+        """
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        view: FloatMatrix = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        view[...] = array
+        return cls(block.name, array.shape, array.dtype.str), block
+
+    def attach(self) -> tuple[FloatMatrix, shared_memory.SharedMemory]:
+        """Maps the matrix in a worker, without copying it."""
+        # spawned workers share the creator's resource tracker, which unlinks
+        # the block only once, when the creator does
+        block = shared_memory.SharedMemory(name=self.name)
+        array: FloatMatrix = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=block.buf)
+        return array, block
+
+
+def _unit_euclid_scores_shared(
+    handle: SharedMatrix, reference: FloatMatrix
+) -> npt.NDArray[np.float64]:
+    embeddings, block = handle.attach()
+    try:
+        return unit_euclid_scores(embeddings, reference)
+    finally:
+        del embeddings
+        block.close()
+
+
+class ExecutorKind(Enum):
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class ScoringExecutor:
+    """
+    Runs the scoring functions inline, in a thread pool or in a process pool,
+    awaitable from the event loop either way.
+    """
+
+    def __init__(self, kind: ExecutorKind | str = ExecutorKind.THREAD, max_workers: int = 0):
+        self.kind = ExecutorKind(kind)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool: Executor | None = None
+
+    @property
+    def pool(self) -> Executor | None:
+        if self._pool is None:
+            match self.kind:
+                case ExecutorKind.INLINE:
+                    return None
+                case ExecutorKind.THREAD:
+                    self._pool = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix="scoring"
+                    )
+                case ExecutorKind.PROCESS:
+                    # spawn, as forking a process running threads isn't safe
+                    self._pool = ProcessPoolExecutor(
+                        self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._pool
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Runs `fn(*args)` on the executor."""
+        pool = self.pool
+        if pool is None:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, partial(fn, *args))
+
+    async def score_embeddings(
+        self, embeddings: FloatMatrix, reference: FloatMatrix
+    ) -> npt.NDArray[np.float64]:
+        """Runs `unit_euclid_scores`, through shared memory for process workers."""
+        if self.kind != ExecutorKind.PROCESS:
+            return await self.run(unit_euclid_scores, embeddings, reference)
+        handle, block = SharedMatrix.create(np.ascontiguousarray(embeddings))
+        try:
+            return await self.run(_unit_euclid_scores_shared, handle, reference)
+        finally:
+            block.close()
+            block.unlink()
+
+    async def pairwise_similarities(
+        self, texts: Sequence[str], since: int = 0
+    ) -> list[tuple[int, int, int]]:
+        """Runs `pairwise_similarities`, with the rows split across the workers."""
+        if self.kind == ExecutorKind.INLINE or len(texts) < 2:
+            return pairwise_similarities(texts, since=since)
+        texts = list(texts)
+        # the row i compares with the n - i - 1 following texts, interleave the
+        # rows so each worker gets a similar amount of comparisons
+        shards = [range(start, len(texts), self.max_workers) for start in range(self.max_workers)]
+        results = await asyncio.gather(
+            *(
+                self.run(pairwise_similarities, texts, rows, since)
+                for rows in shards
+                if len(rows)
+            )
+        )
+        return [pair for result in results for pair in result]
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stops the pool, cancelling the pending work.
+
+        Args:
+            wait: Whether to wait for the workers to exit, which a process
+                about to exit must do or its pool processes are left behind.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,305 @@
+"""
+Sharded validation: the miners of a step are partitioned across local worker
+processes, each asking and scoring its own shard, and the coordinator merges
+their scores before setting weights.
+"""
+
+import asyncio
+import atexit
+import bisect
+import hashlib
+import math
+import multiprocessing
+import os
+import signal
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, TypeVar
+
+from communex.types import Ss58Address  # type: ignore
+from substrateinterface import Keypair  # type: ignore
+
+from ..logs import get_logger
+from ._config import ValidatorSettings
+from .recording import MinerResponse
+from .similarity import Embedder, Embedding
+from .text_validator import STAGE_SECONDS, TextValidator
+
+T = TypeVar("T")
+
+logger = get_logger(__name__)
+
+
+def _ring_hash(value: str) -> int:
+    # not the builtin hash, which is salted per process
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class ConsistentHashRing:
+    """
+    Maps uids to shards with consistent hashing, so a uid stays on the same
+    shard across steps, and changing the number of shards only moves about
+    `1 / shards` of the uids.
+    """
+
+    def __init__(self, shards: int, replicas: int = 128) -> None:
+        if shards < 1:
+            raise ValueError("There must be at least one shard")
+        self.shards = shards
+        points = sorted(
+            (_ring_hash(f"shard-{shard}-{replica}"), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def shard_of(self, uid: int) -> int:
+        index = bisect.bisect(self._points, _ring_hash(f"uid-{uid}"))
+        return self._owners[index % len(self._points)]
+
+    def partition(self, items: dict[int, T]) -> list[dict[int, T]]:
+        """Splits a uid -> item mapping into one mapping per shard."""
+        partitions: list[dict[int, T]] = [{} for _ in range(self.shards)]
+        for uid, item in items.items():
+            partitions[self.shard_of(uid)][uid] = item
+        return partitions
+
+
+@dataclass
+class ShardTask:
+    """The part of a validation step a worker runs for its shard."""
+
+    settings: ValidatorSettings
+    modules_info: dict[int, tuple[list[str], Ss58Address]]
+    miner_prompt: str
+    assignment: dict[int, dict[str, str]]
+    embedded_val_answer: Embedding
+    answered: dict[int, str]
+
+
+class ShardError(Exception):
+    pass
+
+
+def _run_worker(
+    conn: Connection,
+    key: Keypair,
+    netuid: int,
+    embedder: Embedder | None,
+    call_timeout: int,
+) -> None:
+    """Runs the tasks received on `conn` until the coordinator closes it."""
+    # its own process group, with its scoring pool, so the coordinator can kill
+    # them all if it gets stuck
+    os.setpgid(0, 0)
+    validator = TextValidator(
+        key, netuid, None, embedder=embedder, call_timeout=call_timeout  # type: ignore
+    )
+    while True:
+        try:
+            task: ShardTask | None = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        try:
+            scores = asyncio.run(
+                validator._query_miners(
+                    task.settings,
+                    task.modules_info,
+                    task.miner_prompt,
+                    task.assignment,
+                    task.embedded_val_answer,
+                    task.answered,
+                )
+            )
+        except Exception as e:
+            # the exception itself might not be picklable
+            conn.send((None, f"{type(e).__name__}: {e}"))
+        else:
+            conn.send(((scores, validator.step_answers, validator.step_responses), None))
+    if validator.scoring_executor is not None:
+        # the pool processes would outlive the worker otherwise
+        validator.scoring_executor.shutdown(wait=True)
+
+
+class _ShardWorker:
+    def __init__(self, shard: int, *args: Any) -> None:
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        # not a daemon, so it can run its own scoring process pool
+        self.process = context.Process(
+            target=_run_worker, args=(child_conn, *args), name=f"validator-shard-{shard}"
+        )
+        self.process.start()
+        child_conn.close()
+
+    def run(
+        self, task: ShardTask, timeout: float
+    ) -> tuple[dict[int, float], dict[int, Embedding], dict[int, MinerResponse]]:
+        """
+        Returns the scores of the shard's miners, their embedded answers and responses.
+
+        Raises:
+            ShardError: If the worker failed, exited or took more than `timeout`
+                seconds, in which case it's terminated.
+        """
+        try:
+            self.conn.send(task)
+            if not self.conn.poll(timeout):
+                self.terminate()
+                raise ShardError(f"worker {self.process.name} timed out after {timeout:.0f}s")
+            scores, error = self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise ShardError(f"worker {self.process.name} exited") from e
+        if error is not None:
+            raise ShardError(error)
+        return scores
+
+    def _signal_group(self, signum: int) -> bool:
+        """Sends `signum` to the worker and its children. Returns if any was left."""
+        try:
+            # the worker leads its group, whose id is its pid
+            os.killpg(self.process.pid, signum)  # type: ignore
+        except ProcessLookupError:
+            return False
+        return True
+
+    def terminate(self) -> None:
+        """Kills a stuck worker and its children, a new one is spawned for the next step."""
+        # a worker that didn't get to start its own group yet is only in ours
+        self._signal_group(signal.SIGTERM)
+        self.process.terminate()
+        self.process.join(timeout=10)
+        self._signal_group(signal.SIGKILL)
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.conn.close()
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            logger.warning("Shard worker %s didn't exit, killing it", self.process.name)
+            self.terminate()
+        elif self._signal_group(0):
+            logger.warning("Shard worker %s left processes behind, killing them", self.process.name)
+            self._signal_group(signal.SIGKILL)
+
+
+class ShardedValidator(TextValidator):
+    """
+    A `TextValidator` that asks and scores the miners from `shards` worker
+    processes. The chain queries, the question generation and the weights stay
+    in the coordinator process.
+
+    The per-miner metrics are recorded by the workers, so the coordinator only
+    exposes the step level ones.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        shards: int = 2,
+        worker_embedder: Embedder | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Args:
+            shards: The number of worker processes.
+            worker_embedder: A picklable embedder for the workers, each of them
+                builds the default one when it's None.
+        """
+        super().__init__(*args, **kwargs)
+        self.ring = ConsistentHashRing(shards)
+        self.worker_embedder = worker_embedder
+        self.workers: dict[int, _ShardWorker] = {}
+        atexit.register(self.shutdown)
+
+    def _get_worker(self, shard: int) -> _ShardWorker:
+        worker = self.workers.get(shard)
+        if worker is None or not worker.process.is_alive():
+            worker = _ShardWorker(
+                shard, self.key, self.netuid, self.worker_embedder, self.call_timeout
+            )
+            self.workers[shard] = worker
+        return worker
+
+    def _shard_timeout(self, settings: ValidatorSettings, miners: int) -> float:
+        """
+        How long a shard of `miners` miners may take: the generate calls go in
+        waves of the concurrency limit, each bounded by the call timeout.
+        """
+        concurrency = settings.miner_concurrency
+        if settings.service_concurrency > 0:
+            concurrency = min(concurrency, settings.service_concurrency)
+        waves = math.ceil(miners / max(concurrency, 1))
+        return waves * self.call_timeout + settings.shard_scoring_timeout
+
+    async def _query_miners(
+        self,
+        settings: ValidatorSettings,
+        modules_info: dict[int, tuple[list[str], Ss58Address]],
+        miner_prompt: str,
+        assignment: dict[int, dict[str, str]],
+        embedded_val_answer: Embedding,
+        answered: dict[int, str] | None = None,
+    ) -> dict[int, float]:
+        partitions = self.ring.partition(modules_info)
+        answered_partitions = self.ring.partition(answered or {})
+        logger.info("Shard sizes: %s", [len(partition) for partition in partitions])
+        shards = [
+            shard
+            for shard in range(self.ring.shards)
+            if partitions[shard] or answered_partitions[shard]
+        ]
+        with STAGE_SECONDS.time(stage="miner_fanout"):
+            results = await asyncio.gather(
+                *(
+                    asyncio.to_thread(
+                        self._get_worker(shard).run,
+                        ShardTask(
+                            settings,
+                            partitions[shard],
+                            miner_prompt,
+                            {uid: assignment[uid] for uid in partitions[shard]},
+                            embedded_val_answer,
+                            answered_partitions[shard],
+                        ),
+                        self._shard_timeout(settings, len(partitions[shard])),
+                    )
+                    for shard in shards
+                ),
+                return_exceptions=True,
+            )
+
+        score_dict: dict[int, float] = {}
+        self.step_answers = {}
+        self.step_responses = {}
+        for shard, result in zip(shards, results):
+            if isinstance(result, BaseException):
+                # the other shards' scores are still worth setting
+                logger.error("Shard %s failed, its miners are left out: %s", shard, result)
+                continue
+            scores, answers, responses = result
+            score_dict.update(scores)
+            self.step_answers.update(answers)
+            self.step_responses.update(responses)
+        # the workers don't journal, the answers of failed shards are asked again
+        if self.journal is not None:
+            for uid, response in self.step_responses.items():
+                if response.answer and uid not in (answered or {}):
+                    self.journal.record_answer(uid, response.answer)
+            self.journal.record_scores(score_dict, self.step_answers)
+        return score_dict
+
+    def shutdown(self) -> None:
+        for worker in self.workers.values():
+            worker.stop()
+        self.workers.clear()
@@ -1,39 +1,216 @@
 import math
+from enum import Enum
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from ._config import ValidatorSettings
+
+FloatArray = npt.NDArray[np.float64]
+
 
 def sigmoid(x: float):
     return 1 / (1 + math.exp(-x))
 
-def threshold_sigmoid_reward_distribution(score_dict: dict[int, float]) -> dict[int, float]:
+
+class RewardCurve(Enum):
+    THRESHOLD_SIGMOID = "threshold_sigmoid"
+    RANK_POWER_LAW = "rank_power_law"
+    SOFTMAX = "softmax"
+
+
+def threshold_sigmoid_curve(
+    scores: FloatArray,
+    threshold_percentage: float = 0.2,
+    steepness: float = 5.0,
+    high_reward: float = 1.0,
+    low_reward: float = 0.01,
+) -> FloatArray:
     """
-    Adjusts the distribution of scores, such that the best miners are rewarded significantly more than the rest.
-    This ensures that it's profitable to run a high-end model, in comparison to cheap models.
+    Rewards miners scoring above a threshold set relative to the mean score,
+    with a sigmoid transition between `low_reward` and `high_reward`.
+
+    Args:
+        scores: The raw miner scores.
+        threshold_percentage: How far above the mean score the threshold sits.
+        steepness: The steepness of the sigmoid, higher punishes harder.
+        high_reward: The reward approached by miners well above the threshold.
+        low_reward: The reward approached by miners well below the threshold.
+
+    Returns:
+        The adjusted scores, in the same order as `scores`.
+    """
+    threshold = scores.mean() * (1 + threshold_percentage)
+    reward_ratio = 1 / (1 + np.exp(-(scores - threshold) * steepness))
+    return low_reward + (high_reward - low_reward) * reward_ratio
+
+
+def rank_power_law_curve(
+    scores: FloatArray,
+    exponent: float = 1.0,
+    high_reward: float = 1.0,
+    low_reward: float = 0.01,
+) -> FloatArray:
+    """
+    Rewards miners by their rank alone, following `1 / rank ** exponent`.
+    Ties share the best rank among them.
+
+    Args:
+        scores: The raw miner scores.
+        exponent: The power law exponent, higher concentrates rewards on the top.
+        high_reward: The reward given to the best ranked miner.
+        low_reward: The minimum reward any miner gets.
+
+    Returns:
+        The adjusted scores, in the same order as `scores`.
+    """
+    sorted_scores = np.sort(scores)[::-1]
+    # rank of each score, 1 being the best, ties get the lowest rank
+    ranks = np.searchsorted(-sorted_scores, -scores, side="left") + 1
+    reward_ratio = 1 / ranks.astype(np.float64) ** exponent
+    return np.maximum(high_reward * reward_ratio, low_reward)
+
+
+def softmax_curve(
+    scores: FloatArray,
+    temperature: float = 0.05,
+    high_reward: float = 1.0,
+    low_reward: float = 0.01,
+) -> FloatArray:
+    """
+    Rewards miners proportionally to `exp(score / temperature)`, rescaled so the
+    best miner gets `high_reward`.
+
+    Args:
+        scores: The raw miner scores.
+        temperature: The softmax temperature, lower concentrates rewards on the top.
+        high_reward: The reward given to the best miner.
+        low_reward: The minimum reward any miner gets.
+
+    Returns:
+        The adjusted scores, in the same order as `scores`.
+
+    Raises:
+        ValueError: If `temperature` isn't positive.
+    """
+    if temperature <= 0:
+        raise ValueError(f"The softmax temperature must be positive, got {temperature}")
+    # subtracting the max keeps exp from overflowing and maps the best miner to 1
+    reward_ratio = np.exp((scores - scores.max()) / temperature)
+    return np.maximum(high_reward * reward_ratio, low_reward)
+
+
+CurveFn = Callable[[FloatArray, ValidatorSettings], FloatArray]
+
+REWARD_CURVES: dict[str, CurveFn] = {
+    RewardCurve.THRESHOLD_SIGMOID.value: lambda scores, settings: threshold_sigmoid_curve(
+        scores,
+        threshold_percentage=settings.reward_threshold_percentage,
+        steepness=settings.reward_steepness,
+        high_reward=settings.reward_high,
+        low_reward=settings.reward_low,
+    ),
+    RewardCurve.RANK_POWER_LAW.value: lambda scores, settings: rank_power_law_curve(
+        scores,
+        exponent=settings.reward_power_exponent,
+        high_reward=settings.reward_high,
+        low_reward=settings.reward_low,
+    ),
+    RewardCurve.SOFTMAX.value: lambda scores, settings: softmax_curve(
+        scores,
+        temperature=settings.reward_temperature,
+        high_reward=settings.reward_high,
+        low_reward=settings.reward_low,
+    ),
+}
+
+
+def register_reward_curve(name: str, curve: CurveFn) -> None:
+    """
+    Registers a reward curve so it can be selected with the `reward_curve` setting.
+
+    Args:
+        name: The name used to select the curve.
+        curve: A function mapping a score array and the settings to adjusted scores.
+    """
+    REWARD_CURVES[name] = curve
+
+
+def get_reward_curve(name: str) -> CurveFn:
+    try:
+        return REWARD_CURVES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown reward curve {name}, available: {', '.join(REWARD_CURVES)}"
+        ) from None
+
+
+def shape_rewards(
+    score_dict: dict[int, float], settings: ValidatorSettings
+) -> dict[int, float]:
+    """
+    Adjusts the distribution of scores with the reward curve selected in the settings.
 
     Args:
         score_dict (dict[int, float]): A dictionary mapping miner UIDs to their scores.
+        settings (ValidatorSettings): The settings holding the curve and its parameters.
 
     Returns:
         A dictionary mapping miner UIDs to their adjusted scores.
     """
-    # Calculate the mean score
-    mean_score = sum(score_dict.values()) / len(score_dict)
+    if not score_dict:
+        return {}
+    curve = get_reward_curve(settings.reward_curve)
+    scores = np.fromiter(score_dict.values(), dtype=np.float64, count=len(score_dict))
+    adjusted = curve(scores, settings)
+    return dict(zip(score_dict.keys(), adjusted.tolist()))
 
-    # Set the threshold as a percentage above the mean score
-    threshold_percentage = 0.2  
-    threshold = mean_score * (1 + threshold_percentage)
 
-   
-    steepness = 5.0  # steepness for sharper punishment
+def to_integer_weights(score_dict: dict[int, float], scale: int = 1000) -> dict[int, int]:
+    """
+    Normalizes adjusted scores into integer weights summing to at most `scale`,
+    dropping the uids whose weight rounds down to 0.
+
+    Args:
+        score_dict (dict[int, float]): A dictionary mapping miner UIDs to their adjusted scores.
+        scale (int): The total weight to distribute.
 
-    # Set the high and low rewards
-    high_reward = 1.0
-    low_reward = 0.01  
+    Returns:
+        A dictionary mapping miner UIDs to their integer weights.
+    """
+    total = sum(score_dict.values())
+    if total <= 0:
+        return {}
+    weighted_scores = {uid: int(score * scale / total) for uid, score in score_dict.items()}
+    return {k: v for k, v in weighted_scores.items() if v != 0}
 
-    # Calculate the adjusted scores using the sigmoid function
-    adjusted_scores : dict[int, float] = {}
-    for model_id, score in score_dict.items():
-        normalized_score = (score - threshold) * steepness
-        reward_ratio = sigmoid(normalized_score)
-        adjusted_score = low_reward + (high_reward - low_reward) * reward_ratio
-        adjusted_scores[model_id] = adjusted_score
 
-    return adjusted_scores
+def threshold_sigmoid_reward_distribution(
+    score_dict: dict[int, float],
+    threshold_percentage: float = 0.2,
+    steepness: float = 5.0,
+    high_reward: float = 1.0,
+    low_reward: float = 0.01,
+) -> dict[int, float]:
+    """
+    Adjusts the distribution of scores, such that the best miners are rewarded significantly more than the rest.
+    This ensures that it's profitable to run a high-end model, in comparison to cheap models.
+
+    Args:
+        score_dict (dict[int, float]): A dictionary mapping miner UIDs to their scores.
+
+    Returns:
+        A dictionary mapping miner UIDs to their adjusted scores.
+    """
+    if not score_dict:
+        return {}
+    scores = np.fromiter(score_dict.values(), dtype=np.float64, count=len(score_dict))
+    adjusted = threshold_sigmoid_curve(
+        scores,
+        threshold_percentage=threshold_percentage,
+        steepness=steepness,
+        high_reward=high_reward,
+        low_reward=low_reward,
+    )
+    return dict(zip(score_dict.keys(), adjusted.tolist()))
@@ -1,11 +1,18 @@
+import base64
+import threading
 from typing import Protocol
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 from pydantic_settings import BaseSettings
-import openai
 import numpy
-from transformers import pipeline, Pipeline  # type: ignore
+import numpy.typing as npt
+
+from .tokens import chunk_text, count_tokens
+
+if TYPE_CHECKING:
+    # transformers pulls in torch/tensorflow, only import it when a classifier is built
+    from transformers import Pipeline  # type: ignore
 
 # from ..utils import log
 
@@ -44,6 +51,12 @@ examples = [
 
 class OpenAISettings(BaseSettings):
     api_key: str
+    # longer texts are embedded in chunks, below the model's 8191 tokens context
+    embedding_max_tokens: int = 8000
+    # how chunk embeddings are pooled: "mean", or "weighted" by chunk tokens
+    embedding_pooling: str = "weighted"
+    # the dimensions text-embedding-3 models shorten embeddings to, 0 for all
+    embedding_dimensions: int = 0
 
     class Config:
         extra = "allow"
@@ -63,8 +76,21 @@ class EmbeddingModelSpec:
         pass
 
 
+# embeddings are float32, the precision embedding services compute them with
+Embedding = npt.NDArray[numpy.float32]
+
+
 class Embedder(Protocol):
-    def get_embedding(self, input: str) -> list[float]: ...
+    def get_embedding(self, input: str) -> Embedding: ...
+
+    def get_embeddings(self, inputs: list[str]) -> Embedding:
+        """
+        Embeds several texts, in one request when the service allows it.
+
+        Returns:
+            The (texts, dimensions) matrix of the embeddings.
+        """
+        return numpy.stack([self.get_embedding(input) for input in inputs])
 
 
 class Distancer(Protocol):
@@ -72,17 +98,104 @@ class Distancer(Protocol):
 
 
 class OpenAIEmbedder(Embedder):
+    provider = "openai"
+
     def __init__(
-        self, openai_settings: OpenAISettings, model: str = "text-embedding-3-small"
+        self,
+        openai_settings: OpenAISettings,
+        model: str = "text-embedding-3-small",
+        dimensions: int = 0,
     ):
         self.openai_settings = openai_settings
         self.model = model
+        self.dimensions = dimensions
+        import openai
+
         self.client = openai.OpenAI(api_key=self.openai_settings.api_key)
 
-    def get_embedding(self, input: str):
-        response = self.client.embeddings.create(model=self.model, input=input)
-        embedding = response.data[0].embedding
-        return embedding
+    def get_embedding(self, input: str) -> Embedding:
+        return self.get_embeddings([input])[0]
+
+    def get_embeddings(self, inputs: list[str]) -> Embedding:
+        # base64 embeddings are the raw little endian float32 buffers, decoding
+        # them skips parsing a JSON float, and a Python object, per dimension
+        extra: dict[str, Any] = {"dimensions": self.dimensions} if self.dimensions else {}
+        response = self.client.embeddings.create(
+            model=self.model, input=inputs, encoding_format="base64", **extra
+        )
+        embeddings: Embedding | None = None
+        for item in response.data:
+            encoded: Any = item.embedding
+            vector = numpy.frombuffer(base64.b64decode(encoded), dtype="<f4")
+            if embeddings is None:
+                embeddings = numpy.empty((len(inputs), vector.size), dtype=numpy.float32)
+            embeddings[item.index] = vector
+        assert embeddings is not None
+        return embeddings
+
+
+class ChunkedEmbedder(Embedder):
+    """
+    Embeds texts longer than `max_tokens` by splitting them at sentence
+    boundaries, embedding the chunks in one batched request and pooling their
+    embeddings. Shorter texts are embedded as they are.
+    """
+
+    def __init__(self, embedder: Embedder, max_tokens: int = 8000, pooling: str = "weighted"):
+        if pooling not in ("mean", "weighted"):
+            raise ValueError(f"Unknown pooling {pooling}")
+        self.embedder = embedder
+        self.max_tokens = max_tokens
+        self.pooling = pooling
+
+    @property
+    def model(self) -> str:
+        return getattr(self.embedder, "model", "")
+
+    @property
+    def provider(self) -> str:
+        return getattr(self.embedder, "provider", "embedder")
+
+    @property
+    def dimensions(self) -> int:
+        return getattr(self.embedder, "dimensions", 0)
+
+    def _pool(self, embeddings: Embedding, tokens: list[int]) -> Embedding:
+        weights = tokens if self.pooling == "weighted" else None
+        pooled = numpy.average(embeddings, axis=0, weights=weights)
+        # keep the scale of the chunk embeddings, which scoring depends on
+        norm = numpy.linalg.norm(pooled)
+        if norm:
+            pooled *= numpy.linalg.norm(embeddings, axis=1).mean() / norm
+        return pooled.astype(numpy.float32)
+
+    def get_embedding(self, input: str) -> Embedding:
+        return self.get_embeddings([input])[0]
+
+    def get_embeddings(self, inputs: list[str]) -> Embedding:
+        chunked = [
+            chunk_text(text, self.max_tokens)
+            if count_tokens(text, upper_bound=True) > self.max_tokens
+            else [(text, 0)]
+            for text in inputs
+        ]
+        flat = [chunk for chunks in chunked for chunk, _ in chunks]
+        if len(flat) == 1:
+            return self.embedder.get_embedding(flat[0])[numpy.newaxis]
+        embeddings = self.embedder.get_embeddings(flat)
+        if len(flat) == len(inputs):
+            return embeddings
+
+        pooled = numpy.empty((len(inputs), embeddings.shape[1]), dtype=numpy.float32)
+        start = 0
+        for row, chunks in enumerate(chunked):
+            end = start + len(chunks)
+            if len(chunks) == 1:
+                pooled[row] = embeddings[start]
+            else:
+                pooled[row] = self._pool(embeddings[start:end], [tokens for _, tokens in chunks])
+            start = end
+        return pooled
 
 
 # class JairiumDistancer(Distancer):
@@ -98,7 +211,7 @@ class OpenAIEmbedder(Embedder):
 #         return dist  # type: ignore
 
 
-def do_classify(classifier: Pipeline, text: str) -> str | None:
+def do_classify(classifier: "Pipeline", text: str) -> str | None:
     """Classify the given text using the provided classifier.
 
     Args:
@@ -113,21 +226,87 @@ def do_classify(classifier: Pipeline, text: str) -> str | None:
         return text
 
 
-def get_classifier() -> Pipeline:
+GIBBERISH_MODEL = "madhurjindal/autonlp-Gibberish-Detector-492513457"
+
+
+def get_classifier(selected_model: str = GIBBERISH_MODEL) -> "Pipeline":
     """Get the classifier pipeline for gibberish detection.
 
     Returns:
         Pipeline: The classifier pipeline using the selected model.
     """
-    selected_model = "madhurjindal/autonlp-Gibberish-Detector-492513457"
+    from transformers import pipeline  # type: ignore
+
     classifier = pipeline("text-classification", model=selected_model)
     return classifier
 
 
-def euclidean_distance(list_1: list[float], list_2: list[float]) -> float:
-    vec_1 = numpy.array(list_1)
-    vec_2 = numpy.array(list_2)
-    norm = numpy.linalg.norm(vec_1 - vec_2)
+class GibberishClassifier:
+    """Batched gibberish detection, with the model loaded once on first use.
+
+    Texts longer than the model's maximum length are split into chunks of at
+    most that many tokens, and a text is clean when enough of its chunks are.
+    """
+
+    def __init__(
+        self,
+        selected_model: str = GIBBERISH_MODEL,
+        batch_size: int = 16,
+        min_clean_ratio: float = 0.5,
+    ) -> None:
+        self.selected_model = selected_model
+        self.batch_size = batch_size
+        self.min_clean_ratio = min_clean_ratio
+        self._classifier: "Pipeline | None" = None
+        self._lock = threading.Lock()
+
+    @property
+    def classifier(self) -> "Pipeline":
+        with self._lock:
+            if self._classifier is None:
+                self._classifier = get_classifier(self.selected_model)
+            return self._classifier
+
+    def _chunk(self, texts: list[str]) -> tuple[list[str], list[int]]:
+        """Splits the texts into model-sized chunks, returning the chunks and their text index."""
+        tokenizer: Any = self.classifier.tokenizer
+        max_length = min(tokenizer.model_max_length, 512) - tokenizer.num_special_tokens_to_add()
+        input_ids: list[list[int]] = tokenizer(texts, add_special_tokens=False)["input_ids"]
+        chunks: list[str] = []
+        owners: list[int] = []
+        for index, ids in enumerate(input_ids):
+            for start in range(0, max(len(ids), 1), max_length):
+                chunks.append(tokenizer.decode(ids[start:start + max_length]))
+                owners.append(index)
+        return chunks, owners
+
+    def classify(self, texts: list[str]) -> list[bool]:
+        """Classifies the texts, blocking, in batches.
+
+        Args:
+            texts: The texts to classify.
+
+        Returns:
+            Whether each text is clean, in the same order.
+        """
+        if not texts:
+            return []
+        chunks, owners = self._chunk(texts)
+        results: Any = self.classifier(chunks, batch_size=self.batch_size, truncation=True)
+        clean = [0] * len(texts)
+        total = [0] * len(texts)
+        for owner, result in zip(owners, results):
+            total[owner] += 1
+            if result["label"] == "clean":
+                clean[owner] += 1
+        return [
+            count / chunk_count >= self.min_clean_ratio
+            for count, chunk_count in zip(clean, total)
+        ]
+
+
+def euclidean_distance(vec_1: npt.ArrayLike, vec_2: npt.ArrayLike) -> float:
+    norm = numpy.linalg.norm(numpy.subtract(vec_1, vec_2))
     return float(norm)
 
 
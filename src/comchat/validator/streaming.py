@@ -0,0 +1,90 @@
+"""
+Building blocks for scoring miner answers while the other miners are still
+answering: a micro-batcher between the fan-out and the embedder, and an index
+of the answers already seen.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import deque
+from typing import AsyncIterator, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class MicroBatcher(Generic[T]):
+    """
+    Groups the items put by producers into batches of at most `max_size`.
+
+    A batch is released as soon as it is full, or `max_wait` seconds after its
+    oldest item arrived, or when the batcher is closed. Items put while a batch
+    is being processed are queued for the next ones.
+    """
+
+    def __init__(self, max_size: int, max_wait: float) -> None:
+        self.max_size = max(max_size, 1)
+        self.max_wait = max_wait
+        self._items: deque[tuple[float, T]] = deque()
+        self._arrived = asyncio.Event()
+        self._closed = False
+
+    def put(self, item: T) -> None:
+        self._items.append((time.monotonic(), item))
+        self._arrived.set()
+
+    def close(self) -> None:
+        """Releases the pending items and ends `batches` once they are consumed."""
+        self._closed = True
+        self._arrived.set()
+
+    async def _wait_arrival(self, timeout: float | None) -> bool:
+        self._arrived.clear()
+        try:
+            await asyncio.wait_for(self._arrived.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def batches(self) -> AsyncIterator[list[T]]:
+        """Yields the batches until the batcher is closed and drained."""
+        while True:
+            while not self._items and not self._closed:
+                await self._wait_arrival(None)
+            if not self._items:
+                return
+            deadline = self._items[0][0] + self.max_wait
+            while len(self._items) < self.max_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not await self._wait_arrival(remaining):
+                    break
+            size = min(self.max_size, len(self._items))
+            yield [self._items.popleft()[1] for _ in range(size)]
+
+
+class DuplicateIndex:
+    """
+    Indexes answers by a fingerprint of their whitespace and case normalized
+    text, so identical answers are embedded and scored once.
+    """
+
+    def __init__(self) -> None:
+        self._owners: dict[bytes, int] = {}
+
+    @staticmethod
+    def fingerprint(text: str) -> bytes:
+        normalized = " ".join(text.lower().split())
+        return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+    def add(self, uid: int, text: str) -> int | None:
+        """
+        Indexes the answer of miner `uid`.
+
+        Returns:
+            The uid of the first miner that gave the same answer, or None.
+        """
+        owner = self._owners.setdefault(self.fingerprint(text), uid)
+        return owner if owner != uid else None
+
+    def __len__(self) -> int:
+        return len(self._owners)
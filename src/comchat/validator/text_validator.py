@@ -1,9 +1,8 @@
 import asyncio
-import concurrent.futures
+import logging
 import re
 import time
-import random
-from functools import partial
+from collections import defaultdict
 from enum import Enum
 
 import numpy as np
@@ -15,23 +14,101 @@ from fuzzywuzzy import fuzz  # type: ignore
 from substrateinterface import Keypair  # type: ignore
 
 from ..miner._config import AnthropicSettings, OpenrouterSettings
-from ..miner.anthropic import AnthropicModule
-from ..miner.openrouter import OpenrouterModule
-from ..utils import retry, log
+from ..logs import get_logger
+from ..metrics import REGISTRY, start_metrics_server
+from ..utils import retry
 from ._config import ValidatorSettings
+from .answer_index import AnswerIndex, question_id
+from .assignment import AssignmentStrategy, ModelAssigner, ModelScoreNormalizer
+from .budget import BudgetPlanner, SpendTracker, StepPlan, cost
 from .generate_data import InputGenerator
-from .meta_prompt import get_miner_prompt
-from .similarity import Embedder, OpenAIEmbedder, OpenAISettings, euclidean_distance
-from .sigmoid import threshold_sigmoid_reward_distribution
+from .history import ScoreHistory
+from .journal import JournaledStep, StepJournal
+from .liveness import LivenessCache, probe_miners
+from .meta_prompt import CriteriaSampler, get_miner_prompt
+from .qa_store import QARecord, QAStore
+from .quantization import encode_vector
+from .recording import MinerResponse, RecordedMiner, ResponseStatus, StepRecord, write_step
+from .similarity import (
+    ChunkedEmbedder,
+    Embedding,
+    Embedder,
+    GibberishClassifier,
+    OpenAIEmbedder,
+    OpenAISettings,
+    euclidean_distance,
+)
+from .sampler import MinerSampler
+from .scoring import ScoringExecutor
+from .sigmoid import shape_rewards, to_integer_weights
+from .streaming import DuplicateIndex, MicroBatcher
+from .tokens import count_tokens
 from .models import models
 
 # TODO: make it match ipv6
 IP_REGEX = re.compile(r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}:\d+")
 
+logger = get_logger(__name__)
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "comchat_validator_stage_seconds",
+    "Wall time spent in each stage of a validation step",
+    ("stage",),
+)
+MINER_LATENCY = REGISTRY.histogram(
+    "comchat_validator_miner_latency_seconds",
+    "Latency of the generate call, per miner",
+    ("uid",),
+)
+MODEL_LATENCY = REGISTRY.histogram(
+    "comchat_validator_model_latency_seconds",
+    "Latency of the generate call, per service and model asked for",
+    ("service", "model"),
+)
+SERVICE_IN_FLIGHT = REGISTRY.gauge(
+    "comchat_validator_service_in_flight_calls",
+    "Generate calls in flight, per service asked for",
+    ("service",),
+)
+MINER_FAILURES = REGISTRY.counter(
+    "comchat_validator_miner_failures_total",
+    "Generate calls that didn't produce a usable answer, by reason "
+    "(timeout, error, empty, gibberish, embedding, offline)",
+    ("uid", "reason"),
+)
+SAMPLED_MINERS = REGISTRY.gauge(
+    "comchat_validator_sampled_miners",
+    "Miners asked in the last validation step",
+)
+OFFLINE_MINERS = REGISTRY.gauge(
+    "comchat_validator_offline_miners",
+    "Miners left out of the last validation step for failing the liveness probe",
+)
+SPEND_LAST_HOUR = REGISTRY.gauge(
+    "comchat_validator_spend_usd_last_hour",
+    "Estimated USD spent on API calls over the last hour, per provider",
+    ("provider",),
+)
+REPLAYED_ANSWERS = REGISTRY.counter(
+    "comchat_validator_replayed_answers_total",
+    "Answers close to an answer given to an earlier question, per miner",
+    ("uid",),
+)
+STEPS = REGISTRY.counter(
+    "comchat_validator_steps_total",
+    "Validation steps run, by outcome "
+    "(weights_set, no_answers, no_live_miners, over_budget, error)",
+    ("outcome",),
+)
+
 
 def set_weights(
-    score_dict: dict[int, float], netuid: int, client: CommuneClient, key: Keypair
-) -> None:
+    score_dict: dict[int, float],
+    netuid: int,
+    client: CommuneClient,
+    key: Keypair,
+    settings: ValidatorSettings | None = None,
+) -> dict[int, int]:
     """
     Set weights for miners based on their scores.
 
@@ -40,32 +117,42 @@ def set_weights(
         netuid (int): The network UID.
         client (CommuneClient): The CommuneX client.
         key (Keypair): The keypair for signing transactions.
+        settings (ValidatorSettings, optional): The settings selecting the reward curve.
+
+    Returns:
+        dict[int, int]: The weights set, by uid.
     """
 
-    cut_weights = cut_to_max_allowed_weights(score_dict)
-    adjsuted_to_sigmoid = threshold_sigmoid_reward_distribution(cut_weights)
+    if not settings:
+        settings = ValidatorSettings()  # type: ignore
 
-    # Create a new dictionary to store the weighted scores
-    weighted_scores: dict[int, int] = {}
+    weighted_scores = compute_weights(score_dict, settings)
+
+    uids = list(weighted_scores.keys())
+    weights = list(weighted_scores.values())
+    logger.info("Settings weights for the following uids: %s", uids)
+    client.vote(key=key, uids=uids, weights=weights, netuid=netuid)
+    return weighted_scores
 
-    # Calculate the sum of all inverted scores
-    scores = sum(adjsuted_to_sigmoid.values())
 
-    # Iterate over the items in the score_dict
-    for uid, score in adjsuted_to_sigmoid.items():
-        # Calculate the normalized weight as an integer
-        weight = int(score * 1000 / scores)
+def compute_weights(
+    score_dict: dict[int, float], settings: ValidatorSettings
+) -> dict[int, int]:
+    """
+    Turns the scores of the miners into the integer weights set on chain.
 
-        # Add the weighted score to the new dictionary
-        weighted_scores[uid] = weight
+    Args:
+        score_dict (dict[int, float]): A dictionary mapping miner UIDs to their scores.
+        settings (ValidatorSettings): The settings selecting the reward curve.
 
-    # filter out 0 weights
-    weighted_scores = {k: v for k, v in weighted_scores.items() if v != 0}
+    Returns:
+        dict[int, int]: The weight of each miner, leaving out 0 weights.
+    """
+    cut_weights = cut_to_max_allowed_weights(score_dict, settings)
+    adjusted_scores = shape_rewards(cut_weights, settings)
 
-    uids = list(weighted_scores.keys())
-    weights = list(weighted_scores.values())
-    log(f"Settings weights for the following uids: {uids}")
-    client.vote(key=key, uids=uids, weights=weights, netuid=netuid)
+    # normalize to integer weights, filtering out 0 weights
+    return to_integer_weights(adjusted_scores)
 
 
 def cut_to_max_allowed_weights(
@@ -177,11 +264,43 @@ class TextValidator(Module):
         self.key = key
         self.netuid = netuid
         if not embedder:
-            embedder = OpenAIEmbedder(OpenAISettings())  # type: ignore
+            openai_settings = OpenAISettings()  # type: ignore
+            embedder = ChunkedEmbedder(
+                OpenAIEmbedder(
+                    openai_settings, dimensions=openai_settings.embedding_dimensions
+                ),
+                openai_settings.embedding_max_tokens,
+                openai_settings.embedding_pooling,
+            )
         self.embedder = embedder
         self.val_model = "claude-3-opus-20240229"
         self.call_timeout = call_timeout
         self.provider = provider
+        self.gibberish_classifier: GibberishClassifier | None = None
+        self.gibberish_classifier_failed = False
+        self.scoring_executor: ScoringExecutor | None = None
+        self.sampler: MinerSampler | None = None
+        self.question_sampler: CriteriaSampler | None = None
+        self.qa_store: QAStore | None = None
+        self.spend = SpendTracker()
+        # the USD cost of the last question, and the tokens of its reference answer
+        self.question_cost: float | None = None
+        self.reference_tokens: int | None = None
+        # (miner prompt, reference answer, reference embedding), reused when
+        # the budget doesn't allow a new question
+        self.last_question: tuple[str, str, Embedding] | None = None
+        # the steps the last question was asked again at
+        self.question_reuses = 0
+        self.answer_index: AnswerIndex | None = None
+        self.journal: StepJournal | None = None
+        self.history: ScoreHistory | None = None
+        self.liveness: LivenessCache | None = None
+        self.model_assigner: ModelAssigner | None = None
+        self.score_normalizer: ModelScoreNormalizer | None = None
+        # the embedded answers and the responses of the last step, kept for the
+        # answer index and the recordings
+        self.step_answers: dict[int, Embedding] = {}
+        self.step_responses: dict[int, MinerResponse] = {}
 
     def get_modules(self, client: CommuneClient, netuid: int) -> dict[int, str]:
         """Retrieves all module addresses from the subnet.
@@ -202,62 +321,473 @@ class TextValidator(Module):
         # common protocol
         match self.provider:
             case ClaudeProviders.ANTHROPIC:
+                from ..miner.anthropic import AnthropicModule
+
                 claude_settings = AnthropicSettings()  # type: ignore
                 claude_settings.temperature = settings.temperature
                 claude_settings.max_tokens = settings.max_tokens
                 claude_settings.model = self.val_model
                 claude = AnthropicModule(claude_settings)
             case ClaudeProviders.OPENROUTER:
+                from ..miner.openrouter import OpenrouterModule
+
                 claude_settings = OpenrouterSettings()  # type: ignore
                 claude_settings.temperature = settings.temperature
                 claude_settings.max_tokens = settings.max_tokens
                 claude = OpenrouterModule(claude_settings)
         
-        ig = InputGenerator(claude)
+        if self.question_sampler is None:
+            self.question_sampler = CriteriaSampler(settings.question_seed)
+        ig = InputGenerator(claude, self.question_sampler)
 
         retrier = retry(4, [Exception])
         generate_explanations = retrier(ig.gen_explanation)
 
         explanations, prompt, criteria = generate_explanations()
+        spend = self.spend.record(
+            self.provider.value,
+            claude_settings.model,
+            count_tokens(prompt),
+            count_tokens(explanations),
+        )
+        self.question_cost = spend.usd
 
         dataset: tuple[str, str] = (prompt, explanations)
         questions_age = time.time()
         return dataset, criteria, questions_age
 
-    def _get_miner_prediction(
+    async def _get_miner_prediction(
         self,
         question: str,
         service: str,
         model: str,
+        uid: int,
         miner_info: tuple[list[str], Ss58Address],
     ) -> str | str | str | None:
         connection, miner_key = miner_info
         module_ip, module_port = connection
 
         client = ModuleClient(module_ip, int(module_port), self.key)
+        start = time.perf_counter()
         try:
-            miner_answer = asyncio.run(
-                client.call(
-                    "generate", miner_key, 
-                    {
-                        "service": service,
-                        "model": model,
-                        "prompt": question,
-                    }, 
-                    timeout=self.call_timeout
-                    )
-            )
+            miner_answer = await client.call(
+                "generate", miner_key,
+                {
+                    "service": service,
+                    "model": model,
+                    "prompt": question,
+                },
+                timeout=self.call_timeout
+                )
             miner_answer = miner_answer["answer"]
 
         except Exception as e:
-            log(f"Miner {module_ip}:{module_port} failed to generate an answer")
-            print(e)
-            miner_answer = None
+            reason = "timeout" if isinstance(e, (asyncio.TimeoutError, TimeoutError)) else "error"
+            MINER_FAILURES.inc(uid=uid, reason=reason)
+            self.step_responses[uid] = MinerResponse(reason, time.perf_counter() - start)
+            logger.info(
+                "Miner %s:%s failed to generate an answer: %s", module_ip, module_port, e
+            )
+            return None
 
+        elapsed = time.perf_counter() - start
+        MINER_LATENCY.observe(elapsed, uid=uid)
+        MODEL_LATENCY.observe(elapsed, service=service, model=model)
+        if not miner_answer:
+            MINER_FAILURES.inc(uid=uid, reason="empty")
+            self.step_responses[uid] = MinerResponse(ResponseStatus.EMPTY, elapsed)
+        else:
+            self.step_responses[uid] = MinerResponse(
+                ResponseStatus.ANSWERED, elapsed, miner_answer
+            )
         return miner_answer
 
+    async def _filter_gibberish(
+        self,
+        settings: ValidatorSettings,
+        uids: list[int],
+        miner_answers: list[str | None],
+    ) -> list[str | None]:
+        """Drops the answers the gibberish detector doesn't find clean.
+
+        The detector is loaded once and classifies every answer in batches, in a
+        worker thread so the event loop keeps running. If it can't run, the
+        answers are kept as they are and the filter is disabled for the process.
+
+        Returns:
+            The answers, with the gibberish ones replaced by None.
+        """
+        indexes = [i for i, answer in enumerate(miner_answers) if answer]
+        if not settings.gibberish_filter or self.gibberish_classifier_failed or not indexes:
+            return miner_answers
+        if self.gibberish_classifier is None:
+            self.gibberish_classifier = GibberishClassifier(
+                batch_size=settings.gibberish_batch_size,
+                min_clean_ratio=settings.gibberish_min_clean_ratio,
+            )
+        texts = [miner_answers[i] or "" for i in indexes]
+        try:
+            clean = await asyncio.to_thread(self.gibberish_classifier.classify, texts)
+        except Exception as e:
+            logger.warning("Disabling the gibberish filter, the classifier failed: %s", e)
+            self.gibberish_classifier_failed = True
+            return miner_answers
+
+        filtered = list(miner_answers)
+        for i, is_clean in zip(indexes, clean):
+            if not is_clean:
+                MINER_FAILURES.inc(uid=uids[i], reason="gibberish")
+                self._set_failure(uids[i], "gibberish")
+                logger.info("Miner %s answered gibberish", uids[i])
+                filtered[i] = None
+        return filtered
+
+    def _set_failure(self, uid: int, reason: str) -> None:
+        response = self.step_responses.get(uid)
+        if response is not None:
+            response.failure = reason
+
+    def _get_sampler(self, settings: ValidatorSettings) -> MinerSampler:
+        if self.sampler is None:
+            self.sampler = MinerSampler(
+                alpha=settings.sample_score_alpha,
+                staleness_weight=settings.sample_staleness_weight,
+                uncertainty_weight=settings.sample_uncertainty_weight,
+                recovery_bonus=settings.sample_recovery_bonus,
+            )
+        return self.sampler
+
+    def _get_model_assigner(self, settings: ValidatorSettings) -> ModelAssigner:
+        if self.model_assigner is None:
+            self.model_assigner = ModelAssigner(
+                models,
+                AssignmentStrategy(settings.model_assignment),
+                settings.model_weights,
+            )
+        return self.model_assigner
+
+    def _normalize_scores(
+        self,
+        settings: ValidatorSettings,
+        scores: dict[int, float],
+        assignment: dict[int, dict[str, str]],
+    ) -> dict[int, float]:
+        if self.score_normalizer is None:
+            self.score_normalizer = ModelScoreNormalizer(
+                settings.model_score_alpha, settings.model_score_min_samples
+            )
+        self.score_normalizer.update(scores, assignment)
+        return self.score_normalizer.normalize(scores, assignment)
+
+    async def _probe_miners(
+        self,
+        settings: ValidatorSettings,
+        modules_info: dict[int, tuple[list[str], Ss58Address]],
+    ) -> set[int]:
+        """Probes the miners whose liveness isn't cached.
+
+        Returns:
+            The uids of the miners that didn't respond.
+        """
+        if self.liveness is None or self.liveness.ttl != settings.probe_ttl:
+            self.liveness = LivenessCache(settings.probe_ttl)
+        liveness = self.liveness
+        to_probe = {
+            uid: info
+            for uid, info in modules_info.items()
+            if liveness.get(uid, info) is None
+        }
+        if to_probe:
+            probed = await probe_miners(
+                self.key, to_probe, settings.probe_timeout, settings.probe_concurrency
+            )
+            for uid, alive in probed.items():
+                liveness.set(uid, to_probe[uid], alive)
+            logger.info(
+                "Probed %s miners, %s responded", len(probed), sum(probed.values())
+            )
+        offline = {uid for uid, info in modules_info.items() if not liveness.get(uid, info)}
+        for uid in offline:
+            # only responsive miners are trusted for `probe_ttl`, an offline one
+            # is probed again at the next step in case it came back
+            liveness.forget(uid)
+        return offline
+
+    def _get_question(self, settings: ValidatorSettings) -> tuple[str, str, Embedding]:
+        """Takes a question from the shared store, or generates one.
+
+        Returns:
+            The miner prompt, the reference answer and its embedding.
+        """
+        if settings.qa_store_path and self.qa_store is None:
+            self.qa_store = QAStore(settings.qa_store_path)
+        record = self.qa_store.take_unused(settings.qa_store_max_age) if self.qa_store else None
+        if record is not None:
+            logger.info("Reusing question %s from the shared store", record.digest[:12])
+            prompt = record.prompt
+            criteria = record.criteria
+            explanation = record.reference
+        else:
+            with STAGE_SECONDS.time(stage="question_generation"):
+                (prompt, explanation), criteria, _ = self._get_validation_dataset(settings)
+
+        subject, val_answer = self._split_val_subject(explanation)
+        miner_prompt = get_miner_prompt(criteria, subject, len(val_answer.split()))
+        self.reference_tokens = count_tokens(val_answer)
+        if record is not None and record.embedding_model == self._embedding_id():
+            try:
+                return miner_prompt, val_answer, record.vector()
+            except ValueError as e:
+                logger.warning("Re-embedding question %s: %s", record.digest[:12], e)
+
+        with STAGE_SECONDS.time(stage="reference_embedding"):
+            embedded_val_answer = self.embedder.get_embedding(val_answer)
+        self._record_embedding_spend(self.reference_tokens)
+        if self.qa_store is not None and record is None:
+            generated = QARecord(
+                prompt=prompt,
+                criteria=criteria,
+                reference=explanation,
+                embedding=encode_vector(embedded_val_answer, settings.qa_store_precision),
+                embedding_model=self._embedding_id(),
+                source=self.key.ss58_address,
+            )
+            self.qa_store.add(generated)
+            self.qa_store.mark_used(generated)
+        return miner_prompt, val_answer, embedded_val_answer
+
+    def _plan_step(self, settings: ValidatorSettings, miners: int) -> StepPlan:
+        planner = BudgetPlanner(
+            self.spend,
+            settings.budget_usd_per_hour,
+            settings.iteration_interval,
+            max_embedding_requests=settings.budget_max_embedding_requests,
+        )
+        question_cost = self.question_cost
+        if question_cost is None:
+            question_cost = cost(self.val_model, 0, settings.max_tokens)
+        answer_tokens = self.reference_tokens or settings.max_tokens
+        return planner.plan(
+            miners,
+            question_cost,
+            cost(self._embedding_model(), answer_tokens),
+            settings.embedding_batch_size,
+        )
+
+    def _embedding_model(self) -> str:
+        return getattr(self.embedder, "model", "")
+
+    def _embedding_id(self) -> str:
+        """The model, and the dimensions when shortened, stored embeddings must match."""
+        dimensions = getattr(self.embedder, "dimensions", 0)
+        model = self._embedding_model()
+        return f"{model}@{dimensions}" if dimensions else model
+
+    def _record_embedding_spend(self, tokens: int) -> None:
+        self.spend.record(
+            getattr(self.embedder, "provider", "embedder"), self._embedding_model(), tokens
+        )
+
+    def _get_pending_step(self, settings: ValidatorSettings) -> JournaledStep | None:
+        """The step the last run left unfinished, checked once, when journaling."""
+        if not settings.journal_path or self.journal is not None:
+            return None
+        self.journal = StepJournal(settings.journal_path, settings.journal_sync_interval)
+        return self.journal.pending(settings.journal_resume_window)
+
+    def _complete_record(self, record: StepRecord, scores: dict[int, float]) -> StepRecord:
+        """Adds the responses of the last step to `record`."""
+        for uid, miner in record.miners.items():
+            if uid in self.step_responses:
+                miner.response = self.step_responses[uid]
+            miner.embedding = self.step_answers.get(uid)
+            miner.score = scores.get(uid)
+        return record
+
+    def _record_step(self, settings: ValidatorSettings, record: StepRecord) -> None:
+        try:
+            path = write_step(record, settings.record_path)
+        except Exception as e:
+            logger.error("Failed to record the step: %s", e)
+            return
+        logger.info("Recorded the step to %s", path)
+
+    def _append_history(
+        self,
+        settings: ValidatorSettings,
+        record: StepRecord | None,
+        weights: dict[int, int] | None,
+    ) -> None:
+        if record is None or not settings.history_path:
+            return
+        if self.history is None:
+            self.history = ScoreHistory(settings.history_path)
+        try:
+            self.history.append(record, weights)
+        except Exception as e:
+            logger.error("Failed to append the step to the score history: %s", e)
+
+    def _check_replays(self, settings: ValidatorSettings, miner_prompt: str) -> dict[int, int]:
+        """
+        Looks up the answers of the last step in the index of past answers,
+        then adds them to it.
+
+        Returns:
+            The uid of the miner that gave the replayed answer first, by uid
+            of the miners whose answer is a replay.
+        """
+        if self.answer_index is None:
+            self.answer_index = AnswerIndex(
+                settings.answer_index_path, nprobe=settings.answer_index_nprobe
+            )
+        if not self.step_answers:
+            return {}
+        uids = list(self.step_answers)
+        embeddings = np.stack([self.step_answers[uid] for uid in uids])
+        question = question_id(miner_prompt)
+        replays: dict[int, int] = {}
+        try:
+            matches = self.answer_index.search(embeddings, question)
+            for uid, match in zip(uids, matches):
+                if match is None or match.similarity < settings.answer_index_threshold:
+                    continue
+                replays[uid] = match.uid
+                REPLAYED_ANSWERS.inc(uid=uid)
+                logger.warning(
+                    "Miner %s replayed an answer given by miner %s at %s (similarity %.3f)",
+                    uid, match.uid, time.ctime(match.timestamp), match.similarity,
+                )
+            self.answer_index.add(embeddings, uids, question)
+        except ValueError as e:
+            # the embedding model changed, the index has to be moved away
+            logger.error("Can't use the answer index: %s", e)
+        return replays
+
+    def _get_scoring_executor(self, settings: ValidatorSettings) -> ScoringExecutor:
+        if self.scoring_executor is None:
+            self.scoring_executor = ScoringExecutor(
+                settings.scoring_executor, settings.scoring_workers
+            )
+        return self.scoring_executor
+
+    def _embed_answers(
+        self, uids: list[int], answers: list[str]
+    ) -> tuple[list[int], Embedding]:
+        """Embeds the answers, skipping the ones the embedder fails on.
+
+        The answers are embedded in one request, and one by one if it fails,
+        so a single bad answer doesn't discard the others.
+
+        Returns:
+            The indexes of the embedded answers, and their embeddings as rows.
+        """
+        if not answers:
+            return [], np.empty((0, 0), dtype=np.float32)
+        try:
+            batch = self.embedder.get_embeddings(answers)
+            return list(range(len(answers))), batch
+        except Exception as e:
+            logger.debug("Batch embedding failed, embedding one by one: %s", e)
+        embedded: list[int] = []
+        embeddings: list[Embedding] = []
+        for index, (uid, answer) in enumerate(zip(uids, answers)):
+            try:
+                embeddings.append(self.embedder.get_embedding(answer))
+            except Exception as e:
+                MINER_FAILURES.inc(uid=uid, reason="embedding")
+                self._set_failure(uid, "embedding")
+                logger.warning("Failed to embed the answer of miner %s: %s", uid, e)
+                continue
+            embedded.append(index)
+        if not embeddings:
+            return [], np.empty((0, 0), dtype=np.float32)
+        return embedded, np.stack(embeddings)
+
+    async def _score_answers(
+        self,
+        settings: ValidatorSettings,
+        answers: MicroBatcher[tuple[int, str]],
+        embedded_val_answer: Embedding,
+    ) -> dict[int, float]:
+        """Scores the `(uid, answer)` batches as the miners answer.
+
+        Each batch is filtered for gibberish, embedded and scored while the
+        fan-out goes on. Answers identical to an earlier one get its score
+        without being embedded again.
+
+        Returns:
+            The score of each miner whose answer could be scored.
+        """
+        score_dict: dict[int, float] = {}
+        duplicates = DuplicateIndex()
+        seen_uids: list[int] = []
+        seen_answers: list[str] = []
+        reference = np.asarray(embedded_val_answer)
+        scoring_executor = self._get_scoring_executor(settings)
+        async for batch in answers.batches():
+            uids = [uid for uid, _ in batch]
+            with STAGE_SECONDS.time(stage="gibberish_filter"):
+                filtered = await self._filter_gibberish(
+                    settings, uids, [answer for _, answer in batch]
+                )
+
+            new_uids: list[int] = []
+            new_answers: list[str] = []
+            copies: list[tuple[int, int]] = []
+            for uid, answer in zip(uids, filtered):
+                if not answer:
+                    continue
+                original = duplicates.add(uid, answer)
+                if original is None:
+                    new_uids.append(uid)
+                    new_answers.append(answer)
+                else:
+                    logger.info("Miner %s gave the same answer as miner %s", uid, original)
+                    copies.append((uid, original))
+                seen_uids.append(uid)
+                seen_answers.append(answer)
+
+            with STAGE_SECONDS.time(stage="embedding"):
+                # embedding calls are I/O, decoding them is CPU work, neither
+                # should block the loop
+                embedded, embeddings = await asyncio.to_thread(
+                    self._embed_answers, new_uids, new_answers
+                )
+            with STAGE_SECONDS.time(stage="scoring"):
+                if embedded:
+                    scores = await scoring_executor.score_embeddings(embeddings, reference)
+                    for index, score in zip(embedded, scores.tolist()):
+                        # score has to be lower or eq to 1, as one is the best score
+                        assert score <= 1
+                        score_dict[new_uids[index]] = score
+                    if settings.answer_index_path or settings.record_path:
+                        for index, embedding in zip(embedded, embeddings):
+                            self.step_answers[new_uids[index]] = embedding
+                for uid, original in copies:
+                    if original in score_dict:
+                        score_dict[uid] = score_dict[original]
+                    if original in self.step_answers:
+                        self.step_answers[uid] = self.step_answers[original]
+                if self.journal is not None:
+                    self.journal.record_scores(
+                        {uid: score_dict[uid] for uid in uids if uid in score_dict},
+                        {uid: self.step_answers[uid] for uid in uids if uid in self.step_answers},
+                    )
+
+                if logger.isEnabledFor(logging.DEBUG):
+                    since = len(seen_answers) - len(new_answers) - len(copies)
+                    similarities = await scoring_executor.pairwise_similarities(
+                        seen_answers, since
+                    )
+                    for i, j, similarity in similarities:
+                        logger.debug(
+                            "similarity of miners %s and %s: %s",
+                            seen_uids[i], seen_uids[j], similarity,
+                        )
+        return score_dict
+
     def _get_unit_euclid_distance(
-        self, embedded_miner_answer: list[float], embbeded_val_answer: list[float]
+        self, embedded_miner_answer: Embedding, embbeded_val_answer: Embedding
     ):
         distance = euclidean_distance(embedded_miner_answer, embbeded_val_answer)
         miner_norm = np.linalg.norm(embedded_miner_answer)
@@ -266,7 +796,7 @@ class TextValidator(Module):
         return float(normalized_distance)  # i hate python's type system
 
     def _score_miner(
-        self, miner_answer: str | None, embbeded_val_answer: list[float]
+        self, miner_answer: str | None, embbeded_val_answer: Embedding
     ) -> float:
         if not miner_answer:
             return 0
@@ -286,7 +816,7 @@ class TextValidator(Module):
         embbeded_a = self.embedder.get_embedding(text_a)
         score = self._score_miner(text_b, embbeded_a)
         sim = fuzz.ratio(text_a, text_b)  # type: ignore
-        log(f"Score: {score}, similarity: {sim}")
+        logger.info("Score: %s, similarity: %s", score, sim)
 
     async def validate_step(
         self, settings: ValidatorSettings, comchat_netuid: int
@@ -302,8 +832,18 @@ class TextValidator(Module):
             comchat_netuid: The netuid of the ComChat subnet.
         """
 
-        modules_adresses = self.get_modules(self.client, comchat_netuid)
-        modules_keys = self.client.query_map_key(comchat_netuid)
+        try:
+            return await self._validate_step(settings, comchat_netuid)
+        except Exception:
+            STEPS.inc(outcome="error")
+            raise
+
+    async def _validate_step(
+        self, settings: ValidatorSettings, comchat_netuid: int
+    ) -> list[dict[str, str]]:
+        with STAGE_SECONDS.time(stage="chain_query"):
+            modules_adresses = self.get_modules(self.client, comchat_netuid)
+            modules_keys = self.client.query_map_key(comchat_netuid)
         val_ss58 = self.key.ss58_address
         if val_ss58 not in modules_keys.values():
             raise RuntimeError(
@@ -318,53 +858,305 @@ class TextValidator(Module):
                 continue
             modules_info[module_id] = (module_addr, modules_keys[module_id])
 
-        response_cache: list[str] = []
-        score_dict: dict[int, float] = {}
+        # the chain snapshot, for the recordings
+        registered = modules_info
+
+        # == Resuming ==
+
+        resumed = self._get_pending_step(settings)
+        if resumed is not None:
+            logger.info(
+                "Resuming step %s with %s answers and %s scores journaled",
+                resumed.step, len(resumed.answers), len(resumed.scores),
+            )
+            modules_info = {
+                uid: modules_info[uid] for uid in resumed.miners if uid in modules_info
+            }
+
+        # == Budget ==
+
+        sample_size = settings.miner_sample_size
+        generate_question = resumed is None
+        if resumed is None and settings.budget_usd_per_hour > 0:
+            plan = self._plan_step(settings, len(modules_info))
+            # miners may have kept their answer to a question asked before, which
+            # the answer index can't tell from a fresh one
+            generate_question = (
+                plan.generate_question
+                or self.last_question is None
+                or self.question_reuses >= settings.budget_max_question_reuse
+            )
+            if plan.sample_size < 1 or (generate_question and not plan.generate_question):
+                logger.warning(
+                    "Skipping the step, the hourly budget is spent%s",
+                    " and the last question was reused" if self.last_question else "",
+                )
+                STEPS.inc(outcome="over_budget")
+                return []
+            sample_size = min(sample_size or len(modules_info), plan.sample_size)
+            settings = settings.model_copy(
+                update={"embedding_batch_size": plan.embedding_batch_size}
+            )
+            logger.info(
+                "Budget plan: new question %s, %s miners, embedding batches of %s",
+                plan.generate_question, sample_size, plan.embedding_batch_size,
+            )
+
+        # == Sampling ==
+
+        sampler = None
+        if sample_size > 0:
+            sampler = self._get_sampler(settings)
+        if sampler is not None and resumed is None:
+            # a resumed step keeps the miners it was started with
+            sampled = sampler.select(
+                {uid: key for uid, (_, key) in modules_info.items()},
+                sample_size,
+            )
+            modules_info = {uid: modules_info[uid] for uid in sampled}
+        SAMPLED_MINERS.set(len(modules_info))
+
+        journaled_scores: dict[int, float] = {}
+        answered: dict[int, str] = {}
+        assignment: dict[int, dict[str, str]] = {}
+        to_ask = modules_info
+        if resumed is not None:
+            journaled_scores = {
+                uid: score for uid, score in resumed.scores.items() if uid in modules_info
+            }
+            answered = {
+                uid: answer
+                for uid, answer in resumed.answers.items()
+                if uid in modules_info and uid not in journaled_scores
+            }
+            to_ask = {
+                uid: info
+                for uid, info in modules_info.items()
+                if uid not in answered and uid not in journaled_scores
+            }
+            assignment = {
+                uid: model for uid, model in resumed.models.items() if uid in modules_info
+            }
+        offline: set[int] = set()
+        if settings.probe_timeout > 0 and to_ask:
+            with STAGE_SECONDS.time(stage="liveness_probe"):
+                offline = await self._probe_miners(settings, to_ask)
+            to_ask = {uid: info for uid, info in to_ask.items() if uid not in offline}
+        OFFLINE_MINERS.set(len(offline))
+        if not to_ask and not answered and not journaled_scores:
+            # nothing to score, the question isn't worth paying for
+            logger.warning(
+                "Skipping the step, none of the %s miners responded to the probe",
+                len(modules_info),
+            )
+            for uid in offline:
+                MINER_FAILURES.inc(uid=uid, reason="offline")
+            if sampler is not None:
+                sampler.update(list(modules_info), {})
+            STEPS.inc(outcome="no_live_miners")
+            return []
+
         # == Validation loop / Scoring ==
 
-        dataset, criteria, _ = self._get_validation_dataset(settings)
-        _, val_answer = dataset
-        subject, val_answer = self._split_val_subject(val_answer)
-        miner_prompt = get_miner_prompt(criteria, subject, len(val_answer))
-        embedded_val_answer = self.embedder.get_embedding(val_answer)
-
-        model = random.choice(models)
-        get_miner_prediction = partial(self._get_miner_prediction, miner_prompt, model["service"], model["model"])
-        log(f"Selected the following miners: {modules_info.keys()}")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-            it = executor.map(get_miner_prediction, modules_info.values())
-            miner_answers = [*it]
-        for uid, miner_response in zip(modules_info.keys(), miner_answers):
-            miner_answer = miner_response
-            if not miner_answer:
-                log(f"Skipping miner {uid} that didn't answer")
-                continue
-            score = self._score_miner(miner_answer, embedded_val_answer)
-            for answer in response_cache:
-                similarity = fuzz.ratio(answer, miner_answer)  # type: ignore
-                log(f"similarity: {similarity}")
-            response_cache.append(miner_answer)
-
-            # score has to be lower or eq to 1, as one is the best score
-            assert score <= 1
-            score_dict[uid] = score
+        if resumed is not None:
+            # the question was paid for before the restart
+            self.last_question = (
+                resumed.miner_prompt, resumed.val_answer, resumed.embedded_val_answer
+            )
+            self.reference_tokens = count_tokens(resumed.val_answer)
+            self.question_reuses = 0
+            miner_prompt, val_answer, embedded_val_answer = self.last_question
+        elif generate_question:
+            self.last_question = self._get_question(settings)
+            self.question_reuses = 0
+            miner_prompt, val_answer, embedded_val_answer = self.last_question
+        else:
+            assert self.last_question is not None
+            self.question_reuses += 1
+            logger.info("Reusing the last question to stay within the budget")
+            miner_prompt, val_answer, embedded_val_answer = self.last_question
+
+        assignment.update(
+            self._get_model_assigner(settings).assign(
+                uid for uid in to_ask if uid not in assignment
+            )
+        )
+        if self.journal is not None:
+            if resumed is not None:
+                self.journal.resume(resumed)
+            else:
+                self.journal.start(
+                    miner_prompt,
+                    val_answer,
+                    embedded_val_answer,
+                    list(modules_info),
+                    assignment,
+                )
+        logger.info("Selected the following miners: %s", list(to_ask.keys()))
+        score_dict = await self._query_miners(
+            settings, to_ask, miner_prompt, assignment, embedded_val_answer, answered
+        )
+        score_dict = {**journaled_scores, **score_dict}
+        if resumed is not None:
+            # the miners scored before the restart, for the recordings and the
+            # answer index
+            for uid in journaled_scores:
+                self.step_responses[uid] = MinerResponse(
+                    ResponseStatus.ANSWERED, answer=resumed.answers.get(uid)
+                )
+                if uid in resumed.embeddings:
+                    self.step_answers[uid] = resumed.embeddings[uid]
+        for uid in offline:
+            MINER_FAILURES.inc(uid=uid, reason="offline")
+            self.step_responses[uid] = MinerResponse(ResponseStatus.OFFLINE)
+        if self.liveness is not None:
+            # a miner that stopped answering is probed again at the next step
+            for uid, response in self.step_responses.items():
+                if response.status in (ResponseStatus.TIMEOUT, ResponseStatus.ERROR):
+                    self.liveness.forget(uid)
+        if settings.answer_index_path:
+            with STAGE_SECONDS.time(stage="replay_check"):
+                self._check_replays(settings, miner_prompt)
+        record = None
+        if settings.record_path or settings.history_path:
+            record = self._complete_record(
+                StepRecord(
+                    netuid=comchat_netuid,
+                    validator_key=val_ss58,
+                    miner_prompt=miner_prompt,
+                    val_answer=val_answer,
+                    embedded_val_answer=embedded_val_answer,
+                    miners={
+                        uid: RecordedMiner(
+                            uid,
+                            key,
+                            ":".join(address),
+                            assignment.get(uid, {}).get("service", ""),
+                            assignment.get(uid, {}).get("model", ""),
+                        )
+                        for uid, (address, key) in registered.items()
+                    },
+                ),
+                score_dict,
+            )
+            if settings.record_path:
+                self._record_step(settings, record)
+        # the miners are asked for answers as long as the reference one, the
+        # embedded answers are estimated at its length
+        self._record_embedding_spend(len(score_dict) * (self.reference_tokens or 0))
+        for provider, usd in self.spend.burn_rate().items():
+            SPEND_LAST_HOUR.set(usd, provider=provider)
+        logger.info("Spent %.4f USD over the last hour", self.spend.spent())
+        if settings.model_score_normalization:
+            # recorded as measured, weighted once comparable across models
+            score_dict = self._normalize_scores(settings, score_dict, assignment)
+        if sampler is not None:
+            sampler.update(list(modules_info), score_dict)
         if not score_dict:
-            log("No miner managed to give a valid answer")
+            logger.warning("No miner managed to give a valid answer")
+            STEPS.inc(outcome="no_answers")
+            self._append_history(settings, record, None)
+            if self.journal is not None:
+                self.journal.finish("no_answers")
             return []
-        _ = set_weights(score_dict, self.netuid, self.client, self.key)
+        if sampler is not None:
+            # the miners not asked in this step keep their recent scores
+            score_dict = sampler.scores()
+        with STAGE_SECONDS.time(stage="voting"):
+            weights = set_weights(score_dict, self.netuid, self.client, self.key, settings)
+        STEPS.inc(outcome="weights_set")
+        self._append_history(settings, record, weights)
+        if self.journal is not None:
+            self.journal.finish("weights_set")
+
+    async def _query_miners(
+        self,
+        settings: ValidatorSettings,
+        modules_info: dict[int, tuple[list[str], Ss58Address]],
+        miner_prompt: str,
+        assignment: dict[int, dict[str, str]],
+        embedded_val_answer: Embedding,
+        answered: dict[int, str] | None = None,
+    ) -> dict[int, float]:
+        """Asks the miners to answer the prompt and scores their answers.
+
+        Args:
+            settings: The validator settings to use for this validation step.
+            modules_info: The connection and key of each miner to ask, by uid.
+            miner_prompt: The prompt the miners answer.
+            assignment: The service and model each miner should use, by uid.
+            embedded_val_answer: The embedding of the reference answer.
+            answered: Answers already given, by uid, scored along the others.
+
+        Returns:
+            The score of each miner whose answer could be scored.
+        """
+        answers: MicroBatcher[tuple[int, str]] = MicroBatcher(
+            settings.embedding_batch_size, settings.embedding_batch_wait
+        )
+        self.step_answers = {}
+        self.step_responses = {}
+        slots = asyncio.Semaphore(settings.miner_concurrency)
+        # without a limit per service, `slots` is the only one
+        service_slots: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(settings.service_concurrency or settings.miner_concurrency)
+        )
+
+        async def ask_miner(uid: int, miner_info: tuple[list[str], Ss58Address]) -> None:
+            model = assignment[uid]
+            async with service_slots[model["service"]], slots:
+                SERVICE_IN_FLIGHT.inc(service=model["service"])
+                try:
+                    miner_answer = await self._get_miner_prediction(
+                        miner_prompt, model["service"], model["model"], uid, miner_info
+                    )
+                finally:
+                    SERVICE_IN_FLIGHT.inc(-1, service=model["service"])
+            if not miner_answer:
+                logger.debug("Skipping miner %s that didn't answer", uid)
+                return
+            if self.journal is not None:
+                self.journal.record_answer(uid, miner_answer)
+            answers.put((uid, miner_answer))
+
+        for uid, miner_answer in (answered or {}).items():
+            # answered before a restart, how long it took isn't journaled
+            self.step_responses[uid] = MinerResponse(
+                ResponseStatus.ANSWERED, answer=miner_answer
+            )
+            answers.put((uid, miner_answer))
+
+        # answers are scored as they arrive, so once the last miner answered
+        # only its batch is left to score
+        scoring = asyncio.create_task(
+            self._score_answers(settings, answers, embedded_val_answer)
+        )
+        with STAGE_SECONDS.time(stage="miner_fanout"):
+            try:
+                await asyncio.gather(
+                    *(ask_miner(uid, info) for uid, info in modules_info.items())
+                )
+            finally:
+                answers.close()
+        with STAGE_SECONDS.time(stage="scoring_tail"):
+            return await scoring
 
     def validation_loop(self, settings: ValidatorSettings | None = None) -> None:
         if not settings:
             settings = ValidatorSettings()  # type: ignore
 
+        if settings.metrics_port:
+            start_metrics_server(settings.metrics_port, settings.metrics_host)
+
         # Run validation
         while True:
             start_time = time.time()
-            asyncio.run(self.validate_step(settings, self.netuid))
+            with STAGE_SECONDS.time(stage="step"):
+                asyncio.run(self.validate_step(settings, self.netuid))
 
             elapsed = time.time() - start_time
             if elapsed < settings.iteration_interval:
                 sleep_time = settings.iteration_interval - elapsed
-                log(f"Sleeping for {sleep_time}")
+                logger.info("Sleeping for %s", sleep_time)
                 time.sleep(sleep_time)
 
@@ -0,0 +1,132 @@
+"""
+Local token counting, and splitting of long texts into chunks that fit a
+model's context.
+"""
+
+import math
+import re
+from functools import cache
+from typing import Any, Callable
+
+from ..logs import get_logger
+
+logger = get_logger(__name__)
+
+# characters per token of english text, when tiktoken isn't installed
+_CHARS_PER_TOKEN = 4
+
+# a sentence ends with punctuation followed by spaces, or at a line break
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+@cache
+def _get_encoder() -> Callable[[str], list[int]] | None:
+    try:
+        import tiktoken  # type: ignore
+    except ImportError:
+        logger.info("tiktoken is not installed, estimating token counts from lengths")
+        return None
+    encoding: Any = tiktoken.get_encoding("cl100k_base")
+    return encoding.encode  # type: ignore
+
+
+def count_tokens(text: str, upper_bound: bool = False) -> int:
+    """
+    Counts the tokens of `text` with the cl100k tokenizer if tiktoken is
+    installed, and estimates them from its length otherwise. Claude models use
+    a different tokenizer, so the count is an estimate for them either way.
+
+    Args:
+        text: The text to count the tokens of.
+        upper_bound: Without tiktoken, count that can't be exceeded, e.g. to
+            stay within a context, rather than an estimate for english prose.
+    """
+    encode = _get_encoder()
+    if encode is None:
+        if upper_bound:
+            # the tokenizers merge utf-8 bytes, a token is at least one of them,
+            # while a CJK character or an emoji can take several tokens
+            return len(text.encode())
+        return math.ceil(len(text) / _CHARS_PER_TOKEN)
+    return len(encode(text))
+
+
+def split_sentences(text: str) -> list[str]:
+    return [sentence for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+
+def _split_bytes(word: str, max_bytes: int) -> list[str]:
+    """
+    Splits a word between characters into pieces of at most `max_bytes` utf-8
+    bytes, which are at most as many tokens.
+    """
+    pieces: list[str] = []
+    chars: list[str] = []
+    size = 0
+    for char in word:
+        char_size = len(char.encode())
+        if chars and size + char_size > max_bytes:
+            pieces.append("".join(chars))
+            chars, size = [], 0
+        chars.append(char)
+        size += char_size
+    if chars:
+        pieces.append("".join(chars))
+    return pieces
+
+
+def _split_words(sentence: str, max_tokens: int) -> list[tuple[str, int]]:
+    """
+    Splits a sentence longer than `max_tokens` between words, and the words
+    longer than that, e.g. runs of CJK text, between characters.
+    """
+    pieces: list[tuple[str, int]] = []
+    words: list[str] = []
+    tokens = 0
+    for word in sentence.split():
+        if count_tokens(" " + word, upper_bound=True) > max_tokens:
+            # one byte is left for the space the pieces are joined with
+            parts = _split_bytes(word, max_tokens - 1)
+        else:
+            parts = [word]
+        for part in parts:
+            part_tokens = count_tokens(" " + part, upper_bound=True)
+            if words and tokens + part_tokens > max_tokens:
+                pieces.append((" ".join(words), tokens))
+                words, tokens = [], 0
+            words.append(part)
+            tokens += part_tokens
+    if words:
+        pieces.append((" ".join(words), tokens))
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int) -> list[tuple[str, int]]:
+    """
+    Packs the sentences of `text` into chunks of at most `max_tokens` tokens,
+    splitting the sentences too long for a chunk between words. Token counts
+    are summed per sentence, counting the space the sentences are joined with,
+    and bounded from above without tiktoken.
+
+    Returns:
+        Each chunk with its token count.
+    """
+    chunks: list[tuple[str, int]] = []
+    sentences: list[str] = []
+    tokens = 0
+    for sentence in split_sentences(text):
+        sentence_tokens = count_tokens(" " + sentence, upper_bound=True)
+        pieces = (
+            _split_words(sentence, max_tokens)
+            if sentence_tokens > max_tokens
+            else [(sentence, sentence_tokens)]
+        )
+        for piece, piece_tokens in pieces:
+            if sentences and tokens + piece_tokens > max_tokens:
+                chunks.append((" ".join(sentences), tokens))
+                sentences, tokens = [], 0
+            sentences.append(piece)
+            tokens += piece_tokens
+    if sentences:
+        chunks.append((" ".join(sentences), tokens))
+    return chunks
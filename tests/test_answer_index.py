@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from comchat.validator.answer_index import AnswerIndex, question_id
+
+DIMENSIONS = 512
+
+
+def _embeddings(count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, DIMENSIONS), dtype=np.float32)
+
+
+def test_finds_replayed_answers(tmp_path: Path):
+    index = AnswerIndex(tmp_path, dimensions=128)
+    stored = _embeddings(50)
+    index.add(stored[:25], list(range(25)), question_id("first"), timestamp=1.0)
+    index.add(stored[25:], list(range(25, 50)), question_id("second"), timestamp=2.0)
+
+    # a slightly reworded answer stays close to the original once projected
+    replayed = stored[30] + 0.05 * _embeddings(1, seed=1)[0]
+    [match] = index.search(replayed, question_id("third"))
+    assert match is not None
+    assert match.uid == 30
+    assert match.question == question_id("second")
+    assert match.timestamp == 2.0
+    assert match.similarity > 0.95
+
+    [unrelated] = index.search(_embeddings(1, seed=2), question_id("third"))
+    assert unrelated is not None and unrelated.similarity < 0.5
+
+
+def test_skips_answers_to_the_same_question(tmp_path: Path):
+    index = AnswerIndex(tmp_path, dimensions=128)
+    stored = _embeddings(2)
+    index.add(stored, [1, 2], question_id("question"))
+    assert index.search(stored[:1], question_id("question")) == [None]
+    [match] = index.search(stored[:1])
+    assert match is not None and match.uid == 1
+
+
+def test_empty_index_and_dimensions(tmp_path: Path):
+    index = AnswerIndex(tmp_path, dimensions=128)
+    assert index.search(_embeddings(3)) == [None] * 3
+    index.add(_embeddings(1), [1], 0)
+    with pytest.raises(ValueError):
+        index.search(np.zeros((1, 16), dtype=np.float32))
+
+
+def test_reload_and_truncated_rows(tmp_path: Path):
+    index = AnswerIndex(tmp_path, dimensions=128)
+    stored = _embeddings(10)
+    index.add(stored, list(range(10)), question_id("question"))
+
+    # an interrupted append leaves half a vector behind
+    with open(tmp_path / "vectors.bin", "ab") as file:
+        file.write(b"\0" * 64)
+    reloaded = AnswerIndex(tmp_path)
+    assert len(reloaded) == 10
+    assert reloaded.dimensions == 128
+    [match] = reloaded.search(stored[7])
+    assert match is not None and match.uid == 7
+    assert (tmp_path / "vectors.bin").stat().st_size == 10 * 128 * 2
+
+
+def test_trained_index_probes_clusters(tmp_path: Path):
+    index = AnswerIndex(tmp_path, dimensions=64, clusters=8, nprobe=2, train_size=200)
+    stored = _embeddings(400)
+    index.add(stored[:200], list(range(200)), 0)
+    assert index.centroids is not None
+    # rows added after training are assigned to the existing clusters
+    index.add(stored[200:], list(range(200, 400)), 0)
+    assert (index.metadata["cluster"][: len(index)] >= 0).all()
+
+    matches = index.search(stored[::40], question_id("other"))
+    assert [match.uid for match in matches if match is not None] == list(range(0, 400, 40))
+
+    reloaded = AnswerIndex(tmp_path)
+    assert reloaded.centroids is not None
+    [match] = reloaded.search(stored[123])
+    assert match is not None and match.uid == 123
@@ -0,0 +1,108 @@
+import pytest
+
+from comchat.validator.assignment import (
+    AssignmentStrategy,
+    ModelAssigner,
+    ModelScoreNormalizer,
+    _apportion,
+    model_key,
+)
+
+MODELS = [
+    {"service": "openai", "model": "gpt-4o"},
+    {"service": "groq", "model": "llama3-70b"},
+    {"service": "mistral", "model": "mistral-large"},
+]
+
+
+@pytest.mark.parametrize(
+    "weights, total, expected",
+    [
+        ([1, 1, 1], 10, [4, 3, 3]),
+        ([1, 1, 1], 2, [1, 1, 0]),
+        ([3, 1], 8, [6, 2]),
+        ([0.5, 0.3, 0.2], 7, [4, 2, 1]),
+        ([1, 2], 0, [0, 0]),
+    ],
+)
+def test_apportion(weights: list[float], total: int, expected: list[int]):
+    counts = _apportion(weights, total)
+    assert counts == expected
+    assert sum(counts) == total
+
+
+def test_round_robin_shares_evenly():
+    assigner = ModelAssigner(MODELS, AssignmentStrategy.ROUND_ROBIN, seed=0)
+    assignment = assigner.assign(range(10))
+    counts = [
+        sum(model_key(model) == model_key(m) for m in assignment.values()) for model in MODELS
+    ]
+    assert sorted(counts) == [3, 3, 4]
+    # the model with the extra miner changes from step to step
+    next_counts = [
+        sum(model_key(model) == model_key(m) for m in assigner.assign(range(10)).values())
+        for model in MODELS
+    ]
+    assert next_counts != counts
+
+
+def test_weighted_follows_the_weights():
+    assigner = ModelAssigner(
+        MODELS, AssignmentStrategy.WEIGHTED, weights={"openai": 3, "groq": 1, "mistral": 0}
+    )
+    models = [model["service"] for model in assigner.assign(range(8)).values()]
+    assert models.count("openai") == 6
+    assert models.count("groq") == 2
+    assert "mistral" not in models
+
+
+def test_single_gives_everyone_the_same_model():
+    assigner = ModelAssigner(MODELS, AssignmentStrategy.SINGLE, seed=1)
+    assert len({model_key(model) for model in assigner.assign(range(20)).values()}) == 1
+
+
+def test_all_weights_zero_is_an_error():
+    with pytest.raises(ValueError):
+        ModelAssigner(MODELS, weights={"openai": 0, "groq": 0, "mistral": 0})
+
+
+def _two_model_step(low: list[float], high: list[float]):
+    scores = {uid: score for uid, score in enumerate(low + high)}
+    assignment = {uid: MODELS[0] if uid < len(low) else MODELS[1] for uid in scores}
+    return scores, assignment
+
+
+def test_normalizer_waits_for_min_samples():
+    normalizer = ModelScoreNormalizer(min_samples=10)
+    scores, assignment = _two_model_step([0.2, 0.3, 0.4], [0.7, 0.8, 0.9])
+    normalizer.update(scores, assignment)
+    assert normalizer.normalize(scores, assignment) == scores
+
+
+def test_normalizer_equalizes_model_means():
+    normalizer = ModelScoreNormalizer(alpha=0.5, min_samples=3)
+    scores, assignment = _two_model_step([0.2, 0.3, 0.4], [0.7, 0.8, 0.9])
+    normalizer.update(scores, assignment)
+    normalized = normalizer.normalize(scores, assignment)
+    assert normalized[1] == pytest.approx(normalized[4])
+    assert normalized[0] == pytest.approx(normalized[3])
+    # the order within a model is kept
+    assert normalized[0] < normalized[1] < normalized[2]
+
+
+def test_normalizer_clamps_to_unit_interval():
+    normalizer = ModelScoreNormalizer(alpha=0.5, min_samples=3)
+    scores, assignment = _two_model_step([0.1, 0.11, 0.12], [0.5, 0.9, 0.95])
+    normalizer.update(scores, assignment)
+    # far outside the first model's spread
+    outliers = {0: 0.9, 3: 0.0}
+    normalized = normalizer.normalize(outliers, assignment)
+    assert normalized[0] == 1.0
+    assert normalized[3] == 0.0
+
+
+def test_normalizer_keeps_unassigned_scores():
+    normalizer = ModelScoreNormalizer(alpha=0.5, min_samples=3)
+    scores, assignment = _two_model_step([0.2, 0.3, 0.4], [0.7, 0.8, 0.9])
+    normalizer.update(scores, assignment)
+    assert normalizer.normalize({99: 0.42}, assignment) == {99: 0.42}
@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+from comchat.validator.budget import BudgetPlanner, SpendTracker, cost
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cost():
+    assert cost("claude-3-opus-20240229", 1_000_000, 1_000_000) == pytest.approx(90.0)
+    assert cost("text-embedding-3-small", 500_000) == pytest.approx(0.01)
+    assert cost("unknown-model", 1_000_000, 1_000_000) == 0.0
+
+
+def test_spend_leaves_the_window_after_an_hour():
+    clock = FakeClock()
+    tracker = SpendTracker(clock=clock)
+    tracker.record("anthropic", "claude-3-haiku-20240307", 1_000_000)
+    clock.now += 1800
+    tracker.record("openai", "text-embedding-3-small", 1_000_000)
+    assert tracker.spent() == pytest.approx(0.27)
+    assert tracker.burn_rate() == pytest.approx({"anthropic": 0.25, "openai": 0.02})
+    clock.now += 1801
+    assert tracker.spent() == pytest.approx(0.02)
+    assert tracker.spent("anthropic") == 0.0
+
+
+def test_no_budget_asks_everyone():
+    planner = BudgetPlanner(SpendTracker(), 0, 800)
+    assert planner.allowance() == math.inf
+    plan = planner.plan(100, question_cost=1.0, answer_cost=0.1, max_batch_size=16)
+    assert plan.generate_question
+    assert plan.sample_size == 100
+    # 100 answers in at most 8 requests
+    assert plan.embedding_batch_size == 13
+
+
+def test_step_share_sets_the_sample_size():
+    # 2 USD per hour with a step every 30 minutes is 1 per step
+    planner = BudgetPlanner(SpendTracker(), 2.0, 1800)
+    assert planner.allowance() == 1.0
+    plan = planner.plan(100, question_cost=0.5, answer_cost=0.0625, max_batch_size=16)
+    assert plan.generate_question
+    assert plan.sample_size == 8
+    assert plan.embedding_batch_size == 1
+
+
+def test_question_skipped_when_it_leaves_no_room_for_answers():
+    planner = BudgetPlanner(SpendTracker(), 2.0, 1800, min_sample_size=5)
+    plan = planner.plan(100, question_cost=0.75, answer_cost=0.0625, max_batch_size=16)
+    assert not plan.generate_question
+    # the whole share goes to the answers to the last question
+    assert plan.sample_size == 16
+
+
+def test_allowance_never_exceeds_what_is_left():
+    clock = FakeClock()
+    tracker = SpendTracker(clock=clock)
+    tracker.record("anthropic", "claude-3-haiku-20240307", 3_400_000)
+    planner = BudgetPlanner(tracker, 0.9, 1200)
+    assert planner.allowance() == pytest.approx(0.05)
+    tracker.record("anthropic", "claude-3-haiku-20240307", 1_000_000)
+    assert planner.allowance() == 0.0
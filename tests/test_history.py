@@ -0,0 +1,72 @@
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from comchat.validator.history import ScoreHistory, scan, step_scores, timeout_rates
+from comchat.validator.recording import MinerResponse, RecordedMiner, ResponseStatus, StepRecord
+
+pytest.importorskip("polars")
+
+DAY = 86400
+
+
+def _step(started_at: float, scores: dict[int, float | None]) -> StepRecord:
+    miners: dict[int, RecordedMiner] = {}
+    for uid, score in scores.items():
+        response = (
+            MinerResponse(ResponseStatus.ANSWERED, 1.0, "answer")
+            if score is not None
+            else MinerResponse(ResponseStatus.TIMEOUT, 10.0)
+        )
+        miners[uid] = RecordedMiner(
+            uid, f"key-{uid}", "127.0.0.1:8000", "openai", "gpt-4o", response, score=score
+        )
+    return StepRecord(0, "validator", "prompt", "answer", np.zeros(2, np.float32), miners, started_at=started_at)
+
+
+def _partitions(path: Path) -> dict[str, int]:
+    return {
+        partition.name: len(list(partition.glob("*.parquet")))
+        for partition in sorted(path.glob("date=*"))
+    }
+
+
+def test_older_days_are_compacted(tmp_path: Path):
+    history = ScoreHistory(tmp_path)
+    # midday, so the steps of a day stay on it whatever the timezone
+    today = datetime.now(timezone.utc).replace(hour=12).timestamp()
+    steps = [
+        _step(today - 2 * DAY, {1: 0.5, 2: 0.25}),
+        _step(today - 2 * DAY + 60, {1: 0.75, 2: None}),
+        _step(today - DAY, {1: 0.5}),
+        _step(today - DAY + 60, {1: 0.25}),
+    ]
+    for step in steps[:3]:
+        history.append(step, {1: 10})
+    # the first append of a day compacts the days before it
+    counts = _partitions(tmp_path)
+    assert list(counts.values()) == [1, 1]
+
+    history.append(steps[3], None)
+    assert list(_partitions(tmp_path).values()) == [1, 2]
+
+    frame = scan(tmp_path).collect()
+    assert frame.height == 6
+    assert sorted(frame["step"].unique().to_list()) == sorted(step.step for step in steps)
+
+    assert step_scores(scan(tmp_path)) == [{1: 0.5, 2: 0.25}, {1: 0.75}, {1: 0.5}, {1: 0.25}]
+    assert len(step_scores(scan(tmp_path, days=1))) <= 2
+
+    rates = timeout_rates(scan(tmp_path)).collect()
+    assert rates.row(0, named=True)["uid"] == 2
+    assert rates.row(0, named=True)["timeout_rate"] == pytest.approx(0.5)
+
+
+def test_scan_filters_by_uid(tmp_path: Path):
+    history = ScoreHistory(tmp_path)
+    history.append(_step(time.time(), {1: 0.5, 2: 0.25}), None)
+    frame = scan(tmp_path, uid=2).collect()
+    assert frame["uid"].to_list() == [2]
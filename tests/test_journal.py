@@ -0,0 +1,114 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from comchat.validator.journal import StepJournal
+from comchat.validator.quantization import Precision, encode_vector
+
+MODELS = {
+    1: {"service": "openai", "model": "gpt-4o"},
+    2: {"service": "groq", "model": "llama3-70b"},
+    3: {"service": "openai", "model": "gpt-4o"},
+}
+
+
+def _start(path: Path) -> StepJournal:
+    journal = StepJournal(path, sync_interval=0)
+    journal.start("prompt", "answer", np.array([0.1, 0.2, 0.3], np.float32), [1, 2, 3], MODELS)
+    return journal
+
+
+def test_pending_step(tmp_path: Path):
+    path = tmp_path / "journal.jsonl"
+    journal = _start(path)
+    journal.record_answer(1, "one")
+    journal.record_answer(2, "two")
+    embedding = np.array([0.5, 0.25], np.float32)
+    journal.record_scores({1: 0.75}, {1: embedding})
+    journal.close()
+
+    pending = StepJournal(path).pending(60)
+    assert pending is not None
+    assert pending.miner_prompt == "prompt"
+    assert pending.val_answer == "answer"
+    assert pending.miners == [1, 2, 3]
+    assert pending.models == MODELS
+    assert pending.answers == {1: "one", 2: "two"}
+    assert pending.scores == {1: 0.75}
+    np.testing.assert_allclose(pending.embeddings[1], embedding)
+    np.testing.assert_allclose(pending.embedded_val_answer, [0.1, 0.2, 0.3])
+
+
+def test_finished_step_isnt_pending(tmp_path: Path):
+    path = tmp_path / "journal.jsonl"
+    journal = _start(path)
+    journal.finish("weights_set")
+    assert StepJournal(path).pending(60) is None
+
+
+def test_old_step_isnt_pending(tmp_path: Path):
+    path = tmp_path / "journal.jsonl"
+    _start(path).close()
+    assert StepJournal(path).pending(60) is not None
+    assert StepJournal(path).pending(-1) is None
+
+
+def test_resume_after_a_truncated_line(tmp_path: Path):
+    path = tmp_path / "journal.jsonl"
+    journal = _start(path)
+    journal.record_answer(1, "one")
+    journal.close()
+    # the process died halfway through writing an entry
+    with path.open("a", encoding="utf-8") as file:
+        file.write('{"step": "x", "stage": "answer", "uid": 2, "ans')
+
+    reader = StepJournal(path)
+    pending = reader.pending(60)
+    assert pending is not None
+    assert pending.answers == {1: "one"}
+
+    reader.resume(pending)
+    reader.record_answer(3, "three")
+    reader.close()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    # every line is whole again, the cut one was dropped
+    assert all(json.loads(line) for line in lines)
+    resumed = StepJournal(path).pending(60)
+    assert resumed is not None
+    assert resumed.answers == {1: "one", 3: "three"}
+
+
+def test_entries_of_another_step_are_ignored(tmp_path: Path):
+    path = tmp_path / "journal.jsonl"
+    journal = _start(path)
+    journal.record_answer(1, "one")
+    journal.close()
+    with path.open("a", encoding="utf-8") as file:
+        entry = {"step": "other", "stage": "answer", "uid": 2, "answer": "x"}
+        file.write(json.dumps(entry) + "\n")
+    pending = StepJournal(path).pending(60)
+    assert pending is not None
+    assert pending.answers == {1: "one"}
+
+
+def test_reads_version_1(tmp_path: Path):
+    path = tmp_path / "journal.jsonl"
+    model = {"service": "openai", "model": "gpt-4o"}
+    entry = {
+        "step": "s",
+        "stage": "question",
+        "version": 1,
+        "time": time.time(),
+        "miner_prompt": "prompt",
+        "val_answer": "answer",
+        "embedding": encode_vector(np.array([0.1, 0.2], np.float32), Precision.FLOAT32),
+        "miners": [1, 2],
+        # a single model for every miner
+        "model": model,
+    }
+    path.write_text(json.dumps(entry) + "\n", encoding="utf-8")
+    pending = StepJournal(path).pending(60)
+    assert pending is not None
+    assert pending.models == {1: model, 2: model}
@@ -0,0 +1,67 @@
+import asyncio
+
+from substrateinterface import Keypair  # type: ignore
+
+from comchat.benchmark.fleet import FakeMinerFleet, FleetConfig
+from comchat.validator.liveness import LivenessCache, probe_miners
+
+MINER = (["127.0.0.1", "8000"], "miner-key")
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_expires_after_ttl():
+    clock = FakeClock()
+    cache = LivenessCache(60, clock=clock)
+    assert cache.get(1, MINER) is None
+    cache.set(1, MINER, True)
+    clock.now = 60
+    assert cache.get(1, MINER) is True
+    clock.now = 60.1
+    assert cache.get(1, MINER) is None
+
+
+def test_cache_keeps_offline_outcomes():
+    cache = LivenessCache(60, clock=FakeClock())
+    cache.set(1, MINER, False)
+    assert cache.get(1, MINER) is False
+
+
+def test_cache_misses_when_the_miner_moved_or_changed_key():
+    cache = LivenessCache(60, clock=FakeClock())
+    cache.set(1, MINER, True)
+    assert cache.get(1, (["127.0.0.1", "8001"], "miner-key")) is None
+    assert cache.get(1, (["127.0.0.1", "8000"], "other-key")) is None
+    assert cache.get(1, MINER) is True
+
+
+def test_forget():
+    cache = LivenessCache(60, clock=FakeClock())
+    cache.set(1, MINER, True)
+    cache.forget(1)
+    cache.forget(2)
+    assert cache.get(1, MINER) is None
+
+
+def test_probe_tells_offline_miners_apart():
+    with FakeMinerFleet(FleetConfig(miners=8, offline_rate=0.5)) as fleet:
+        miners = {
+            uid: (address.split(":"), f"miner-{uid}")
+            for uid, address in enumerate(fleet.addresses)
+        }
+        alive = asyncio.run(
+            probe_miners(Keypair.create_from_uri("//Alice"), miners, 0.5, concurrency=4)
+        )
+        offline = {
+            uid
+            for uid, (address, _) in miners.items()
+            if int(address[1]) in fleet.offline_ports
+        }
+    assert len(offline) == 4
+    assert {uid for uid, is_alive in alive.items() if not is_alive} == offline
@@ -0,0 +1,60 @@
+from comchat.validator.sampler import MinerSampler
+
+
+def _miners(count: int) -> dict[int, str]:
+    return {uid: f"key-{uid}" for uid in range(count)}
+
+
+def test_every_miner_is_sampled_over_a_cycle():
+    sampler = MinerSampler(seed=0)
+    miners = _miners(20)
+    seen: set[int] = set()
+    for _ in range(4):
+        picked = sampler.select(miners, 5)
+        assert len(picked) == len(set(picked)) == 5
+        seen.update(picked)
+        sampler.update(picked, {uid: 0.5 for uid in picked})
+    assert seen == set(miners)
+
+
+def test_new_registrations_come_first():
+    sampler = MinerSampler(seed=0)
+    miners = _miners(10)
+    for _ in range(2):
+        picked = sampler.select(miners, 5)
+        sampler.update(picked, {uid: 0.5 for uid in picked})
+    # uid 3 changes hands, uid 10 registers
+    miners[3] = "new-key"
+    miners[10] = "key-10"
+    assert set(sampler.select(miners, 2)) == {3, 10}
+
+
+def test_asking_everyone_keeps_every_miner():
+    sampler = MinerSampler()
+    assert sampler.select(_miners(5), 0) == list(range(5))
+    assert sampler.select(_miners(5), 10) == list(range(5))
+
+
+def test_missing_score_counts_as_zero_and_recovery_gets_a_bonus():
+    sampler = MinerSampler(alpha=0.5, recovery_bonus=100, seed=0)
+    miners = _miners(4)
+    sampler.select(miners, 4)
+    sampler.update(list(miners), {0: 1.0, 1: 1.0, 2: 1.0, 3: 1.0})
+    sampler.update(list(miners), {0: 1.0, 1: 1.0, 2: 1.0})
+    assert sampler.records[3].failing
+    assert sampler.records[3].mean == 0.5
+    assert 3 not in sampler.scores()
+
+    sampler.update([3], {3: 1.0})
+    assert not sampler.records[3].failing
+    assert sampler.select(miners, 1) == [3]
+    assert sampler.scores()[3] == 0.75
+
+
+def test_deregistered_miners_are_dropped():
+    sampler = MinerSampler()
+    miners = _miners(4)
+    sampler.select(miners, 2)
+    del miners[0]
+    sampler.select(miners, 2)
+    assert 0 not in sampler.records
@@ -0,0 +1,37 @@
+import time
+from pathlib import Path
+
+from comchat.benchmark.fleet import FleetConfig, LatencyDistribution
+from comchat.benchmark.harness import BenchmarkConfig, run_benchmark
+
+
+def _spawned_processes() -> set[int]:
+    """The pids of the processes started by multiprocessing, ours or not."""
+    pids: set[int] = set()
+    for proc in Path("/proc").iterdir():
+        if not proc.name.isdigit():
+            continue
+        try:
+            cmdline = (proc / "cmdline").read_bytes()
+        except OSError:
+            continue
+        if b"spawn_main" in cmdline:
+            pids.add(int(proc.name))
+    return pids
+
+
+def test_shutdown_leaves_no_processes_behind():
+    before = _spawned_processes()
+    config = BenchmarkConfig(
+        fleet=FleetConfig(miners=12, latency=LatencyDistribution(median=0.01)),
+        shards=2,
+        scoring_executor="process",
+    )
+    # run_benchmark shuts the validator down once done
+    report = run_benchmark(config)
+    assert report.votes == 1
+
+    deadline = time.monotonic() + 5
+    while (left := _spawned_processes() - before) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert not left, f"processes left behind: {sorted(left)}"
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from comchat.validator.streaming import DuplicateIndex, MicroBatcher
+
+
+async def _collect(batcher: MicroBatcher[int]) -> list[tuple[float, list[int]]]:
+    started = time.monotonic()
+    return [(time.monotonic() - started, batch) async for batch in batcher.batches()]
+
+
+def test_full_batches_are_released_at_once():
+    async def run():
+        batcher: MicroBatcher[int] = MicroBatcher(3, max_wait=10)
+        for item in range(7):
+            batcher.put(item)
+        batcher.close()
+        return await _collect(batcher)
+
+    batches = asyncio.run(run())
+    assert [batch for _, batch in batches] == [[0, 1, 2], [3, 4, 5], [6]]
+    assert all(elapsed < 1 for elapsed, _ in batches)
+
+
+def test_partial_batch_is_released_on_deadline():
+    async def run():
+        batcher: MicroBatcher[int] = MicroBatcher(10, max_wait=0.1)
+        collecting = asyncio.create_task(_collect(batcher))
+        batcher.put(1)
+        batcher.put(2)
+        await asyncio.sleep(0.3)
+        batcher.put(3)
+        await asyncio.sleep(0.3)
+        batcher.close()
+        return await collecting
+
+    batches = asyncio.run(run())
+    assert [batch for _, batch in batches] == [[1, 2], [3]]
+    # released by the deadline, well before the batcher was closed
+    assert 0.05 < batches[0][0] < 0.25
+
+
+def test_close_releases_pending_items():
+    async def run():
+        batcher: MicroBatcher[int] = MicroBatcher(10, max_wait=60)
+        collecting = asyncio.create_task(_collect(batcher))
+        batcher.put(1)
+        await asyncio.sleep(0.05)
+        batcher.close()
+        return await asyncio.wait_for(collecting, 1)
+
+    batches = asyncio.run(run())
+    assert [batch for _, batch in batches] == [[1]]
+
+
+def test_closed_empty_batcher_yields_nothing():
+    async def run():
+        batcher: MicroBatcher[int] = MicroBatcher(4, max_wait=1)
+        batcher.close()
+        return await asyncio.wait_for(_collect(batcher), 1)
+
+    assert asyncio.run(run()) == []
+
+
+def test_duplicate_index_ignores_case_and_whitespace():
+    index = DuplicateIndex()
+    assert index.add(1, "The answer is  42.") is None
+    assert index.add(2, "the answer\nis 42.") == 1
+    assert index.add(3, "The answer is 43.") is None
+    # a miner isn't a duplicate of itself
+    assert index.add(1, "The answer is 42.") is None
+    assert len(index) == 2
@@ -0,0 +1,28 @@
+import pytest
+
+from comchat.validator.tokens import chunk_text, count_tokens
+
+TEXTS = {
+    "english": "The quick brown fox jumps over the lazy dog. " * 400,
+    # no spaces or sentence ends to split at
+    "cjk": "機械学習は人工知能の一分野である" * 300,
+    "emoji": "🙂🚀🎉" * 1000,
+    "mixed": "Résumé naïve café. 数据科学与工程。 " * 300,
+}
+
+
+@pytest.mark.parametrize("name", TEXTS)
+def test_chunks_fit_the_limit(name: str):
+    text = TEXTS[name]
+    max_tokens = 500
+    chunks = chunk_text(text, max_tokens)
+    assert len(chunks) > 1
+    for chunk, tokens in chunks:
+        assert tokens <= max_tokens
+        assert count_tokens(chunk, upper_bound=True) <= max_tokens
+    assert "".join(chunk for chunk, _ in chunks).replace(" ", "") == text.replace(" ", "")
+
+
+def test_upper_bound_is_not_below_the_estimate():
+    for text in TEXTS.values():
+        assert count_tokens(text, upper_bound=True) >= count_tokens(text)